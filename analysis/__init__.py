@@ -0,0 +1,3 @@
+from analysis.batch import AnalysisPool, AnalysisResult, analyze_many
+from analysis.cache import AnalysisCache, analyzer_version
+from analysis.instrument import Instrumentation, StageRecord
@@ -1,12 +1,30 @@
-from dataclasses import dataclass
+import io
+import sys
+
+from typing import Any, Iterable, Iterator, BinaryIO, TextIO
+from functools import partial
+from dataclasses import dataclass, field, replace
+from concurrent.futures import ProcessPoolExecutor
 
 from parser.parser import Parser
+from parser.tokenizer import SourceLocation
+from analysis.instrument import Instrumentation, NO_INSTRUMENTATION
+from analysis.serializer import write_analysis
+from analysis.callgraph import CallGraph, build_call_graph
+from analysis.interproc import InterprocInfo, compute_interproc
 
-from ir.translate import Translator
-from ir.cfg.cfg import CFGFunction
-from ir.instr.ir_block import IRAction
-from ir.printer import PrintStyle, pretty_print_ir
+from ir.dump import Fields, dump_fields_to_json
+from ir.translate import Translator, TranslatorConfig
+from ir.cfg.cfg import CFGBlock, CFGFunction
+from ir.instr.ir_block import IRBlock, IRAction, IRFunction
+from ir.printer import PrintStyle, pretty_print_ir, write_ir
 from ir.cfg.cfggen import CFGContext
+from ir.cfg.serialize import (
+    pack_function,
+    unpack_function,
+    pack_loops,
+    unpack_loops
+)
 
 from ir.cfg.dom import (
     complete_successors,
@@ -15,18 +33,18 @@ from ir.cfg.dom import (
 )
 
 from ir.loop.ltree import (
-    generate_loop_tree,
-    find_loop
-)
-from ir.loop.linfo import (
-    LoopInfo,
-    gather_loop_info
+    LoopNode,
+    generate_loop_tree
 )
+from ir.loop.linfo import LoopInfo
+from ir.cfg.features import FeatureConfig, FeatureContext, compute_instruction_features
 from ir.cfg.finfo import (
     CFGFunctionInfo,
     CFGInstructionInfo,
+    INSTRUCTION_INFO_FEATURES,
     gather_function_info,
-    gather_instruction_info
+    gather_instruction_info,
+    make_instruction_info
 )
 
 @dataclass
@@ -35,18 +53,27 @@ class InstructionAnalysis:
     block_id: int                           # CFG block owner Id
     action: IRAction                        # IRAction of this instruction
     called_function: str | None             # If this is the FCALL action, the name of which function is called
-    instruction_info: CFGInstructionInfo    # Instruction basic information
+    instruction_info: CFGInstructionInfo | None # Instruction basic information (None if its features aren't selected)
     loop_info: LoopInfo | None              # Loop basic information
+    location: SourceLocation | None = None  # Source location of the instruction (None if it isn't known)
+    features: dict[str, Any] = field(default_factory=dict) # Other selected features (see `FeatureConfig.features`)
+
+    def dump_fields(self) -> Fields:
+        fields: list[tuple[str, Any]] = [
+            ("owner", self.function),
+            ("block_id", self.block_id),
+            ("action", self.action.value),
+            ("called_function", self.called_function),
+            ("instruction_info", self.instruction_info or {}),
+            ("loop_info", self.loop_info or {})
+        ]
+
+        if self.features:
+            fields.append(("features", self.features))
+        return fields
 
     def dump_to_json(self) -> dict:
-        return {
-            "owner": self.function,
-            "block_id": self.block_id,
-            "action": self.action.value,
-            "called_function": self.called_function,
-            "instruction_info": self.instruction_info.dump_to_json(),
-            "loop_info": self.loop_info.dump_to_json() if self.loop_info else {}
-        }
+        return dump_fields_to_json(self.dump_fields())
 
 @dataclass
 class FunctionAnalysis:
@@ -54,81 +81,204 @@ class FunctionAnalysis:
     cfg: CFGFunction                        # Function's CFG
     info: CFGFunctionInfo                   # Function basic information
     instructions: list[InstructionAnalysis] # Info about each function's instruction
+    interproc: InterprocInfo | None = None  # Interprocedural information (None if the whole program isn't analyzed)
+    _calls: tuple[InstructionAnalysis, ...] | None = field(default=None, init=False, repr=False, compare=False)
 
-    def calls(self) -> list[InstructionAnalysis]:
-        return [ i for i in self.instructions if i.action == IRAction.FCALL ]
+    def calls(self) -> tuple[InstructionAnalysis, ...]:
+        """Function calls of this function (built once).
+        """
+        if self._calls is None:
+            self._calls = tuple(i for i in self.instructions if i.action == IRAction.FCALL)
+        return self._calls
     
-    def dump_to_json(self) -> dict:
-        return {
-            "name": self.name,
-            "info": self.info.dump_to_json()
-        }
+    def dump_fields(self, interproc: bool = False) -> Fields:
+        fields: list[tuple[str, Any]] = [
+            ("name", self.name),
+            ("info", self.info)
+        ]
+
+        if interproc and self.interproc is not None:
+            fields.append(("interproc", self.interproc))
+        return fields
+
+    def dump_to_json(self, interproc: bool = False) -> dict:
+        return dump_fields_to_json(self.dump_fields(interproc))
+    
+    def __getstate__(self) -> dict:
+        # Blocks are linked with each other, so the CFG is pickled in the compact form
+        return { **self.__dict__, "cfg": pack_function(self.cfg), "_calls": None }
+    
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state, cfg=unpack_function(state["cfg"]))
 
 class ProgramAnalysis:
-    def __init__(self, parser: Parser):
+    def __init__(
+        self, 
+        parser: Parser, 
+        translator_conf: TranslatorConfig | None = None,
+        direct_cfg: bool = False,
+        jobs: int = 1,
+        instrumentation: Instrumentation | None = None,
+        feature_conf: FeatureConfig | None = None,
+        features: Iterable[str] | None = None
+    ):
         self.parser: Parser = parser
+        self.translator_conf: TranslatorConfig = translator_conf or TranslatorConfig()
+        self.direct_cfg: bool = direct_cfg # Build the CFG while translating (IR text is printed from the CFG)
+        self.jobs: int = jobs              # Processes for the per-function stages (dominators, loops, finfo)
+        self.instrumentation: Instrumentation | None = instrumentation # Stage timings and counters
+        # Bounds of the near_break / same_inst searches and the instruction features to compute
+        feature_conf = feature_conf or FeatureConfig()
+        self.feature_conf: FeatureConfig = (
+            feature_conf if features is None else replace(feature_conf, features=tuple(features))
+        )
         self.functions: dict[str, FunctionAnalysis] = {}
         self.loops: list = []
-        self.ir_form_debug: str = ""
+        self._ir_blocks: list[IRBlock] = [] # Flat IR, printed on demand (see `ir_form_debug`)
+        self._ir_text: str | None = None
+        self.call_graph: CallGraph = CallGraph() # Call site indexes and the call graph
+        self._all_calls: tuple[InstructionAnalysis, ...] | None = None
+        self._call_sites: dict[SourceLocation, tuple[InstructionAnalysis, ...]] | None = None # See `call_sites`
+        self._line_calls: dict[tuple[str, int], tuple[InstructionAnalysis, ...]] = {}
         self._analyze()
 
     def _analyze(self) -> None:
-        uast = self.parser.parse()
-
-        translator = Translator(root=uast)
-        ir_blocks = translator.translate()
-        self.ir_form_debug = pretty_print_ir(blocks=ir_blocks, style=PrintStyle(show_index=True))
+        inst = self.instrumentation or NO_INSTRUMENTATION
+        with inst.stage("parse"):
+            uast = self.parser.parse()
 
+        translator = Translator(root=uast, conf=self.translator_conf)
         cfgctx: CFGContext = CFGContext()
-        funcs = cfgctx.get_blocks_from_ir(ir_blocks)
-        CFGContext.link_blocks(funcs)
-        complete_successors(funcs)
-
+        
+        if self.direct_cfg:
+            with inst.stage("translate_to_cfg"):
+                funcs = translator.translate_to_cfg(cfgctx)
+                
+            for f in funcs:
+                self._ir_blocks.append(IRBlock(a=IRAction.FDECL, x=IRFunction(name=f.func)))
+                self._ir_blocks.extend(CFGContext.give_flatten_instructions(f))
+        else:
+            with inst.stage("translate"):
+                ir_blocks = translator.translate()
+            self._ir_blocks = ir_blocks
+            with inst.stage("get_blocks_from_ir"):
+                funcs = cfgctx.get_blocks_from_ir(ir_blocks)
+            with inst.stage("link_blocks"):
+                CFGContext.link_blocks(funcs)
+            
+        with inst.stage("complete_successors"):
+            complete_successors(funcs)
+            
         for f in funcs:
-            compute_function_dom(f)
-            compute_strict_dom(f)
+            inst.count("functions")
+            inst.count("blocks", len(f.blocks), function=f.func)
+            inst.count("ir_instructions", sum(len(bb.instrs) for bb in f.blocks), function=f.func)
+            
+        if self.jobs > 1 and len(funcs) > 1:
+            with inst.stage("parallel"):
+                self._analyze_parallel(funcs, inst)
+        else:
+            self._analyze_functions(funcs, inst)
 
-        self.loops = generate_loop_tree(funcs)
-        for f in funcs:
-            self.functions[f.func] = self._build_function_analysis(f)
-
-    def _build_function_analysis(self, f: CFGFunction) -> FunctionAnalysis:
-        instructions = []
-
-        for bb in f.blocks:
-            loop = find_loop(bb, self.loops)
-            for inst in bb.instrs:
-                instructions.append(
-                    InstructionAnalysis(
-                        function=f.func,
-                        block_id=bb.id,
-                        action=inst.a,
-                        called_function=(
-                            inst.subjects[0].name
-                            if inst.a == IRAction.FCALL
-                            else None
-                        ),
-                        instruction_info=gather_instruction_info(
-                            f=f, bb=bb, inst=inst
-                        ),
-                        loop_info=(
-                            gather_loop_info(self.loops, loop)
-                            if loop else None
-                        )
-                    )
-                )
+        with inst.stage("call_graph"):
+            self.call_graph = build_call_graph(self.functions)
+        with inst.stage("interproc"):
+            for name, info in compute_interproc(self.functions, self.call_graph).items():
+                self.functions[name].interproc = info
 
-        return FunctionAnalysis(
-            name=f.func,
-            cfg=f,
-            info=gather_function_info(f),
-            instructions=instructions
-        )
+    def _analyze_functions(self, funcs: list[CFGFunction], inst: Instrumentation) -> None:
+        with inst.stage("dominators"):
+            for f in funcs:
+                with inst.stage("dominators", function=f.func):
+                    inst.count("dom_visits", compute_function_dom(f), function=f.func)
+                    compute_strict_dom(f)
+
+        with inst.stage("loop_tree"):
+            self.loops = generate_loop_tree(funcs)
+            
+        with inst.stage("finfo"):
+            for f in funcs:
+                with inst.stage("finfo", function=f.func):
+                    counters: dict[str, int] = {}
+                    self.functions[f.func] = _build_function_analysis(f, self.loops, counters, self.feature_conf)
+                    for name, value in counters.items():
+                        inst.count(name, value, function=f.func)
+
+    def _analyze_parallel(self, funcs: list[CFGFunction], inst: Instrumentation) -> None:
+        """Run the per-function stages in a process pool. Every function is sent in the 
+        compact form (see `ir.cfg.serialize`) and comes back with its dominators, loops 
+        and analysis. The loop tree of a single function is the same as its part of 
+        the whole program tree, so the results don't differ from the serial mode.
+        """
+        packed: list[tuple] = [ pack_function(f) for f in funcs ]
+        chunksize: int = max(1, len(packed) // (self.jobs * 4))
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            worker = partial(_analyze_packed_function, conf=self.feature_conf)
+            results = list(pool.map(worker, packed, chunksize=chunksize))
+
+        for packed_cfg, packed_loops, info, instructions, counters in results:
+            f = unpack_function(packed_cfg)
+            for name, value in counters.items():
+                inst.count(name, value, function=f.func)
+            self.loops.extend(unpack_loops(packed_loops, f.blocks))
+            self.functions[f.func] = FunctionAnalysis(
+                name=f.func, cfg=f, info=info, instructions=instructions
+            )
+
+    def __getstate__(self) -> dict:
+        # IR blocks are shared with the CFG, so only the IR text is kept
+        return {
+            **self.__dict__, "loops": pack_loops(self.loops, self._blocks()), "instrumentation": None,
+            "_ir_blocks": [], "_ir_text": self.ir_form_debug, "_all_calls": None, "_call_sites": None, "_line_calls": {}
+        }
+    
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.loops = unpack_loops(state["loops"], self._blocks())
+    
+    def _blocks(self) -> list[CFGBlock]:
+        return [ block for f in self.functions.values() for block in f.cfg.blocks ]
+
+    @property
+    def ir_form_debug(self) -> str:
+        """IR text of the code. It is printed on the first access.
+        """
+        if self._ir_text is None:
+            self._ir_text = pretty_print_ir(blocks=self._ir_blocks, style=PrintStyle(show_index=True))
+        return self._ir_text
+
+    def write_ir(self, out: TextIO) -> None:
+        """Write the IR form of the code to a stream (`ir_form_debug` and a new line).
+        Unless the text is printed already, it is streamed without building it.
+
+        Args:
+            out (TextIO): Output stream.
+        """
+        if self._ir_text is not None:
+            out.write(self._ir_text)
+            out.write("\n")
+        else:
+            write_ir(self._ir_blocks, out, style=PrintStyle(show_index=True))
 
     def print_ir(self) -> None:
         """Print the IR form of the code.
         """
-        print(self.ir_form_debug)
+        self.write_ir(sys.stdout)
+
+    def write(self, out: TextIO | BinaryIO, format: str = "golden") -> None:
+        """Write the IR, all calls and function information to a stream.
+        See `analysis.serializer` for the formats.
+
+        Args:
+            out (TextIO | BinaryIO): Text stream or binary buffer (UTF-8 is written).
+            format (str, optional): 'golden' (the golden tests format) or 'json'. Defaults to "golden".
+        """
+        write_analysis(self, out, format)
+
+    def to_bytes(self, format: str = "golden") -> bytes:
+        buf = io.BytesIO()
+        write_analysis(self, buf, format)
+        return buf.getvalue()
 
     def get_function(self, name: str) -> FunctionAnalysis:
         """Get information about a function by the provided name.
@@ -141,14 +291,149 @@ class ProgramAnalysis:
         """
         return self.functions[name]
 
-    def all_calls(self) -> list[InstructionAnalysis]:
-        """Get all function calls from the provided code snippet.
+    def all_calls(self) -> tuple[InstructionAnalysis, ...]:
+        """Get all function calls from the provided code snippet. The calls are collected once,
+        into a tuple: a cached analysis is shared by all its users.
 
         Returns:
-            list[InstructionAnalysis]: List of analysis of function calls.
+            tuple[InstructionAnalysis, ...]: Analysis of function calls.
         """
-        calls = []
-        for f in self.functions.values():
-            calls.extend(f.calls())
-            
-        return calls
+        if self._all_calls is None:
+            self._all_calls = tuple(call for f in self.functions.values() for call in f.calls())
+        return self._all_calls
+
+    def callers_of(self, name: str) -> tuple[str, ...]:
+        """Get functions which call a function.
+
+        Args:
+            name (str): Called function name.
+
+        Returns:
+            tuple[str, ...]: Caller names in the order of `functions`.
+        """
+        return tuple(self.call_graph.callers.get(name, ()))
+
+    @property
+    def call_sites(self) -> dict[SourceLocation, tuple[InstructionAnalysis, ...]]:
+        """Index of function calls by their source location, (file, line, col) -> calls.
+        Several calls can share a location (e.g. a macro expansion). The index is built
+        on the first access.
+        """
+        if self._call_sites is None:
+            sites: dict[SourceLocation, list[InstructionAnalysis]] = {}
+            lines: dict[tuple[str, int], list[InstructionAnalysis]] = {}
+            for call in self.all_calls():
+                if call.location is not None:
+                    sites.setdefault(call.location, []).append(call)
+                    lines.setdefault(call.location[:2], []).append(call)
+
+            self._call_sites = { location: tuple(calls) for location, calls in sites.items() }
+            self._line_calls = { line: tuple(calls) for line, calls in lines.items() }
+
+        return self._call_sites
+
+    def calls_at(self, file: str, line: int, col: int | None = None) -> tuple[InstructionAnalysis, ...]:
+        """Get function calls at a source location.
+
+        Args:
+            file (str): Source file name ("" for a code snippet).
+            line (int): 1-based line.
+            col (int | None, optional): 1-based column. None gives all calls of the line.
+
+        Returns:
+            tuple[InstructionAnalysis, ...]: Calls at the location, in the order of `all_calls`.
+        """
+        sites = self.call_sites
+        if col is None:
+            return self._line_calls.get((file, line), ())
+        return sites.get(SourceLocation(file, line, col), ())
+
+def iter_functions(
+    parser: Parser, 
+    translator_conf: TranslatorConfig | None = None,
+    feature_conf: FeatureConfig | None = None
+) -> Iterator[FunctionAnalysis]:
+    """Analyze the code function by function. Unlike ProgramAnalysis, only one function
+    (its part of the UAST, CFG and analysis) is alive at a time, so the memory is bounded 
+    by the largest function instead of the whole program. C code is converted to the UAST
+    one top-level node at a time (see `Parser.parse_parts`), only the pycparser AST of the
+    whole code is built at once. Other languages are converted as a whole.
+
+    Results are the same as in `ProgramAnalysis(parser, translator_conf).functions`, except
+    that a redefined function is produced for each definition, in the source order.
+    There is no IR text in this mode.
+
+    Args:
+        parser (Parser): Parser with the code to analyze.
+        translator_conf (TranslatorConfig | None, optional): Translator configuration. Defaults to None (the default one).
+        feature_conf (FeatureConfig | None, optional): Instruction features and their bounds. Defaults to None (the default one).
+
+    Yields:
+        FunctionAnalysis: Information about the next function.
+    """
+    translator = Translator(root=None, conf=translator_conf)
+    for f in translator.iter_cfg_functions(CFGContext(), release=True, parts=parser.parse_parts()):
+        complete_successors([f])
+        compute_function_dom(f)
+        compute_strict_dom(f)
+        yield _build_function_analysis(f, generate_loop_tree([f]), conf=feature_conf)
+
+def _analyze_packed_function(data: tuple, conf: FeatureConfig | None = None) -> tuple:
+    f = unpack_function(data)
+    compute_function_dom(f)
+    compute_strict_dom(f)
+
+    loops = generate_loop_tree([f])
+    counters: dict[str, int] = {}
+    analysis = _build_function_analysis(f, loops, counters, conf)
+    return pack_function(f), pack_loops(loops, f.blocks), analysis.info, analysis.instructions, counters
+
+def _build_function_analysis(
+    f: CFGFunction, 
+    loops: list[LoopNode], 
+    counters: dict[str, int] | None = None,
+    conf: FeatureConfig | None = None
+) -> FunctionAnalysis:
+    ctx = FeatureContext(f, loops, conf, counters)
+    conf = ctx.conf
+    instructions = []
+
+    for bb in f.blocks:
+        for index, inst in enumerate(bb.instrs):
+            if conf.features is None:
+                info = gather_instruction_info(f=f, bb=bb, inst=inst, ctx=ctx)
+                loop_info = ctx.require("loop_forest")[bb.id]
+                features = {}
+            else:
+                values = compute_instruction_features(ctx, bb, index, conf.features)
+                info = make_instruction_info(values)
+                loop_info = values.get("loop_info")
+                # Standard features are kept here too, unless they make up `info`
+                features = {
+                    name: value for name, value in values.items()
+                    if name != "loop_info" and (info is None or name not in INSTRUCTION_INFO_FEATURES)
+                }
+
+            instructions.append(
+                InstructionAnalysis(
+                    function=f.func,
+                    block_id=bb.id,
+                    action=inst.a,
+                    called_function=(
+                        inst.subjects[0].name
+                        if inst.a == IRAction.FCALL
+                        else None
+                    ),
+                    instruction_info=info,
+                    loop_info=loop_info,
+                    location=inst.loc,
+                    features=features
+                )
+            )
+
+    return FunctionAnalysis(
+        name=f.func,
+        cfg=f,
+        info=gather_function_info(f, ctx),
+        instructions=instructions
+    )
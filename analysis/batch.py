@@ -0,0 +1,174 @@
+import gc
+import atexit
+
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from parser.parser import Parser, ParserConfig, Language
+from parser.c.pyc_to_uast import c_code_to_uast
+from ir.translate import TranslatorConfig
+from analysis.analyzer import ProgramAnalysis
+
+C_EXTENSIONS = {".c", ".cpp", ".h"}
+
+AnalysisInput = tuple[str, Language] | str | Path
+
+@dataclass
+class AnalysisResult:
+    source: str                            # Path of the input, or "<input N>" for a code snippet
+    analysis: ProgramAnalysis | None       # Analysis of the input (None in the records mode or on error)
+    record: dict | None = None             # Compact features of the input (only in the records mode)
+    error: str | None = None               # Error, if the input wasn't analyzed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def make_record(analysis: ProgramAnalysis) -> dict:
+    """Compact features of an analyzed program: function information and all calls.
+
+    Args:
+        analysis (ProgramAnalysis): Analyzed program.
+
+    Returns:
+        dict: JSON-friendly record.
+    """
+    return {
+        "functions": [ f.dump_to_json() for f in analysis.functions.values() ],
+        "calls": [ call.dump_to_json() for call in analysis.all_calls() ]
+    }
+
+def _detect_language(path: Path) -> Language:
+    return Language.C if path.suffix.lower() in C_EXTENSIONS else Language.CPL
+
+def _make_task(index: int, item: AnalysisInput) -> tuple[str, ParserConfig]:
+    if isinstance(item, tuple):
+        code, lang = item
+        return f"<input {index}>", ParserConfig(code=code, lang=lang)
+
+    path = Path(item)
+    return str(path), ParserConfig(file=str(path), lang=_detect_language(path))
+
+def _error(e: BaseException) -> str:
+    return f"{type(e).__name__}: {e}"
+
+def _analyze_task(task: tuple[str, ParserConfig, TranslatorConfig, bool]) -> AnalysisResult:
+    source, conf, translator_conf, records = task
+    try:
+        analysis = ProgramAnalysis(parser=Parser(conf=conf), translator_conf=translator_conf)
+    except Exception as e:
+        return AnalysisResult(source=source, analysis=None, error=_error(e))
+
+    if records:
+        return AnalysisResult(source=source, analysis=None, record=make_record(analysis))
+    return AnalysisResult(source=source, analysis=analysis)
+
+def _warm_worker() -> None:
+    # Parsers are imported with this module. Parse something once, so the parser
+    # of this process is built, then keep everything alive so far out of the GC.
+    c_code_to_uast("int main() { return 0; }")
+    gc.freeze()
+
+class AnalysisPool:
+    """Persistent pool of analysis processes. Workers import the parsers and build
+    a parser once, when they start, so every next input is analyzed by a warm process.
+    """
+    def __init__(self, jobs: int) -> None:
+        self.jobs: int = jobs
+        self.executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=jobs, initializer=_warm_worker)
+        self.broken: bool = False   # A worker died, the pool can't run tasks anymore
+
+    def analyze_many(
+        self,
+        inputs: Iterable[AnalysisInput],
+        records: bool = False,
+        translator_conf: TranslatorConfig | None = None
+    ) -> list[AnalysisResult]:
+        """Analyze inputs in the pool.
+
+        Args:
+            inputs (Iterable[AnalysisInput]): (code, language) pairs or paths.
+            records (bool, optional): Return compact feature records instead of analyses.
+                Records are much cheaper to send back from a worker. Defaults to False.
+            translator_conf (TranslatorConfig | None, optional): Translator configuration. Defaults to None (the default one).
+
+        Returns:
+            list[AnalysisResult]: Results in the order of inputs. A failed input has its error set,
+                also if its worker died or its result couldn't be sent back. If a worker died,
+                the pool is broken (see `broken`) and inputs not analyzed so far fail too.
+        """
+        tasks: list[tuple] = [ (*_make_task(i, item), translator_conf, records) for i, item in enumerate(inputs) ]
+        futures: list[Future] = [ self.executor.submit(_analyze_task, task) for task in tasks ]
+
+        results: list[AnalysisResult] = []
+        for task, future in zip(tasks, futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                self.broken = True
+                results.append(AnalysisResult(source=task[0], analysis=None, error=_error(e)))
+            except Exception as e:
+                results.append(AnalysisResult(source=task[0], analysis=None, error=_error(e)))
+        return results
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=self.broken)
+
+    def __enter__(self) -> "AnalysisPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+_pools: dict[int, AnalysisPool] = {}
+
+def _get_pool(jobs: int) -> AnalysisPool:
+    if jobs not in _pools:
+        if not _pools:
+            atexit.register(_close_pools)
+        _pools[jobs] = AnalysisPool(jobs=jobs)
+    return _pools[jobs]
+
+def _drop_pool(jobs: int) -> None:
+    pool = _pools.pop(jobs, None)
+    if pool is not None:
+        pool.close()
+
+def _close_pools() -> None:
+    for pool in _pools.values():
+        pool.close()
+    _pools.clear()
+
+def analyze_many(
+    inputs: Iterable[AnalysisInput],
+    jobs: int = 1,
+    records: bool = False,
+    translator_conf: TranslatorConfig | None = None
+) -> list[AnalysisResult]:
+    """Analyze many programs. With jobs > 1 inputs are analyzed by a pool of processes,
+    which is kept between calls (one pool per jobs value), so the start cost is paid once.
+
+    Args:
+        inputs (Iterable[AnalysisInput]): (code, language) pairs or paths (language is detected by the extension).
+        jobs (int, optional): Number of processes. 1 analyzes inputs in this process. Defaults to 1.
+        records (bool, optional): Return compact feature records (see `make_record`) instead of analyses.
+        translator_conf (TranslatorConfig | None, optional): Translator configuration. Defaults to None (the default one).
+
+    Returns:
+        list[AnalysisResult]: Results in the order of inputs. A failed input has its error set.
+    """
+    if jobs > 1:
+        pool = _get_pool(jobs)
+        results = pool.analyze_many(inputs, records=records, translator_conf=translator_conf)
+        if pool.broken:
+            # The next call starts a new pool
+            _drop_pool(jobs)
+        return results
+
+    return [
+        _analyze_task((*_make_task(i, item), translator_conf, records))
+        for i, item in enumerate(inputs)
+    ]
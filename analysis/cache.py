@@ -0,0 +1,140 @@
+import os
+import pickle
+import hashlib
+import tempfile
+
+from pathlib import Path
+from functools import lru_cache
+from collections import OrderedDict
+
+from parser.parser import Parser, ParserConfig, Language
+from ir.translate import TranslatorConfig
+from analysis.analyzer import ProgramAnalysis
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ANALYZER_PACKAGES = ("parser", "ir", "analysis")
+
+@lru_cache(maxsize=1)
+def analyzer_version() -> str:
+    """Hash of the analyzer sources (parsers, IR and analysis packages). Any change
+    of these files gives a new version, so cached results are never reused across changes.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    for package in ANALYZER_PACKAGES:
+        for path in sorted((PROJECT_ROOT / package).rglob("*.py")):
+            digest.update(str(path.relative_to(PROJECT_ROOT)).encode())
+            digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+class AnalysisCache:
+    """Memoization of ProgramAnalysis by the content. Results are keyed by
+    (code hash, language, translator configuration, analyzer version) and kept in
+    an LRU with at most `max_entries` items. If `directory` is set, results are also
+    stored there (pickled, CFGs in the compact form), so they survive between runs.
+
+    A hit returns the same object as before, so results shouldn't be modified.
+    """
+    def __init__(self, max_entries: int = 128, directory: str | Path | None = None) -> None:
+        self.max_entries: int = max_entries
+        self.directory: Path | None = Path(directory) if directory else None
+        self.entries: OrderedDict[str, ProgramAnalysis] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def make_key(self, code: str, lang: Language, translator_conf: TranslatorConfig | None = None) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{analyzer_version()}\0{lang.name}\0{translator_conf or TranslatorConfig()!r}\0".encode())
+        digest.update(code.encode("utf-8", errors="surrogatepass"))
+        return digest.hexdigest()
+
+    def analyze(
+        self,
+        code: str,
+        lang: Language,
+        translator_conf: TranslatorConfig | None = None
+    ) -> ProgramAnalysis:
+        """Analyze the code or take the result of a previous analysis of the same code.
+
+        Args:
+            code (str): Code to analyze.
+            lang (Language): Language of the code.
+            translator_conf (TranslatorConfig | None, optional): Translator configuration. Defaults to None (the default one).
+
+        Returns:
+            ProgramAnalysis: Analysis of the code.
+        """
+        key: str = self.make_key(code, lang, translator_conf)
+        analysis: ProgramAnalysis | None = self.get(key)
+        if analysis is not None:
+            self.hits += 1
+            return analysis
+
+        self.misses += 1
+        analysis = ProgramAnalysis(
+            parser=Parser(conf=ParserConfig(code=code, lang=lang)),
+            translator_conf=translator_conf
+        )
+
+        self.put(key, analysis)
+        return analysis
+
+    def get(self, key: str) -> ProgramAnalysis | None:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        analysis: ProgramAnalysis | None = self._load(key)
+        if analysis is not None:
+            self._remember(key, analysis)
+        return analysis
+
+    def put(self, key: str, analysis: ProgramAnalysis) -> None:
+        self._remember(key, analysis)
+        self._store(key, analysis)
+
+    def clear(self) -> None:
+        """Drop in-process entries. The on-disk store is kept.
+        """
+        self.entries.clear()
+
+    def _remember(self, key: str, analysis: ProgramAnalysis) -> None:
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def _load(self, key: str) -> ProgramAnalysis | None:
+        if self.directory is None:
+            return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def _store(self, key: str, analysis: ProgramAnalysis) -> None:
+        if self.directory is None:
+            return
+
+        path: Path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so a concurrent reader never sees a partial entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(analysis, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+default_cache: AnalysisCache = AnalysisCache()
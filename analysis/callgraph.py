@@ -0,0 +1,122 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from analysis.analyzer import FunctionAnalysis, InstructionAnalysis
+
+@dataclass
+class CallGraph:
+    callee_calls: dict[str, list["InstructionAnalysis"]] = field(default_factory=dict) # Callee -> calls of it (all_calls order)
+    callees: dict[str, list[str]] = field(default_factory=dict)                        # Caller -> distinct callees (call order)
+    callers: dict[str, list[str]] = field(default_factory=dict)                        # Callee -> distinct callers
+    sccs: list[list[str]] = field(default_factory=list)                                # SCCs of defined functions, callees first
+    scc_index: dict[str, int] = field(default_factory=dict)                            # Function -> index of its SCC in `sccs`
+
+    def calls_of(self, callee: str) -> tuple["InstructionAnalysis", ...]:
+        """Get all call sites of a function.
+
+        Args:
+            callee (str): Called function name.
+
+        Returns:
+            tuple[InstructionAnalysis, ...]: Calls of the function (empty if it isn't called).
+        """
+        return tuple(self.callee_calls.get(callee, ()))
+
+    def is_recursive(self, name: str) -> bool:
+        """Check if a function can call itself (directly or through other functions).
+
+        Args:
+            name (str): Defined function name.
+
+        Returns:
+            bool: True if the function is in a call cycle.
+        """
+        scc = self.sccs[self.scc_index[name]]
+        return len(scc) > 1 or name in self.callees.get(name, [])
+
+def build_call_graph(functions: dict[str, "FunctionAnalysis"]) -> CallGraph:
+    """Build call site indexes and the call graph of analyzed functions.
+    Calls of undefined functions (library functions) are indexed, but they aren't graph nodes.
+
+    Args:
+        functions (dict[str, FunctionAnalysis]): Analyzed functions.
+
+    Returns:
+        CallGraph: Indexes and SCCs.
+    """
+    graph = CallGraph()
+    for caller, func in functions.items():
+        callees: dict[str, None] = {}
+        for call in func.calls():
+            graph.callee_calls.setdefault(call.called_function, []).append(call)
+            if call.called_function not in callees:
+                callees[call.called_function] = None
+                graph.callers.setdefault(call.called_function, []).append(caller)
+
+        graph.callees[caller] = list(callees)
+
+    edges: dict[str, list[str]] = {
+        caller: [ callee for callee in callees if callee in functions ]
+        for caller, callees in graph.callees.items()
+    }
+
+    graph.sccs = _strongly_connected(list(functions), edges)
+    for i, scc in enumerate(graph.sccs):
+        for name in scc:
+            graph.scc_index[name] = i
+
+    return graph
+
+def _strongly_connected(nodes: list[str], edges: dict[str, list[str]]) -> list[list[str]]:
+    """Tarjan's algorithm with an explicit stack. SCCs come in the reverse topological order:
+    an SCC is produced after every SCC reachable from it.
+    """
+    index: dict[str, int] = {}
+    low: dict[str, int] = {}
+    on_stack: set[str] = set()
+    stack: list[str] = []
+    sccs: list[list[str]] = []
+
+    for root in nodes:
+        if root in index:
+            continue
+
+        work: list[tuple[str, int]] = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            succs: list[str] = edges.get(node, [])
+            if i == 0:
+                index[node] = low[node] = len(index)
+                stack.append(node)
+                on_stack.add(node)
+            else:
+                # Back from the child succs[i - 1]
+                low[node] = min(low[node], low[succs[i - 1]])
+
+            descended: bool = False
+            while i < len(succs):
+                succ = succs[i]
+                i += 1
+                if succ not in index:
+                    work.append((node, i))
+                    work.append((succ, 0))
+                    descended = True
+                    break
+                if succ in on_stack:
+                    low[node] = min(low[node], index[succ])
+
+            if descended or low[node] != index[node]:
+                continue
+
+            scc: list[str] = []
+            while True:
+                member = stack.pop()
+                on_stack.discard(member)
+                scc.append(member)
+                if member == node:
+                    break
+
+            sccs.append(scc[::-1])
+
+    return sccs
@@ -0,0 +1,149 @@
+import json
+import time
+import tracemalloc
+
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, TextIO
+
+@dataclass
+class StageRecord:
+    stage: str                  # Stage name (parse, translate, dominators, ...)
+    function: str | None        # Function name for per-function stages, None for program stages
+    wall: float                 # Wall time in seconds
+    peak: int = -1              # tracemalloc peak in bytes during the stage. -1 if memory isn't traced
+
+    def dump_to_json(self) -> dict:
+        return {
+            "stage": self.stage,
+            "function": self.function,
+            "wall": self.wall,
+            "peak": self.peak
+        }
+
+@dataclass
+class Instrumentation:
+    """Collects stage timings and counters of an analysis. Pass it to ProgramAnalysis
+    and read `stages`/`counters` (or `dump_to_json`) after the analysis is done.
+
+    Memory tracing slows the analysis down a lot, so it is off by default. If it is on and
+    tracemalloc isn't started yet, it is started for the first stage and stopped after it.
+    """
+    trace_memory: bool = False                                             # Record tracemalloc peaks
+    callback: Callable[[StageRecord], None] | None = None                  # Called on every finished stage
+    stages: list[StageRecord] = field(default_factory=list)                # Finished stages in the finish order
+    counters: dict[str, int] = field(default_factory=dict)                 # Program counters
+    function_counters: dict[str, dict[str, int]] = field(default_factory=dict) # Per-function counters
+    _peaks: list[int] = field(default_factory=list, repr=False)
+    _owns_tracing: bool = field(default=False, repr=False)
+
+    @contextmanager
+    def stage(self, name: str, function: str | None = None) -> Iterator[None]:
+        """Measure a stage. Stages can be nested (e.g. per-function stages inside a program stage).
+
+        Args:
+            name (str): Stage name.
+            function (str | None, optional): Function name for a per-function stage.
+        """
+        if self.trace_memory:
+            if not self._peaks and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+
+            self._enter_peak()
+
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall: float = time.perf_counter() - start
+            peak: int = self._exit_peak() if self.trace_memory else -1
+            self._finish(StageRecord(stage=name, function=function, wall=wall, peak=peak))
+
+    def count(self, name: str, value: int = 1, function: str | None = None) -> None:
+        """Add a value to a counter.
+
+        Args:
+            name (str): Counter name (blocks, ir_instructions, bfs_visits, dom_visits, ...).
+            value (int, optional): Value to add. Defaults to 1.
+            function (str | None, optional): Also add to this function's counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+        if function is not None:
+            counters = self.function_counters.setdefault(function, {})
+            counters[name] = counters.get(name, 0) + value
+
+    def slowest_functions(self, count: int = 10) -> list[tuple[str, float]]:
+        """Functions with the biggest summary time of their stages.
+
+        Args:
+            count (int, optional): How many functions to return. Defaults to 10.
+
+        Returns:
+            list[tuple[str, float]]: (function, seconds), the slowest first.
+        """
+        total: dict[str, float] = {}
+        for record in self.stages:
+            if record.function is not None:
+                total[record.function] = total.get(record.function, 0.0) + record.wall
+
+        return sorted(total.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def dump_to_json(self) -> dict:
+        summary: dict[str, float] = {}
+        for record in self.stages:
+            if record.function is None:
+                summary[record.stage] = summary.get(record.stage, 0.0) + record.wall
+
+        return {
+            "summary": summary,
+            "counters": self.counters,
+            "functions": self.function_counters,
+            "stages": [ record.dump_to_json() for record in self.stages ]
+        }
+
+    def save(self, out: str | TextIO) -> None:
+        """Write `dump_to_json` as JSON.
+
+        Args:
+            out (str | TextIO): File path or an opened text stream.
+        """
+        if isinstance(out, str):
+            with open(out, "w", encoding="utf-8") as f:
+                json.dump(self.dump_to_json(), f, indent=2)
+        else:
+            json.dump(self.dump_to_json(), out, indent=2)
+
+    def _enter_peak(self) -> None:
+        # Peak of the outer stage so far is kept on the stack, because the nested stage resets it
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+
+    def _exit_peak(self) -> int:
+        peak: int = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        elif self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+        return peak
+
+    def _finish(self, record: StageRecord) -> None:
+        self.stages.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+class _NoInstrumentation:
+    """Does nothing. Used when ProgramAnalysis is created without instrumentation.
+    """
+    def stage(self, name: str, function: str | None = None) -> nullcontext:
+        return nullcontext()
+
+    def count(self, name: str, value: int = 1, function: str | None = None) -> None:
+        pass
+
+NO_INSTRUMENTATION = _NoInstrumentation()
@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ir.dump import Fields, dump_fields_to_json
+from analysis.callgraph import CallGraph
+
+if TYPE_CHECKING:
+    from analysis.analyzer import FunctionAnalysis
+
+@dataclass
+class InterprocInfo:
+    transitive_bb_count: int # bb count of the function and of every defined function reachable from it
+    transitive_ir_count: int # ir count of the function and of every defined function reachable from it
+    reachable_functions: int # how many other defined functions are reachable through calls?
+    call_depth: int          # longest chain of calls to defined functions (a call cycle counts as one function)
+    is_recursive: bool       # is this function in a call cycle?
+    reaches_recursion: bool  # is a recursive function (this one included) reachable?
+    reachable_syscalls: int  # syscalls of the function and of every reachable defined function
+
+    def dump_fields(self) -> Fields:
+        return (
+            ("transitive_bb_count", self.transitive_bb_count),
+            ("transitive_ir_count", self.transitive_ir_count),
+            ("reachable_functions", self.reachable_functions),
+            ("call_depth", self.call_depth),
+            ("is_recursive", self.is_recursive),
+            ("reaches_recursion", self.reaches_recursion),
+            ("reachable_syscalls", self.reachable_syscalls)
+        )
+
+    def dump_to_json(self) -> dict:
+        return dump_fields_to_json(self.dump_fields())
+
+def compute_interproc(functions: dict[str, "FunctionAnalysis"], graph: CallGraph) -> dict[str, InterprocInfo]:
+    """Propagate function information bottom-up over the call graph. SCCs are visited
+    callees first, so every SCC is computed once from the already computed SCCs it calls.
+    Reachable SCCs are kept as int bitsets, so shared callees (diamonds) are counted once.
+
+    Args:
+        functions (dict[str, FunctionAnalysis]): Analyzed functions.
+        graph (CallGraph): Call graph of the functions.
+
+    Returns:
+        dict[str, InterprocInfo]: Information of every function.
+    """
+    sccs: list[list[str]] = graph.sccs
+    bb_counts: list[int] = [ sum(functions[name].info.bb_count for name in scc) for scc in sccs ]
+    ir_counts: list[int] = [ sum(functions[name].info.ir_count for name in scc) for scc in sccs ]
+    syscalls: list[int] = [ sum(max(functions[name].info.syscalls, 0) for name in scc) for scc in sccs ]
+
+    reach: list[int] = []
+    depth: list[int] = []
+    recursion: list[bool] = []
+    result: dict[str, InterprocInfo] = {}
+    for i, scc in enumerate(sccs):
+        mask: int = 1 << i
+        scc_depth: int = 0
+        scc_recursion: bool = graph.is_recursive(scc[0])
+        for name in scc:
+            for callee in graph.callees.get(name, []):
+                j: int | None = graph.scc_index.get(callee)
+                if j is None or j == i:
+                    continue
+
+                mask |= reach[j]
+                scc_depth = max(scc_depth, depth[j] + 1)
+                scc_recursion = scc_recursion or recursion[j]
+
+        reach.append(mask)
+        depth.append(scc_depth)
+        recursion.append(scc_recursion)
+
+        bb_count, ir_count, syscall_count, functions_count = _sum_reachable(mask, bb_counts, ir_counts, syscalls, sccs)
+        for name in scc:
+            result[name] = InterprocInfo(
+                transitive_bb_count=bb_count,
+                transitive_ir_count=ir_count,
+                reachable_functions=functions_count - 1,
+                call_depth=scc_depth,
+                is_recursive=graph.is_recursive(name),
+                reaches_recursion=scc_recursion,
+                reachable_syscalls=syscall_count
+            )
+
+    return result
+
+def _sum_reachable(
+    mask: int, bb_counts: list[int], ir_counts: list[int], syscalls: list[int], sccs: list[list[str]]
+) -> tuple[int, int, int, int]:
+    bb_count = ir_count = syscall_count = functions_count = 0
+    while mask:
+        low: int = mask & -mask
+        i: int = low.bit_length() - 1
+        bb_count += bb_counts[i]
+        ir_count += ir_counts[i]
+        syscall_count += syscalls[i]
+        functions_count += len(sccs[i])
+        mask ^= low
+
+    return bb_count, ir_count, syscall_count, functions_count
@@ -0,0 +1,112 @@
+"""Serialization of analysis results without intermediate dicts.
+
+Two formats are supported:
+    golden  The text format of the golden tests: the IR text, then every call as the Python
+            repr of `InstructionAnalysis.dump_to_json()`, then 'function=<name>, info=<repr of
+            FunctionAnalysis.dump_to_json()>' for every function. One item per line.
+    json    Canonical JSON: one object {"ir": ..., "calls": [...], "functions": [...]} with the
+            calls and functions as `dump_to_json` gives them (functions with their interprocedural
+            information), no spaces and ASCII-only strings, i.e. the output of `json.dumps` with
+            separators=(",", ":").
+
+Records are written from their field tables (`dump_fields`, see `ir.dump`), which `dump_to_json`
+is built from too.
+"""
+import io
+import json
+
+from typing import TYPE_CHECKING, Any, BinaryIO, TextIO
+from json.encoder import encode_basestring_ascii
+
+from ir.dump import Fields, is_record
+
+if TYPE_CHECKING:
+    from analysis.analyzer import ProgramAnalysis, FunctionAnalysis, InstructionAnalysis
+
+FORMATS = ("golden", "json")
+
+_JSON_LITERALS: dict = { True: "true", False: "false", None: "null" }
+
+def _golden_fields(fields: Fields) -> str:
+    return "{" + ", ".join([ f"{key!r}: {_golden(value)}" for key, value in fields ]) + "}"
+
+def _golden(value: Any) -> str:
+    if is_record(value):
+        return _golden_fields(value.dump_fields())
+    if isinstance(value, dict):
+        return _golden_fields(value.items())
+    return repr(value)
+
+def _json_fields(fields: Fields) -> str:
+    return "{" + ",".join([ f"{encode_basestring_ascii(key)}:{_json(value)}" for key, value in fields ]) + "}"
+
+def _json(value: Any) -> str:
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if value is None or isinstance(value, bool):
+        return _JSON_LITERALS[value]
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if is_record(value):
+        return _json_fields(value.dump_fields())
+    if isinstance(value, dict):
+        return _json_fields(value.items())
+    return json.dumps(value, separators=(",", ":"))
+
+def instruction_golden(inst: "InstructionAnalysis") -> str:
+    return _golden_fields(inst.dump_fields())
+
+def function_golden(func: "FunctionAnalysis") -> str:
+    return _golden_fields(func.dump_fields())
+
+def instruction_json(inst: "InstructionAnalysis") -> str:
+    return _json_fields(inst.dump_fields())
+
+def function_json(func: "FunctionAnalysis") -> str:
+    return _json_fields(func.dump_fields(interproc=True))
+
+def write_golden(analysis: "ProgramAnalysis", out: TextIO) -> None:
+    analysis.write_ir(out)
+    for call in analysis.all_calls():
+        out.write(instruction_golden(call))
+        out.write("\n")
+    for name, func in analysis.functions.items():
+        out.write(f"function={name}, info={function_golden(func)}\n")
+
+def write_json(analysis: "ProgramAnalysis", out: TextIO) -> None:
+    out.write('{"ir":')
+    out.write(_json(analysis.ir_form_debug))
+    out.write(',"calls":[')
+    for i, call in enumerate(analysis.all_calls()):
+        if i:
+            out.write(",")
+        out.write(instruction_json(call))
+    out.write('],"functions":[')
+    for i, func in enumerate(analysis.functions.values()):
+        if i:
+            out.write(",")
+        out.write(function_json(func))
+    out.write("]}")
+
+def write_analysis(analysis: "ProgramAnalysis", out: TextIO | BinaryIO, format: str = "golden") -> None:
+    """Write analysis results to a text stream or a binary buffer (UTF-8).
+
+    Args:
+        analysis (ProgramAnalysis): Analysis to write.
+        out (TextIO | BinaryIO): Output stream.
+        format (str, optional): 'golden' or 'json'. Defaults to "golden".
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format: {format}, expected one of {FORMATS}")
+
+    writer = write_golden if format == "golden" else write_json
+    if isinstance(out, io.TextIOBase):
+        writer(analysis, out)
+        return
+
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="\n", write_through=True)
+    try:
+        writer(analysis, text)
+        text.flush()
+    finally:
+        text.detach()
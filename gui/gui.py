@@ -4,8 +4,9 @@ import tkinter as tk
 
 from datetime import datetime
 from tkinter import ttk, filedialog, messagebox
-from parser.parser import Parser, ParserConfig, Language
+from parser.parser import Language
 from analysis.analyzer import ProgramAnalysis
+from analysis.cache import default_cache
 
 class CodeTab(ttk.Frame):
     def __init__(self, master, title: str):
@@ -14,6 +15,7 @@ class CodeTab(ttk.Frame):
         self.title = title
         self.analyzer: ProgramAnalysis | None = None
         self.function_calls_map = {}
+        self.call_items = {}
         self.excluded_items = set()
         
         top = ttk.Frame(self)
@@ -87,18 +89,14 @@ class CodeTab(ttk.Frame):
         self.output.delete("1.0", tk.END)
         self.analyzer = None
         self.function_calls_map.clear()
+        self.call_items.clear()
         self.excluded_items.clear()
 
         code = self.editor.get("1.0", tk.END)
 
         try:
-            analyzer = ProgramAnalysis(
-                parser=Parser(
-                    ParserConfig(
-                        code=code,
-                        lang=Language.from_string(self.lang.get()),
-                    )
-                )
+            analyzer = default_cache.analyze(
+                code=code, lang=Language.from_string(self.lang.get())
             )
             
             self.analyzer = analyzer
@@ -124,7 +122,7 @@ class CodeTab(ttk.Frame):
                 self.function_calls_map[call_key] = call
                 
                 call_tags = ('excluded',) if call_key in self.excluded_items else ()
-                self.tree.insert(
+                self.call_items[id(call)] = self.tree.insert(
                     fn_id,
                     "end",
                     text=f"call {call.called_function}",
@@ -317,8 +315,16 @@ class CodeTab(ttk.Frame):
                 child_key = child_values[0]
                 self.excluded_items.add(child_key)
                 self.tree.item(child, tags=('excluded',))
+
+        # Calls of this function from other functions
+        call_sites = self.analyzer.call_graph.calls_of(obj_key) if self.analyzer else []
+        for call in call_sites:
+            call_item = self.call_items.get(id(call))
+            if call_item:
+                self.excluded_items.add(self.tree.item(call_item, "values")[0])
+                self.tree.item(call_item, tags=('excluded',))
         
-        self.output.insert(tk.END, f"\nExcluded function with all calls: {obj_key}")
+        self.output.insert(tk.END, f"\nExcluded function with all calls: {obj_key} ({len(call_sites)} call sites)")
 
     def clear_exclusions(self):
         self.excluded_items.clear()
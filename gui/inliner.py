@@ -1,12 +1,12 @@
-import re
 import csv
 from datetime import datetime
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
-from parser.parser import Parser, ParserConfig, Language
+from parser.parser import Language
 from analysis.analyzer import ProgramAnalysis
+from analysis.cache import default_cache
 
 class SimpleInlineMarkerApp(tk.Tk):
     def __init__(self):
@@ -103,13 +103,8 @@ class SimpleInlineMarkerApp(tk.Tk):
             return
             
         try:
-            self.analyzer = ProgramAnalysis(
-                parser=Parser(
-                    conf=ParserConfig(
-                        code=code,
-                        lang=Language.from_string(self.lang.get()),
-                    )
-                )
+            self.analyzer = default_cache.analyze(
+                code=code, lang=Language.from_string(self.lang.get())
             )
             
             self.all_calls = self.analyzer.all_calls()
@@ -134,43 +129,11 @@ class SimpleInlineMarkerApp(tk.Tk):
         if not self.all_calls or not self.original_lines:
             return
             
-        call_index = 0
-        lines = self.original_lines
-        
-        for line_num, line in enumerate(lines, 1):
-            line_calls = []
-            
-            if call_index < len(self.all_calls):
-                call = self.all_calls[call_index]
-                called_func = call.called_function
-                
-                if called_func and called_func in line:
-                    if self.is_function_call_in_line(line, called_func):
-                        line_calls.append(call)
-                        call_index += 1
-            
+        for line_num in range(1, len(self.original_lines) + 1):
+            line_calls = self.analyzer.calls_at("", line_num)
             if line_calls:
                 self.function_calls_by_line[line_num] = line_calls
                 
-    def is_function_call_in_line(self, line, func_name):
-        line = re.sub(r'//.*|/\*.*?\*/', '', line)
-
-        pattern = rf'\b{func_name}\s*(?:<[^<>]*>)?\s*\('
-        match = re.search(pattern, line)
-        if not match:
-            return False
-
-        if re.match(r'.*\)\s*\{', line):
-            return False
-
-        before = line[:match.start()].strip()
-        if re.match(r'^[\w:\*&<>\s]+$', before) and not any(
-            sym in before for sym in ['=', 'return', '(', ',', ';']
-        ):
-            return False
-
-        return True
-    
     def clear_highlights(self):
         for tag in ["call_line", "inline_mark", "noinline_mark"]:
             self.code_text.tag_remove(tag, "1.0", "end")
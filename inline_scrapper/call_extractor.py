@@ -7,15 +7,13 @@ from pathlib import Path
 from typing import Any
 
 from pycparser import c_ast, c_generator
-from funcextractor import (
-    _parse_file,
-    add_extra_define,
-    add_include_dir,
-    set_cpp_extra_args,
-    set_cpp_path,
-    set_fake_libc_path,
-    set_fake_types_header,
-)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.append(str(SCRIPT_DIR.parent))
+
+from profiling import pop_profile_arguments, run_profiled, track_input
+from funcextractor import ExtractorConfig, ExtractorSession
+from parser.c.pyc_lazy import LazyTranslationUnit
 
 GEN = c_generator.CGenerator()
 
@@ -70,9 +68,10 @@ def _get_decl_typename(type_node: c_ast.Node | None) -> str | None:
 
 
 class FunctionAndCallCollector(c_ast.NodeVisitor):
-    def __init__(self, tu_path: Path, project_root: Path):
+    def __init__(self, tu_path: Path, project_root: Path, unit: LazyTranslationUnit | None = None):
         self.tu_path = tu_path
         self.project_root = project_root
+        self.unit = unit  # Lazy unit of the TU: function code is sliced from the sources
         self.functions: list[dict[str, Any]] = []
         self.calls: list[dict[str, Any]] = []
         self.function_stack: list[dict[str, Any]] = []
@@ -83,7 +82,12 @@ class FunctionAndCallCollector(c_ast.NodeVisitor):
     def visit_FuncDef(self, node: c_ast.FuncDef) -> None:
         decl = node.decl
         coord = _coord_dict(decl.coord, self.project_root)
-        end_line = _max_line(node)
+        code = self.unit.source(decl.name) if self.unit else None
+        if code is not None:
+            end_line = self.unit.functions[decl.name].end_line
+        else:
+            code = GEN.visit(node)
+            end_line = _max_line(node)
         func_type = decl.type
         params = []
         arg_decls = getattr(func_type, "args", None)
@@ -112,7 +116,7 @@ class FunctionAndCallCollector(c_ast.NodeVisitor):
             "return_type": _get_decl_typename(getattr(func_type, "type", None)),
             "signature": _get_decl_typename(func_type),
             "params": params,
-            "code": GEN.visit(node),
+            "code": code,
         }
         self._function_index += 1
 
@@ -254,7 +258,13 @@ def _load_inline_calls(inline_json_paths: list[str], project_root: Path) -> tupl
     return matched_keys, raw_events
 
 
-def extract_project_calls(project_root: Path, inline_json_paths: list[str] | None = None) -> dict[str, Any]:
+def extract_project_calls(
+    project_root: Path,
+    inline_json_paths: list[str] | None = None,
+    session: ExtractorSession | None = None,
+) -> dict[str, Any]:
+    # Every translation unit is parsed once, so its AST isn't cached
+    session = session or ExtractorSession(max_asts=1)
     translation_units = _collect_translation_units(project_root)
     all_functions: list[dict[str, Any]] = []
     all_calls: list[dict[str, Any]] = []
@@ -270,14 +280,21 @@ def extract_project_calls(project_root: Path, inline_json_paths: list[str] | Non
     removed_calls: list[dict[str, Any]] = []
 
     for tu in translation_units:
-        ast = _parse_file(tu, project_root)
+        with track_input(str(tu)):
+            unit = None
+            if session.config.lazy_bodies:
+                unit = session.index_file(tu, project_root)
+                ast = c_ast.FileAST(ext=unit.definitions()) if unit is not None else None
+            else:
+                ast = session.parse_file(tu, project_root)
+            if ast is not None:
+                collector = FunctionAndCallCollector(tu, project_root, unit)
+                collector.visit(ast)
+
         if ast is None:
             parse_failures.append({"file": _norm(tu, project_root), "reason": "pycparser returned None"})
             continue
 
-        collector = FunctionAndCallCollector(tu, project_root)
-        collector.visit(ast)
-
         for fn in collector.functions:
             key = (fn["name"], fn["file"], fn["decl_line"], fn["decl_column"])
             if key not in seen_functions:
@@ -391,6 +408,17 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         help="Extra -D define, can be repeated",
     )
     parser.add_argument("--fake-types-header", default=None, help="Optional forced include header")
+    parser.add_argument(
+        "--compile-commands",
+        default=None,
+        help="compile_commands.json: files listed there are preprocessed with their own -I/-D/-include flags",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="Index translation units and slice function code from the sources instead of regenerating it "
+             "(faster; code isn't macro-expanded and end_line is the line of the closing brace)",
+    )
     return parser
 
 
@@ -404,17 +432,19 @@ def _main() -> int:
         print(f"[ERROR] project root does not exist: {project_root}", file=sys.stderr)
         return 1
 
-    set_fake_libc_path(args.fake_libc)
-    set_cpp_path(args.cpp_path)
-    set_cpp_extra_args(args.cpp_arg)
-    if args.fake_types_header:
-        set_fake_types_header(args.fake_types_header)
-    for inc in args.include_dir:
-        add_include_dir(inc)
-    for define in args.define:
-        add_extra_define(define)
-
-    dataset = extract_project_calls(project_root, args.inline_json)
+    config = ExtractorConfig(
+        cpp_path=args.cpp_path,
+        cpp_extra_args=args.cpp_arg,
+        fake_libc_path=Path(args.fake_libc),
+        include_dirs=[str(Path(inc).resolve()) for inc in args.include_dir],
+        defines=args.define,
+        fake_types_header=Path(args.fake_types_header).resolve() if args.fake_types_header else None,
+        lazy_bodies=args.lazy,
+        share_header_prefix=True,
+        compile_commands=Path(args.compile_commands).resolve() if args.compile_commands else None,
+    )
+
+    dataset = extract_project_calls(project_root, args.inline_json, ExtractorSession(config, max_asts=1))
     output_json.parent.mkdir(parents=True, exist_ok=True)
     with output_json.open("w", encoding="utf-8") as f:
         json.dump(dataset, f, indent=2, ensure_ascii=False)
@@ -432,4 +462,5 @@ def _main() -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(_main())
+    profile, sys.argv = pop_profile_arguments(sys.argv)
+    raise SystemExit(run_profiled(profile, _main))
@@ -6,14 +6,49 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 sys.path.append(str(PROJECT_ROOT))
 
-from analysis.analyzer import ProgramAnalysis
+from collections import OrderedDict
+
+from analysis.analyzer import ProgramAnalysis, InstructionAnalysis
 from parser.parser import Parser, ParserConfig, Language
-from inline_scrapper.funcextractor import extract_inlined_pair, set_fake_libc_path
+from inline_scrapper.funcextractor import ExtractorConfig, ExtractorSession
+from profiling import pop_profile_arguments, run_profiled, track_input
 
 def _load_json(path):
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+MAX_ANALYSES = 256 # How many analyzed pairs are kept for the next events
+
+def _find_event_call(
+    analyzer: ProgramAnalysis, 
+    event: dict, 
+    file: str,
+    key: tuple,
+    used: set[tuple]
+) -> InstructionAnalysis | None:
+    """Find the call of an inlining event. The caller is analyzed from its source AST, so
+    the event location is looked up in the call site index directly (`file` is the caller's
+    file name as the preprocessor reported it).
+
+    GCC reports one location for a whole expression (the outermost call), so if there is no
+    such call at the event location, calls on the same line are taken. Every call is matched
+    to one event at most (`used`, by `key` of the analysis, the call location and the call's
+    index there, so a match holds after the analysis is evicted and analyzed again).
+    """
+    line, column = event.get("line"), event.get("column")
+    for call in analyzer.calls_at(file, line, column) + analyzer.calls_at(file, line):
+        if call.called_function != event.get("callee"):
+            continue
+
+        loc = call.location
+        # By identity: calls of the same function on one location are equal dataclasses
+        position = next(i for i, site_call in enumerate(analyzer.calls_at(*loc)) if site_call is call)
+        call_key = (key, loc, position)
+        if call_key not in used:
+            used.add(call_key)
+            return call
+    return None
+
 def _main() -> None:
     """ The script uses the inline dump from compilation. This dump has an essential data
     where and which function was inlined.
@@ -25,8 +60,8 @@ def _main() -> None:
                scrapper.
     """
     
-    if len(sys.argv) != 5:
-        print(f"Usage: python {sys.argv[0]} <json> <project_root> <output_file> <fakelibs>")
+    if len(sys.argv) not in (5, 6):
+        print(f"Usage: python {sys.argv[0]} <json> <project_root> <output_file> <fakelibs> [compile_commands.json]")
         sys.exit(1)
 
     json_path: Path = Path(sys.argv[1])
@@ -36,6 +71,10 @@ def _main() -> None:
     fakelibs: str | None = None
     if len(sys.argv) > 4:
         fakelibs = sys.argv[4]
+
+    compile_commands: Path | None = None # Per-file preprocessor flags of the real build
+    if len(sys.argv) > 5:
+        compile_commands = Path(sys.argv[5]).resolve()
     
     output_dir.parent.mkdir(parents=True, exist_ok=True)
 
@@ -45,6 +84,9 @@ def _main() -> None:
     if not project_root.is_dir():
         print(f"Error: Project root not found: {project_root}")
         sys.exit(1)
+    if compile_commands is not None and not compile_commands.is_file():
+        print(f"Error: Compilation database not found: {compile_commands}")
+        sys.exit(1)
 
     data: dict = _load_json(json_path)
     events: list[dict] = data.get("inlining_events", [])
@@ -58,43 +100,46 @@ def _main() -> None:
     found_count: int = 0
     total: int = len(events)
 
-    offsets: dict[str:int] = {}
+    # Only the caller and the callee of every event are needed, so bodies are parsed lazily
+    session = ExtractorSession(ExtractorConfig(
+        fake_libc_path=Path(fakelibs) if fakelibs else None,
+        lazy_bodies=True,
+        share_header_prefix=True,
+        compile_commands=compile_commands
+    ))
+    # (file, caller, callee) -> analysis of the pair, least recently used first
+    analyses: OrderedDict[tuple, ProgramAnalysis] = OrderedDict()
+    used_calls: set[tuple] = set() # Matched calls (see `_find_event_call`)
     dumped_events: list[dict] = []
     for event in events:
-        set_fake_libc_path(path=fakelibs)
-        code: str = extract_inlined_pair(event=event, project_root=project_root)
-        if not code:
-            continue
+        with track_input(f"{event.get('file')}:{event.get('line')} {event.get('caller')} -> {event.get('callee')}"):
+            pair = session.find_inlined_pair(event=event, project_root=project_root)
+            if not pair:
+                continue
+
+            # Functions are converted from the cached ASTs, without generating and parsing code again
+            key = (event.get("file"), event.get("caller"), event.get("callee"))
+            analyzer: ProgramAnalysis | None = analyses.get(key)
+            if analyzer is None:
+                try:
+                    analyzer = ProgramAnalysis(parser=Parser(conf=ParserConfig(nodes=list(pair), lang=Language.C)))
+                except Exception as ex:
+                    print(f"Analysis error on: {key}")
+                    raise Exception("Analysis error!") from ex
+                analyses[key] = analyzer
+                if len(analyses) > MAX_ANALYSES:
+                    analyses.popitem(last=False)
+            else:
+                analyses.move_to_end(key)
+
+        file: str = pair[1].coord.file if pair[1].coord else ""
+        fcall: InstructionAnalysis | None = _find_event_call(analyzer, event, file, key, used_calls)
+        if fcall is not None:
+            dumped_events.append({
+                "callee": analyzer.get_function(event.get("callee")).dump_to_json(),
+                "caller": fcall.dump_to_json()
+            })
 
-        try:
-            analyzer: ProgramAnalysis = ProgramAnalysis(
-                parser=Parser(
-                    conf=ParserConfig(
-                        code=code, lang=Language.C
-                    )
-                )
-            )
-        except Exception as ex:
-            print(f"Parser error on code:\n{code}")
-            raise Exception("Parser error!") from ex
-
-        funccall_index: int = 0
-        offset: int = offsets.get(event.get("caller") + event.get("callee"), 0)
-        caller_function = analyzer.get_function(event.get("caller"))
-        for fcall in caller_function.calls():
-            if fcall.called_function == event.get("callee"):
-                if funccall_index != offset:
-                    funccall_index += 1
-                    continue
-
-                dumped_events.append({
-                    "callee": analyzer.get_function(event.get("callee")).dump_to_json(),
-                    "caller": fcall.dump_to_json()
-                })
-
-                break
-
-        offsets[event.get("caller") + event.get("callee")] = offset + 1
         found_count += 1
         if found_count % 10 == 0:
             print(f"Processed {found_count}/{total} pairs...")
@@ -105,5 +150,6 @@ def _main() -> None:
     print(f"Done. Extracted {found_count} inlining pairs.")
 
 if __name__ == "__main__":
-    _main()
+    profile, sys.argv = pop_profile_arguments(sys.argv)
+    run_profiled(profile, _main)
     
\ No newline at end of file
@@ -1,106 +1,448 @@
+"""Extraction of caller/callee pairs from a C project with pycparser.
+
+Configuration and caches live in an `ExtractorSession`: preprocessor settings, the include
+directories of a project, found functions and parsed ASTs. ASTs are kept in an LRU cache
+with an entry and a byte budget (bytes are estimated from the node count), so big projects
+don't keep every translation unit in memory. With `lazy_bodies`, files are indexed instead of
+parsed and only the bodies of the requested functions are parsed (see `parser.c.pyc_lazy`).
+With `share_header_prefix`, the common header part of preprocessed files is parsed once
+(see `parser.c.pyc_prefix`). With `compile_commands`, every file listed in the compilation
+database is preprocessed with its own include directories, defines and forced includes.
+
+Sessions don't share state, so several configurations can be used at once (a session can
+also be sent to a worker process, its caches are dropped on pickling). The module functions
+use a default session.
+"""
+import json
+import shlex
+import threading
+
 from pathlib import Path
-from pycparser import parse_file, c_ast, c_generator
-
-_cpp_path = "gcc"
-_cpp_extra_args = []
-_ast_cache = {}
-_func_cache = {}
-_inc_cache = None
-_fake_libc_path = None
-_additional_include_dirs = []
-_extra_defines = []
-_fake_types_header = None
+from dataclasses import dataclass, field
+from collections import OrderedDict
+from pycparser import parse_file, preprocess_file, c_ast, c_generator
+
+from parser.c.pyc_lazy import LazyTranslationUnit
+from parser.c.pyc_prefix import HeaderPrefixCache
+
+_NODE_BYTES = 320 # Measured memory of a pycparser node with its coordinate (tracemalloc, CPython 3.11)
+
+# Preprocessor flags taken from a compilation database (the value is glued or the next argument)
+_PATH_FLAGS = ("-I", "-isystem", "-iquote", "-idirafter", "-include", "-imacros")
+_VALUE_FLAGS = ("-D", "-U")
+
+@dataclass
+class ExtractorConfig:
+    cpp_path: str = "gcc"                                   # C preprocessor executable
+    cpp_extra_args: list[str] = field(default_factory=list) # Extra preprocessor arguments
+    fake_libc_path: Path | None = None                      # pycparser fake_libc_include directory
+    include_dirs: list[str] = field(default_factory=list)   # Include directories in addition to the project ones
+    defines: list[str] = field(default_factory=list)        # Extra -D defines
+    fake_types_header: Path | None = None                   # Header included before every file (-include)
+    lazy_bodies: bool = False                               # Index files, parse only the requested function bodies
+    share_header_prefix: bool = False                       # Parse the common header prefix of files once
+    compile_commands: Path | None = None                    # compile_commands.json with flags of every file
+
+class ExtractorSession:
+    def __init__(
+        self,
+        config: ExtractorConfig | None = None,
+        max_asts: int | None = 64,
+        max_ast_bytes: int | None = 1 << 30,
+        max_functions: int | None = 1024
+    ) -> None:
+        self.config: ExtractorConfig = config or ExtractorConfig()
+        self.max_asts: int | None = max_asts           # How many ASTs are cached at most (None - no limit)
+        self.max_ast_bytes: int | None = max_ast_bytes # Estimated bytes of cached ASTs at most (None - no limit)
+        self.max_functions: int | None = max_functions # How many found functions are cached at most (None - no limit)
+        self.ast_bytes: int = 0                        # Estimated bytes of cached ASTs
+        self.parsed_files: int = 0                     # How many files were preprocessed and parsed (or indexed)
+        # (path, lazy) -> (AST or lazy unit, estimated bytes), least recently used first
+        self._asts: OrderedDict[tuple[Path, bool], tuple[c_ast.FileAST | LazyTranslationUnit, int]] = OrderedDict()
+        # (project root, name) -> found function, least recently used first
+        self._functions: OrderedDict[tuple[Path, str], tuple[c_ast.FuncDef | None, Path | None]] = OrderedDict()
+        self._defined: dict[Path, frozenset[str]] = {} # File -> names of the functions it defines (kept after eviction)
+        self._c_files: dict[Path, list[Path]] = {}      # Project root -> its C files
+        self._include_dirs: dict[Path, list[str]] = {}
+        self._compile_flags: dict[Path, list[str]] | None = None # File -> flags (see `compile_flags`)
+        self._prefixes: HeaderPrefixCache = HeaderPrefixCache() # Parsed header prefixes (with `share_header_prefix`)
+        self._lock: threading.Lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        # Caches are process-local, a worker starts with empty ones
+        return {
+            "config": self.config, "max_asts": self.max_asts,
+            "max_ast_bytes": self.max_ast_bytes, "max_functions": self.max_functions
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def clear(self) -> None:
+        """Drop all caches (e.g. after the configuration is changed).
+        """
+        with self._lock:
+            self._asts.clear()
+            self._functions.clear()
+            self._defined.clear()
+            self._c_files.clear()
+            self._include_dirs.clear()
+            self._compile_flags = None
+            self._prefixes.clear()
+            self.ast_bytes = 0
+
+    def include_dirs(self, project_root: Path) -> list[str]:
+        """Get include directories of a project: its root, 'include' and every directory with a header,
+        plus the configured ones. Computed once per project. Used for files which aren't in the
+        compilation database.
+        """
+        project_root = Path(project_root)
+        if project_root in self._include_dirs:
+            return self._include_dirs[project_root]
+
+        incs = set()
+        incs.add(str(project_root / "include"))
+        incs.add(str(project_root))
+        for p in project_root.rglob("*.h"):
+            incs.add(str(p.parent))
+        for d in self.config.include_dirs:
+            incs.add(d)
+
+        result = sorted(str(d) for d in incs if Path(d).exists())
+        self._include_dirs[project_root] = result
+        return result
+
+    def compile_flags(self, path: Path) -> list[str] | None:
+        """Get preprocessor flags of a file from the compilation database (read once).
+
+        Returns:
+            list[str] | None: Flags, None if there is no database or the file isn't in it.
+        """
+        if self.config.compile_commands is None:
+            return None
+
+        with self._lock:
+            if self._compile_flags is None:
+                self._compile_flags = load_compile_commands(self.config.compile_commands)
+        return self._compile_flags.get(Path(path).resolve())
+
+    def parse_file(self, path: Path, project_root: Path) -> c_ast.FileAST | None:
+        """Preprocess and parse a file, or take its AST from the cache.
+
+        Args:
+            path (Path): C file.
+            project_root (Path): Project root (for include directories).
+
+        Returns:
+            c_ast.FileAST | None: AST of the file, None if it can't be parsed.
+        """
+        cached = self._cached((path, False))
+        if cached is not None:
+            return cached
+
+        cpp_args = self._cpp_args(project_root, path)
+        try:
+            if self.config.share_header_prefix:
+                text = preprocess_file(str(path), cpp_path=self.config.cpp_path, cpp_args=cpp_args)
+                ast = self._prefixes.parse(text, str(path))
+            else:
+                ast = parse_file(
+                    str(path),
+                    use_cpp=True,
+                    cpp_path=self.config.cpp_path,
+                    cpp_args=cpp_args,
+                )
+        except Exception as ex:
+            print(f"[WARN] Failed to parse: {path}")
+            print(f"[WARN] Parser error: {ex}")
+            self._defined[path] = frozenset()
+            return None
+
+        self.parsed_files += 1
+        self._defined[path] = frozenset(n.decl.name for n in ast.ext if isinstance(n, c_ast.FuncDef))
+        self._store((path, False), ast, _estimate_ast_bytes(ast))
+        return ast
+
+    def index_file(self, path: Path, project_root: Path) -> LazyTranslationUnit | None:
+        """Preprocess a file and index its function definitions (bodies are parsed on request),
+        or take the unit from the cache.
+
+        Returns:
+            LazyTranslationUnit | None: Unit of the file, None if it can't be parsed.
+        """
+        cached = self._cached((path, True))
+        if cached is not None:
+            return cached
+
+        cpp_args = self._cpp_args(project_root, path)
+        try:
+            text = preprocess_file(str(path), cpp_path=self.config.cpp_path, cpp_args=cpp_args)
+            unit = LazyTranslationUnit(text, str(path), self._prefixes if self.config.share_header_prefix else None)
+        except Exception as ex:
+            print(f"[WARN] Failed to parse: {path}")
+            print(f"[WARN] Parser error: {ex}")
+            self._defined[path] = frozenset()
+            return None
+
+        self.parsed_files += 1
+        self._defined[path] = frozenset(unit.functions)
+        # Bodies parsed later aren't counted
+        self._store((path, True), unit, _estimate_ast_bytes(unit.ast) + len(unit.text))
+        return unit
+
+    def file_ast(self, path: Path, project_root: Path) -> c_ast.FileAST | None:
+        """Get the declarations of a file: its AST, or the AST of its lazy unit (function bodies
+        are empty) with `lazy_bodies`.
+        """
+        if not self.config.lazy_bodies:
+            return self.parse_file(path, project_root)
+
+        unit = self.index_file(path, project_root)
+        return unit.ast if unit is not None else None
+
+    def _find_in_file(self, path: Path, project_root: Path, name: str) -> c_ast.FuncDef | None:
+        if self.config.lazy_bodies:
+            unit = self.index_file(path, project_root)
+            return unit.function(name) if unit is not None else None
+
+        ast = self.parse_file(path, project_root)
+        if ast is None:
+            return None
+
+        visitor = _FuncDefVisitor(name)
+        visitor.visit(ast)
+        return visitor.node
+
+    def _cpp_args(self, project_root: Path, path: Path | None = None) -> list[str]:
+        if not self.config.fake_libc_path:
+            raise FileNotFoundError(
+                "Set fakelibs! Download them from: https://github.com/eliben/pycparser/tree/main/utils/fake_libc_include"
+            )
+
+        cpp_args = [
+            "-E",
+            "-nostdinc",
+            f"-I{self.config.fake_libc_path}",
+            "-D__attribute__(x)=",
+            "-D__extension__=",
+            "-D__inline__=inline",
+            "-D__restrict__=",
+            "-D__restrict=",
+            "-Drestrict=",
+            "-D__asm__(x)=",
+            "-D__asm(x)=",
+            "-D__volatile__=",
+        ]
+
+        flags = self.compile_flags(path) if path is not None else None
+        if flags is None:
+            for d in self.include_dirs(project_root):
+                cpp_args.append(f"-I{d}")
+        else:
+            for d in self.config.include_dirs:
+                cpp_args.append(f"-I{d}")
+            cpp_args.extend(flags)
+
+        for define in self.config.defines:
+            cpp_args.append(f"-D{define}")
+
+        if self.config.fake_types_header:
+            cpp_args.append(f"-include{self.config.fake_types_header}")
+
+        return cpp_args + self.config.cpp_extra_args
+
+    def _cached(self, key: tuple[Path, bool]) -> c_ast.FileAST | LazyTranslationUnit | None:
+        with self._lock:
+            cached = self._asts.get(key)
+            if cached is None:
+                return None
+            self._asts.move_to_end(key)
+            return cached[0]
+
+    def _store(self, key: tuple[Path, bool], ast: c_ast.FileAST | LazyTranslationUnit, size: int) -> None:
+        with self._lock:
+            if key in self._asts:
+                self.ast_bytes -= self._asts.pop(key)[1]
+
+            self._asts[key] = (ast, size)
+            self.ast_bytes += size
+            # The newest AST stays even if it alone is over the budget
+            while len(self._asts) > 1 and (
+                (self.max_asts is not None and len(self._asts) > self.max_asts) or
+                (self.max_ast_bytes is not None and self.ast_bytes > self.max_ast_bytes)
+            ):
+                _, (_, evicted) = self._asts.popitem(last=False)
+                self.ast_bytes -= evicted
+
+    def find_function(self, project_root: Path, name: str) -> tuple[c_ast.FuncDef | None, Path | None]:
+        """Find a function definition in the project's C files. Names defined by every parsed file
+        are remembered, so a file is parsed again only if it defines the function and its AST was
+        evicted.
+
+        Returns:
+            tuple[c_ast.FuncDef | None, Path | None]: Definition of the function and its file (Nones if not found).
+        """
+        project_root = Path(project_root)
+        key = (project_root, name)
+        with self._lock:
+            if key in self._functions:
+                self._functions.move_to_end(key)
+                return self._functions[key]
+
+        if project_root not in self._c_files:
+            self._c_files[project_root] = sorted(project_root.rglob("*.c"))
+
+        result: tuple[c_ast.FuncDef | None, Path | None] = (None, None)
+        for path in self._c_files[project_root]:
+            defined = self._defined.get(path)
+            if defined is not None and name not in defined:
+                continue
+
+            node = self._find_in_file(path, project_root, name)
+            if node:
+                result = (node, path)
+                break
+
+        with self._lock:
+            self._functions[key] = result
+            while self.max_functions is not None and len(self._functions) > self.max_functions:
+                self._functions.popitem(last=False)
+        return result
+
+    def find_inlined_pair(self, event: dict, project_root: str) -> tuple[c_ast.FuncDef, c_ast.FuncDef] | None:
+        """Find definitions of the callee and the caller of an inlining event. The nodes belong
+        to the cached ASTs (with the source coordinates), don't modify them.
+
+        Returns:
+            tuple[c_ast.FuncDef, c_ast.FuncDef] | None: Callee and caller, None if one isn't found.
+        """
+        project_root = Path(project_root)
+        callee, _ = self.find_function(project_root, event["callee"])
+        if callee is None:
+            return None
+
+        caller = self._find_in_file(project_root / event["file"], project_root, event["caller"])
+        if not caller:
+            return None
+        return callee, caller
+
+    def extract_inlined_pair(self, event: dict, project_root: str) -> str | None:
+        """Generate the code of an inlining event: type definitions of both files, the callee and the caller.
+
+        Returns:
+            str | None: Code, None if the callee or the caller isn't found.
+        """
+        project_root = Path(project_root)
+        pair = self.find_inlined_pair(event, project_root)
+        if pair is None:
+            return None
+
+        callee, caller = pair
+        _, callee_path = self.find_function(project_root, event["callee"])
+        caller_ast = self.file_ast(project_root / event["file"], project_root)
+        callee_ast = self.file_ast(callee_path, project_root)
+        callee_code = _generate_function_code(callee)
+        caller_code = _generate_function_code(caller)
+
+        caller_defs = _collect_type_definitions(caller_ast)
+        callee_defs = _collect_type_definitions(callee_ast)
+
+        seen = set()
+        defs_code_lines = []
+        for key, code in caller_defs + callee_defs:
+            if key not in seen:
+                seen.add(key)
+                defs_code_lines.append(code)
+
+        defs_code = "\n".join(defs_code_lines)
+
+        result = []
+        if defs_code:
+            result.append(defs_code)
+        result.append(callee_code)
+        result.append(caller_code)
+        return "\n".join(result)
+
+def load_compile_commands(path: Path) -> dict[Path, list[str]]:
+    """Read a compilation database and keep the preprocessor flags of every file: include
+    directories, defines, forced includes and the language standard. Relative paths are
+    resolved against the directory of the entry.
+
+    Args:
+        path (Path): compile_commands.json.
+
+    Returns:
+        dict[Path, list[str]]: Resolved file path -> its flags.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    flags: dict[Path, list[str]] = {}
+    for entry in entries:
+        directory = Path(entry.get("directory", "."))
+        args = entry.get("arguments") or shlex.split(entry.get("command", ""))
+        flags[(directory / entry["file"]).resolve()] = _preprocessor_flags(args[1:], directory)
+    return flags
+
+def _preprocessor_flags(args: list[str], directory: Path) -> list[str]:
+    flags: list[str] = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        i += 1
+        if arg.startswith("-std="):
+            flags.append(arg)
+            continue
+
+        flag = next((f for f in _PATH_FLAGS + _VALUE_FLAGS if arg.startswith(f)), None)
+        if flag is None:
+            continue
+
+        value = arg[len(flag):]
+        if not value and i < len(args):
+            value = args[i]
+            i += 1
+        if flag in _PATH_FLAGS:
+            value = str((directory / value).resolve())
+        flags.append(f"{flag}{value}")
+    return flags
+
+def _estimate_ast_bytes(ast: c_ast.Node) -> int:
+    nodes: int = 0
+    stack: list[c_ast.Node] = [ast]
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        stack.extend(child for _, child in node.children())
+    return nodes * _NODE_BYTES
+
+_default_session = ExtractorSession()
+
+def default_session() -> ExtractorSession:
+    """Get the session of the module functions.
+    """
+    return _default_session
 
 def set_cpp_path(path: str):
-    global _cpp_path
-    _cpp_path = path
+    _default_session.config.cpp_path = path
 
 def set_cpp_extra_args(args: list[str]):
-    global _cpp_extra_args
-    _cpp_extra_args = args
+    _default_session.config.cpp_extra_args = args
 
 def set_fake_libc_path(path: str | None):
-    global _fake_libc_path
-    _fake_libc_path = Path(path) if path else None
+    _default_session.config.fake_libc_path = Path(path) if path else None
 
 def add_include_dir(path: str):
-    _additional_include_dirs.append(str(Path(path).resolve()))
+    _default_session.config.include_dirs.append(str(Path(path).resolve()))
 
 def add_extra_define(define: str):
-    _extra_defines.append(define)
+    _default_session.config.defines.append(define)
 
 def set_fake_types_header(path: str | None):
-    global _fake_types_header
-    _fake_types_header = Path(path).resolve() if path else None
-
-def _collect_include_dirs(project_root: Path):
-    global _inc_cache
-    if _inc_cache is not None:
-        return _inc_cache
-    incs = set()
-    incs.add(str(project_root / "include"))
-    incs.add(str(project_root))
-    for p in project_root.rglob("*.h"):
-        incs.add(str(p.parent))
-    for d in _additional_include_dirs:
-        incs.add(d)
-    _inc_cache = sorted(str(d) for d in incs if Path(d).exists())
-    return _inc_cache
-
-def _get_fake_libc():
-    if _fake_libc_path:
-        return _fake_libc_path
-    raise FileNotFoundError(
-        "Set fakelibs! Download them from: https://github.com/eliben/pycparser/tree/main/utils/fake_libc_include"
-    )
+    _default_session.config.fake_types_header = Path(path).resolve() if path else None
 
 def _parse_file(path: Path, project_root: Path):
-    if path in _ast_cache:
-        return _ast_cache[path]
-
-    fake_libc = _get_fake_libc()
-    incs = _collect_include_dirs(project_root)
-
-    cpp_args = [
-        "-E",
-        "-nostdinc",
-        f"-I{fake_libc}",
-        "-D__attribute__(x)=",
-        "-D__extension__=",
-        "-D__inline__=inline",
-        "-D__restrict__=",
-        "-D__restrict=",
-        "-Drestrict=",
-        "-D__asm__(x)=",
-        "-D__asm(x)=",
-        "-D__volatile__=",
-    ]
-
-    for d in incs:
-        cpp_args.append(f"-I{d}")
-
-    for define in _extra_defines:
-        cpp_args.append(f"-D{define}")
-
-    if _fake_types_header:
-        cpp_args.append(f"-include{_fake_types_header}")
-
-    cpp_args += _cpp_extra_args
-
-    try:
-        ast = parse_file(
-            str(path),
-            use_cpp=True,
-            cpp_path=_cpp_path,
-            cpp_args=cpp_args,
-        )
-    except Exception as ex:
-        print(f"[WARN] Failed to parse: {path}")
-        print(f"[WARN] Parser error: {ex}")
-        return None
-
-    _ast_cache[path] = ast
-    return ast
+    return _default_session.parse_file(path, project_root)
 
 class _FuncDefVisitor(c_ast.NodeVisitor):
     def __init__(self, name):
@@ -115,23 +457,6 @@ def _generate_function_code(funcdef_node):
     generator = c_generator.CGenerator()
     return generator.visit(funcdef_node)
 
-def _find_function_in_project(project_root: Path, name: str):
-    if name in _func_cache:
-        return _func_cache[name]
-    for path in project_root.rglob("*.c"):
-        ast = _parse_file(path, project_root)
-        if ast is None:
-            continue
-        
-        visitor = _FuncDefVisitor(name)
-        visitor.visit(ast)
-        if visitor.node:
-            code = _generate_function_code(visitor.node)
-            _func_cache[name] = (code, path)
-            return code, path
-    _func_cache[name] = (None, None)
-    return None, None
-
 def _collect_type_definitions(ast):
     definitions = []
     generator = c_generator.CGenerator()
@@ -163,37 +488,7 @@ def _collect_type_definitions(ast):
     return definitions
 
 def extract_inlined_pair(event: dict, project_root: str) -> str | None:
-    project_root = Path(project_root)
-    caller_path = project_root / event["file"]
-    caller_ast = _parse_file(caller_path, project_root)
-
-    callee_code, callee_path = _find_function_in_project(project_root, event["callee"])
-    if not callee_code:
-        return None
-
-    callee_ast = _parse_file(callee_path, project_root)
-
-    caller_visitor = _FuncDefVisitor(event["caller"])
-    caller_visitor.visit(caller_ast)
-    if not caller_visitor.node:
-        return None
-    caller_code = _generate_function_code(caller_visitor.node)
-
-    caller_defs = _collect_type_definitions(caller_ast)
-    callee_defs = _collect_type_definitions(callee_ast)
-
-    seen = set()
-    defs_code_lines = []
-    for key, code in caller_defs + callee_defs:
-        if key not in seen:
-            seen.add(key)
-            defs_code_lines.append(code)
-
-    defs_code = "\n".join(defs_code_lines)
-
-    result = []
-    if defs_code:
-        result.append(defs_code)
-    result.append(callee_code)
-    result.append(caller_code)
-    return "\n".join(result)
\ No newline at end of file
+    return _default_session.extract_inlined_pair(event=event, project_root=project_root)
+
+def find_inlined_pair(event: dict, project_root: str) -> tuple[c_ast.FuncDef, c_ast.FuncDef] | None:
+    return _default_session.find_inlined_pair(event=event, project_root=project_root)
@@ -9,6 +9,9 @@ import argparse
 import subprocess
 
 from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from profiling import pop_profile_arguments, run_profiled, track_input
 
 def _parse_inline_report(file_path: str) -> list[dict]:
     results = []
@@ -35,7 +38,8 @@ def _parse_inline_report(file_path: str) -> list[dict]:
 def _collect_reports(report_dir: str) -> list[dict]:
     all_events = []
     for txt_file in Path(report_dir).glob("*.inline.txt"):
-        all_events.extend(_parse_inline_report(str(txt_file)))
+        with track_input(str(txt_file)):
+            all_events.extend(_parse_inline_report(str(txt_file)))
     return all_events
 
 def _export_to_csv(events: list[dict], filename: str):
@@ -126,7 +130,8 @@ exec python3 "{wrapper_path}" "$@"
     print(f"Starting build: {' '.join(build_cmd)}", file=sys.stderr)
     print(f"Using compiler wrapper: {wrapper_script}", file=sys.stderr)
 
-    proc = subprocess.run(build_cmd, env=env, shell=False)
+    with track_input(f"build: {' '.join(build_cmd)}"):
+        proc = subprocess.run(build_cmd, env=env, shell=False)
 
     events = _collect_reports(report_dir)
 
@@ -160,4 +165,5 @@ exec python3 "{wrapper_path}" "$@"
     sys.exit(proc.returncode)
 
 if __name__ == '__main__':
-    _main()
+    profile, sys.argv = pop_profile_arguments(sys.argv)
+    run_profiled(profile, _main)
@@ -1,7 +1,13 @@
+import sys
 import json
 import csv
 import argparse
 
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from profiling import pop_profile_arguments, run_profiled, track_input
+
 
 DEFAULT_INLINE_JSON = "dumped_inlines.json"
 DEFAULT_OTHER_JSON = "dumped_other.json"
@@ -146,10 +152,12 @@ def main():
     args = parse_args()
 
     print(f"Loading {args.inlines}")
-    inline_rows = build_rows(args.inlines, 1)
+    with track_input(args.inlines):
+        inline_rows = build_rows(args.inlines, 1)
 
     print(f"Loading {args.other}")
-    other_rows = build_rows(args.other, 0)
+    with track_input(args.other):
+        other_rows = build_rows(args.other, 0)
 
     all_rows = inline_rows + other_rows
 
@@ -163,4 +171,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profile, sys.argv = pop_profile_arguments(sys.argv)
+    run_profiled(profile, main)
\ No newline at end of file
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from ir.instr.ir_block import IRBlock
+from ir.cfg.csr import CSRGraph, build_csr
 
 @dataclass
 class CFGBlock:
@@ -16,13 +17,164 @@ class CFGBlock:
     
     jmp: CFGBlock | None = None
     lin: CFGBlock | None = None
+    tbl: list[CFGBlock] = field(default_factory=list)
     
     def __hash__(self):
         return hash((self.id, self.start, self.end))
     
+@dataclass
+class CFGOrders:
+    preorder: list[CFGBlock]  # All blocks in the DFS preorder
+    postorder: list[CFGBlock] # All blocks in the DFS postorder
+    rpo: list[CFGBlock]       # All blocks in the reverse postorder
+    rpo_num: dict[int, int]   # Block id -> index in `rpo`
+
 @dataclass
 class CFGFunction:
     id: int = 0
     func: str = ""
     blocks: list[CFGBlock] = field(default_factory=list)
+    _index: dict[int, CFGBlock] | None = field(default=None, init=False, repr=False, compare=False)
+    _orders: CFGOrders | None = field(default=None, init=False, repr=False, compare=False)
+    _csr: CSRGraph | None = field(default=None, init=False, repr=False, compare=False)
+    _dom_tree: dict[int, tuple[int, int]] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def block_by_id(self, block_id: int) -> CFGBlock | None:
+        """Get a block of this function by id (the index is built once).
+        """
+        if self._index is None:
+            self._index = { block.id: block for block in self.blocks }
+        return self._index.get(block_id)
+
+    @property
+    def orders(self) -> CFGOrders:
+        """DFS orders of the blocks. The DFS starts at the entry, then at blocks without
+        predecessors, then at the rest of blocks (never reached cycles); successors are
+        visited in the id order. Computed once, see `invalidate`.
+        """
+        if self._orders is None:
+            self._orders = _compute_orders(self)
+        return self._orders
+
+    @property
+    def csr(self) -> CSRGraph:
+        """CSR view of the function edges. Computed once, see `invalidate`.
+        """
+        if self._csr is None:
+            self._csr = build_csr(self)
+        return self._csr
+
+    def dominates(self, a: CFGBlock, b: CFGBlock) -> bool:
+        """Check if `a` dominates `b` (`a.id in b.dom`) in O(1), by the pre/post interval
+        numbers of the dominator tree (built from `sdom` once).
+
+        Blocks without a path from the entry or from a block without predecessors have
+        every block in their `dom` set, they aren't in the tree and are checked by the set.
+        """
+        if self._dom_tree is None:
+            self._dom_tree = _compute_dom_tree(self)
+
+        b_interval = self._dom_tree.get(b.id)
+        if b_interval is None:
+            return a.id in b.dom
+
+        a_interval = self._dom_tree.get(a.id)
+        return a_interval is not None and a_interval[0] <= b_interval[0] and b_interval[1] <= a_interval[1]
+
+    def invalidate(self, dominators_only: bool = False) -> None:
+        """Drop cached indexes and orders. Must be called after blocks, edges or dominators are changed.
+
+        Args:
+            dominators_only (bool, optional): Only dominators are changed, keep the block index, the DFS
+                orders and the CSR view. Defaults to False.
+        """
+        self._dom_tree = None
+        if dominators_only:
+            return
+
+        self._index = None
+        self._orders = None
+        self._csr = None
+
+def _compute_orders(f: CFGFunction) -> CFGOrders:
+    preorder: list[CFGBlock] = []
+    postorder: list[CFGBlock] = []
+    visited: set[int] = set()
+
+    # Blocks without predecessors come after the entry: a DFS tree started later can only lead to
+    # earlier trees, so in the reverse postorder every tree still comes before the blocks it reaches
+    starts: list[CFGBlock] = f.blocks[:1] + [
+        block for block in f.blocks[1:]
+        if not any(f.block_by_id(pid) is not None for pid in block.pred)
+    ] + f.blocks[1:]
+
+    for start in starts:
+        if start.id in visited:
+            continue
+
+        visited.add(start.id)
+        preorder.append(start)
+        stack: list[tuple[CFGBlock, list[int]]] = [ (start, sorted(start.succ, reverse=True)) ]
+        while stack:
+            block, succs = stack[-1]
+            while succs and (succs[-1] in visited or f.block_by_id(succs[-1]) is None):
+                succs.pop()
+
+            if not succs:
+                stack.pop()
+                postorder.append(block)
+                continue
+
+            succ = f.block_by_id(succs.pop())
+            visited.add(succ.id)
+            preorder.append(succ)
+            stack.append((succ, sorted(succ.succ, reverse=True)))
+
+    rpo: list[CFGBlock] = postorder[::-1]
+    return CFGOrders(
+        preorder=preorder, postorder=postorder, rpo=rpo,
+        rpo_num={ block.id: i for i, block in enumerate(rpo) }
+    )
+
+def _compute_dom_tree(f: CFGFunction) -> dict[int, tuple[int, int]]:
+    # Roots of the dominator forest are the entry and blocks without predecessors in the function
+    # (their `dom` is only the block itself). Blocks not reachable from the roots aren't in the tree.
+    roots: list[CFGBlock] = [
+        block for i, block in enumerate(f.blocks)
+        if i == 0 or not any(f.block_by_id(pid) is not None for pid in block.pred)
+    ]
+
+    reachable: set[int] = { root.id for root in roots }
+    stack: list[CFGBlock] = list(roots)
+    while stack:
+        block = stack.pop()
+        for succ_id in block.succ:
+            if succ_id not in reachable and f.block_by_id(succ_id) is not None:
+                reachable.add(succ_id)
+                stack.append(f.block_by_id(succ_id))
+
+    children: dict[int, list[CFGBlock]] = {}
+    for block in f.blocks:
+        if block.id in reachable and block.sdom is not None:
+            children.setdefault(block.sdom.id, []).append(block)
+
+    intervals: dict[int, tuple[int, int]] = {}
+    counter: int = 0
+    for root in roots:
+        enter: dict[int, int] = {}
+        work: list[tuple[CFGBlock, bool]] = [ (root, False) ]
+        while work:
+            block, done = work.pop()
+            if done:
+                intervals[block.id] = (enter[block.id], counter)
+                counter += 1
+                continue
+
+            enter[block.id] = counter
+            counter += 1
+            work.append((block, True))
+            for child in children.get(block.id, []):
+                work.append((child, False))
+
+    return intervals
     
\ No newline at end of file
@@ -25,16 +25,17 @@ def _split_by_function(instructions: list[IRBlock]) -> dict[str, list[IRBlock]]:
 
     return output
 
-def _find_labeled_block(blocks: list[CFGBlock], label: IRLabel) -> CFGBlock | None:
+def _index_labeled_blocks(blocks: list[CFGBlock]) -> dict[IRLabel, CFGBlock]:
+    index: dict[IRLabel, CFGBlock] = {}
     for block in blocks:
         if not block.instrs:
             continue
         first = block.instrs[0]
         if isinstance(first, IRBaseBlockLabel):
             first = block.instrs[1]
-        if first.a == IRAction.MKLB and first.subjects and first.subjects[0] == label:
-            return block
-    return None
+        if first.a == IRAction.MKLB and first.subjects and first.subjects[0] not in index:
+            index[first.subjects[0]] = block
+    return index
 
 class CFGContext:
     def __init__(self) -> None:
@@ -80,7 +81,7 @@ class CFGContext:
                     start_idx = idx
                 
                 current_block.append(inst)
-                if inst.a in { IRAction.JMP, IRAction.IF } or (idx + 1 < len(instrs) and instrs[idx + 1].a == IRAction.MKLB):
+                if inst.a in { IRAction.JMP, IRAction.IF, IRAction.JTBL } or (idx + 1 < len(instrs) and instrs[idx + 1].a == IRAction.MKLB):
                     func.blocks.append(CFGBlock(
                         id=self.get_next_block_id(),
                         start=start_idx,
@@ -105,6 +106,9 @@ class CFGContext:
             for b in func.blocks:
                 b.jmp = None
                 b.lin = None
+                b.tbl = []
+
+            labeled = _index_labeled_blocks(func.blocks)
 
             for i, block in enumerate(func.blocks):
                 if not block.instrs:
@@ -115,10 +119,12 @@ class CFGContext:
                 last = block.instrs[-1]
 
                 if last.a == IRAction.JMP:
-                    block.jmp = _find_labeled_block(func.blocks, last.subjects[0])
+                    block.jmp = labeled.get(last.subjects[0])
                 elif last.a == IRAction.IF:
-                    block.lin = _find_labeled_block(func.blocks, last.subjects[0])
-                    block.jmp = _find_labeled_block(func.blocks, last.subjects[1])
+                    block.lin = labeled.get(last.subjects[0])
+                    block.jmp = labeled.get(last.subjects[1])
+                elif last.a == IRAction.JTBL:
+                    block.tbl = [ labeled[lb] for lb in last.subjects[0].labels if lb in labeled ]
                 elif last.a not in { IRAction.TERM, IRAction.FEND } and i + 1 < len(func.blocks):
                     block.lin = func.blocks[i + 1]
                     
@@ -130,3 +136,142 @@ class CFGContext:
         for bb in f.blocks:
             instrs.extend(bb.instrs)
         return instrs
+
+_BLOCK_ENDS: frozenset[IRAction] = frozenset({ IRAction.JMP, IRAction.IF, IRAction.JTBL })
+_NO_FALLTHROUGH: frozenset[IRAction] = frozenset({ IRAction.TERM, IRAction.FEND })
+
+# Enum member lookups are slow, and `CFGBuilder.append` runs for every instruction
+_MKLB: IRAction  = IRAction.MKLB
+_FDECL: IRAction = IRAction.FDECL
+
+class CFGBuilder:
+    """Builds CFG functions straight from the IR stream, without the flat instruction list.
+    The builder is a drop-in `ctx` for the Translator (it only needs `append`). Blocks are
+    split the same way as in `CFGContext.get_blocks_from_ir` (including the block `start`
+    that only moves on labels), and edges are the same as in `CFGContext.link_blocks`. 
+    Jump targets are resolved when a function ends, because only then all labels of this 
+    function are known.
+    
+    Ids are assigned in `finish`, after all functions are known, so a redefined function keeps 
+    the position of its first definition (as in the flat mode).
+    
+    In the `stream` mode functions aren't kept. Every finished function is numbered right away 
+    and put to `ready`, where the caller picks it up. A redefined function is produced twice.
+    """
+    def __init__(self, ctx: CFGContext, stream: bool = False) -> None:
+        self.ctx: CFGContext = ctx
+        self.stream: bool = stream
+        self.functions: dict[str, CFGFunction] = {}
+        self.ready: list[CFGFunction] = []
+
+        self.func: CFGFunction | None = None
+        self.block: CFGBlock | None = None
+        self.instrs: list[IRBlock] | None = None
+        self.index: int = 0
+        self.start: int = 0
+        self.labeled: dict[IRLabel, CFGBlock] = {}
+        self.jumps: list[CFGBlock] = []
+        self.fallthrough: CFGBlock | None = None
+
+    def append(self, inst: IRBlock) -> None:
+        a = inst.a
+        if self.instrs is None or a is _MKLB or a is _FDECL:
+            self._enter(inst)
+        else:
+            self.instrs.append(inst)
+
+        if a in _BLOCK_ENDS and self.instrs is not None:
+            self._close_block()
+
+    def finish(self) -> list[CFGFunction]:
+        """Close the last function, then number all functions and blocks.
+
+        Returns:
+            list[CFGFunction]: Linked CFG functions in the order of the first definition 
+                (in the `stream` mode, the functions that weren't picked up from `ready` yet).
+        """
+        self._end_function()
+        if self.stream:
+            output, self.ready = self.ready, []
+            return output
+        
+        output: list[CFGFunction] = list(self.functions.values())
+        for func in output:
+            self._number(func)
+
+        return output
+    
+    def _number(self, func: CFGFunction) -> None:
+        func.id = self.ctx.get_next_function_id()
+        for block in func.blocks:
+            block.id = self.ctx.get_next_block_id()
+            block.instrs[0].id = block.id
+
+    def _enter(self, inst: IRBlock) -> None:
+        if inst.a is IRAction.FDECL:
+            self._end_function()
+            self.func = CFGFunction(func=inst.subjects[0].name, blocks=[])
+            if not self.stream:
+                self.functions[self.func.func] = self.func
+            return
+
+        if self.func is None:
+            return
+
+        if inst.a is IRAction.MKLB:
+            self._close_block()
+            self.start = self.index
+            
+        self.block = CFGBlock(start=self.start, instrs=[IRBaseBlockLabel(0), inst])
+        self.instrs = self.block.instrs
+        self.func.blocks.append(self.block)
+        
+        if self.fallthrough is not None:
+            self.fallthrough.lin = self.block
+            self.fallthrough = None
+
+        if inst.a is IRAction.MKLB and inst.subjects[0] not in self.labeled:
+            self.labeled[inst.subjects[0]] = self.block
+
+    def _close_block(self) -> None:
+        block = self.block
+        if block is None:
+            return
+
+        self.index += len(block.instrs) - 1
+        block.end = self.index - 1
+
+        last = block.instrs[-1].a
+        if last in _BLOCK_ENDS:
+            self.jumps.append(block)
+        elif last not in _NO_FALLTHROUGH:
+            self.fallthrough = block
+
+        self.block = None
+        self.instrs = None
+
+    def _end_function(self) -> None:
+        if self.func is None:
+            return
+
+        self._close_block()
+        for block in self.jumps:
+            last = block.instrs[-1]
+            if last.a is IRAction.JMP:
+                block.jmp = self.labeled.get(last.subjects[0])
+            elif last.a is IRAction.IF:
+                block.lin = self.labeled.get(last.subjects[0])
+                block.jmp = self.labeled.get(last.subjects[1])
+            else:
+                block.tbl = [ self.labeled[lb] for lb in last.subjects[0].labels if lb in self.labeled ]
+
+        if self.stream:
+            self._number(self.func)
+            self.ready.append(self.func)
+
+        self.func = None
+        self.index = 0
+        self.start = 0
+        self.labeled = {}
+        self.jumps = []
+        self.fallthrough = None
@@ -0,0 +1,163 @@
+"""Compressed sparse row (CSR) view of CFG function edges.
+
+Blocks get dense indices (their position in `CFGFunction.blocks`). Successors of the block `i`
+are `succ_targets[succ_offsets[i]:succ_offsets[i + 1]]`, predecessors are stored the same way.
+Edges keep the iteration order of `CFGBlock.succ` / `CFGBlock.pred`, edges to blocks of other
+functions are dropped. Graph walks work on the flat `array` buffers level by level, without
+touching block objects.
+"""
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from ir.cfg.cfg import CFGFunction, CFGBlock
+
+@dataclass
+class CSRGraph:
+    blocks: list["CFGBlock"] # Dense index -> block
+    index: dict[int, int]    # Block id -> dense index
+    succ_offsets: array      # Successors of `i` are succ_targets[succ_offsets[i]:succ_offsets[i + 1]]
+    succ_targets: array      # Dense indices of successors
+    pred_offsets: array      # Predecessors of `i` are pred_targets[pred_offsets[i]:pred_offsets[i + 1]]
+    pred_targets: array      # Dense indices of predecessors
+    sizes: array             # Instruction count of every block
+
+    def neighbors(self, i: int, forward: bool = True) -> array:
+        """Get successors (or predecessors) of the block with the dense index `i`.
+        """
+        if forward:
+            return self.succ_targets[self.succ_offsets[i]:self.succ_offsets[i + 1]]
+        return self.pred_targets[self.pred_offsets[i]:self.pred_offsets[i + 1]]
+
+@dataclass
+class BFSResult:
+    order: array  # Reached dense indices in the visit order (the source first)
+    parent: array # Dense index -> index it was reached from (-1 for the source and unreached blocks)
+    dist: array   # Dense index -> distance from the source along the BFS tree (-1 if unreached)
+
+def build_csr(f: "CFGFunction") -> CSRGraph:
+    """Build the CSR view of a function. Use `CFGFunction.csr` to get the cached one.
+    """
+    index: dict[int, int] = { block.id: i for i, block in enumerate(f.blocks) }
+    succ_offsets, succ_targets = _pack(index, ( block.succ for block in f.blocks ))
+    pred_offsets, pred_targets = _pack(index, ( block.pred for block in f.blocks ))
+    return CSRGraph(
+        blocks=f.blocks,
+        index=index,
+        succ_offsets=succ_offsets,
+        succ_targets=succ_targets,
+        pred_offsets=pred_offsets,
+        pred_targets=pred_targets,
+        sizes=array("l", ( len(block.instrs) for block in f.blocks ))
+    )
+
+def _pack(index: dict[int, int], edges: Iterable[set[int]]) -> tuple[array, array]:
+    offsets: array = array("l", [0])
+    targets: array = array("l")
+    for ids in edges:
+        targets.extend(index[bid] for bid in ids if bid in index)
+        offsets.append(len(targets))
+
+    return offsets, targets
+
+def bfs(
+    graph: CSRGraph,
+    source: int,
+    forward: bool = True,
+    weights: array | None = None,
+    max_blocks: int | None = None,
+    max_dist: int | None = None
+) -> BFSResult:
+    """Breadth-first search from one block. Blocks are visited level by level in the same order as a
+    FIFO queue would visit them; a block is reached from the first visited block with an edge to it.
+    The search can be bounded: blocks further than `max_dist` aren't entered and it stops as soon as
+    `max_blocks` blocks are reached.
+
+    Args:
+        graph (CSRGraph): CSR view of a function.
+        source (int): Dense index of the start block.
+        forward (bool, optional): Follow successors (True) or predecessors (False). Defaults to True.
+        weights (array | None, optional): Length of every block. The distance of a block is the sum of
+            lengths of its ancestors in the BFS tree, e.g. `graph.sizes` gives instructions before the
+            block. Defaults to None (the hop count).
+        max_blocks (int | None, optional): Reach at most this many blocks, the source included. Defaults to None.
+        max_dist (int | None, optional): Don't enter blocks further than this. Defaults to None.
+
+    Returns:
+        BFSResult: Visit order, BFS tree and distances.
+    """
+    offsets, targets = (graph.succ_offsets, graph.succ_targets) if forward else (graph.pred_offsets, graph.pred_targets)
+    n: int = len(graph.blocks)
+    parent: array = array("l", [-1]) * n
+    dist: array = array("l", [-1]) * n
+    dist[source] = 0
+
+    order: array = array("l", [source])
+    frontier: array = order[:]
+    budget: int = (max_blocks if max_blocks is not None else n) - 1
+    while frontier and budget > 0:
+        level: array = array("l")
+        for u in frontier:
+            du: int = dist[u] + (1 if weights is None else weights[u])
+            if max_dist is not None and du > max_dist:
+                continue
+
+            for v in targets[offsets[u]:offsets[u + 1]]:
+                if dist[v] < 0:
+                    dist[v] = du
+                    parent[v] = u
+                    level.append(v)
+                    budget -= 1
+                    if budget == 0:
+                        break
+
+            if budget == 0:
+                break
+
+        order.extend(level)
+        frontier = level
+
+    return BFSResult(order=order, parent=parent, dist=dist)
+
+def reachable(
+    graph: CSRGraph,
+    sources: Iterable[int],
+    forward: bool = True,
+    blocked: Iterable[int] = ()
+) -> array:
+    """Find blocks reachable from the sources (the sources included).
+
+    Args:
+        graph (CSRGraph): CSR view of a function.
+        sources (Iterable[int]): Dense indices of the start blocks.
+        forward (bool, optional): Follow successors (True) or predecessors (False). Defaults to True.
+        blocked (Iterable[int], optional): Dense indices the search doesn't enter. Defaults to ().
+
+    Returns:
+        array: Reached dense indices in the BFS order.
+    """
+    offsets, targets = (graph.succ_offsets, graph.succ_targets) if forward else (graph.pred_offsets, graph.pred_targets)
+    seen: bytearray = bytearray(len(graph.blocks))
+    for i in blocked:
+        seen[i] = 1
+
+    frontier: array = array("l")
+    for i in sources:
+        if not seen[i]:
+            seen[i] = 1
+            frontier.append(i)
+
+    order: array = frontier[:]
+    while frontier:
+        level: array = array("l")
+        for u in frontier:
+            for v in targets[offsets[u]:offsets[u + 1]]:
+                if not seen[v]:
+                    seen[v] = 1
+                    level.append(v)
+
+        order.extend(level)
+        frontier = level
+
+    return order
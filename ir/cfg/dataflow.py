@@ -0,0 +1,133 @@
+"""Worklist dataflow solver over CFG functions.
+
+Facts are Python int bitsets: bit `i` stands for the i-th block of `CFGFunction.blocks`
+(see `block_bits`), so meets are single `&` / `|` operations on any function size.
+Blocks are visited in the reverse postorder for forward problems and in the postorder for
+backward ones (see `CFGFunction.orders`).
+"""
+import heapq
+
+from dataclasses import dataclass
+from typing import Callable
+
+from ir.cfg.cfg import CFGFunction, CFGBlock
+
+Transfer = Callable[[CFGBlock, int], int] # (block, fact at the block input) -> fact at the block output
+Meet = Callable[[int, int], int]          # Combines facts of two incoming edges (operator.and_, operator.or_...)
+
+@dataclass
+class DataflowResult:
+    inputs: dict[int, int]  # Block id -> fact before the block (after the block for backward problems)
+    outputs: dict[int, int] # Block id -> fact after the block (before the block for backward problems)
+    visits: int             # How many times the transfer function was applied
+
+def block_bits(f: CFGFunction) -> dict[int, int]:
+    """Get the bit of every block (block id -> 1 << index of the block in `f.blocks`).
+    """
+    return { block.id: 1 << i for i, block in enumerate(f.blocks) }
+
+def all_blocks_mask(f: CFGFunction) -> int:
+    """Get the bitset of all blocks of the function.
+    """
+    return (1 << len(f.blocks)) - 1
+
+def mask_to_ids(f: CFGFunction, mask: int) -> set[int]:
+    """Convert a block bitset to a set of block ids.
+    """
+    ids: set[int] = set()
+    while mask:
+        low: int = mask & -mask
+        ids.add(f.blocks[low.bit_length() - 1].id)
+        mask ^= low
+
+    return ids
+
+def mask_to_indices(mask: int) -> list[int]:
+    """Convert a block bitset to indices of the blocks in `CFGFunction.blocks` (ascending).
+    """
+    # Clearing bits one by one copies the whole int every time, the digits are scanned instead
+    digits: str = bin(mask)[:1:-1]
+    indices: list[int] = []
+    i: int = digits.find("1")
+    while i >= 0:
+        indices.append(i)
+        i = digits.find("1", i + 1)
+
+    return indices
+
+def solve_dataflow(
+    f: CFGFunction,
+    transfer: Transfer,
+    meet: Meet,
+    init: int,
+    boundary: int,
+    forward: bool = True,
+    entry_boundary: bool = True
+) -> DataflowResult:
+    """Solve a monotone dataflow problem with a worklist. A block is queued again only when
+    the output of one of its predecessors (successors for backward problems) changes, and the
+    queue always gives the block which comes first in the visit order.
+
+    Boundary blocks get `boundary` as the input. In forward problems these are the entry (unless
+    `entry_boundary` is False) and blocks without predecessors in the function, in backward
+    problems - blocks without successors in the function. Edges to other functions are ignored.
+
+    Args:
+        f (CFGFunction): Function to analyze.
+        transfer (Transfer): Transfer function of a block.
+        meet (Meet): Meet operator of incoming facts.
+        init (int): Initial output of every block (all ones for 'must' problems, 0 for 'may' problems).
+        boundary (int): Input of boundary blocks.
+        forward (bool, optional): Direction of the problem. Defaults to True.
+        entry_boundary (bool, optional): The entry is a boundary block in forward problems even if
+            it has predecessors (as for dominators). Defaults to True.
+
+    Returns:
+        DataflowResult: Fixpoint inputs and outputs of every block.
+    """
+    order: list[CFGBlock] = f.orders.rpo if forward else f.orders.postorder
+    priority: dict[int, int] = { block.id: i for i, block in enumerate(order) }
+
+    sources: list[list[int]] = []
+    targets: list[list[int]] = []
+    for block in order:
+        before, after = (block.pred, block.succ) if forward else (block.succ, block.pred)
+        sources.append([ priority[bid] for bid in before if bid in priority ])
+        targets.append([ priority[bid] for bid in after if bid in priority ])
+
+    entry_id: int = f.blocks[0].id if f.blocks else -1
+    inputs: dict[int, int] = {}
+    outputs: list[int] = [ init ] * len(order)
+
+    queue: list[int] = list(range(len(order)))
+    queued: set[int] = set(queue)
+    visits: int = 0
+    while queue:
+        i: int = heapq.heappop(queue)
+        queued.discard(i)
+        block = order[i]
+
+        if not sources[i] or (forward and entry_boundary and block.id == entry_id):
+            fact = boundary
+        else:
+            fact = outputs[sources[i][0]]
+            for j in sources[i][1:]:
+                fact = meet(fact, outputs[j])
+
+        inputs[block.id] = fact
+        out: int = transfer(block, fact)
+        visits += 1
+        if out == outputs[i]:
+            continue
+
+        outputs[i] = out
+        for j in targets[i]:
+            if j not in queued:
+                queued.add(j)
+                heapq.heappush(queue, j)
+
+    return DataflowResult(
+        inputs=inputs,
+        outputs={ block.id: outputs[i] for i, block in enumerate(order) },
+        visits=visits
+    )
@@ -1,4 +1,7 @@
+import operator
+
 from ir.cfg.cfg import CFGFunction
+from ir.cfg.dataflow import solve_dataflow, block_bits, all_blocks_mask, mask_to_ids
 
 def complete_successors(funcs: list[CFGFunction]) -> None:
     for func in funcs:
@@ -9,50 +12,42 @@ def complete_successors(funcs: list[CFGFunction]) -> None:
             if block.lin:
                 block.succ.add(block.lin.id)
                 block.lin.pred.add(block.id)
+            for target in block.tbl:
+                block.succ.add(target.id)
+                target.pred.add(block.id)
+        func.invalidate()
                 
-def compute_function_dom(f: CFGFunction) -> None:
-    blocks = f.blocks
-    if not blocks:
-        return
-
-    by_id = {b.id: b for b in blocks}
-    all_ids = {b.id for b in blocks}
-    entry_id = blocks[0].id
-
-    for b in blocks:
-        b.dom.clear()
-        if b.id == entry_id:
-            b.dom.add(entry_id)
-        else:
-            b.dom |= all_ids
-
-    changed = True
-    while changed:
-        changed = False
-
-        for b in blocks:
-            if b.id == entry_id:
-                continue
+def compute_function_dom(f: CFGFunction) -> int:
+    """Compute dominator sets of the function blocks with the bitset dataflow solver
+    (dom(b) = {b} + intersection of dom(p) over the predecessors). Returns the number of
+    block visits of the solver.
+    """
+    if not f.blocks:
+        return 0
 
-            preds = [pid for pid in b.pred if pid in by_id]
-            if not preds:
-                nd: set[int] = set()
-            else:
-                nd = set(by_id[preds[0]].dom)
-                for pid in preds[1:]:
-                    nd &= by_id[pid].dom
+    bits = block_bits(f)
+    result = solve_dataflow(
+        f,
+        transfer=lambda block, dom: dom | bits[block.id],
+        meet=operator.and_,
+        init=all_blocks_mask(f),
+        boundary=0
+    )
 
-            nd.add(b.id)
+    for b in f.blocks:
+        b.dom = mask_to_ids(f, result.outputs[b.id])
 
-            if nd != b.dom:
-                b.dom = nd
-                changed = True
+    f.invalidate(dominators_only=True)
+    return result.visits
                 
 def compute_strict_dom(f: CFGFunction) -> None:
+    """Compute immediate dominators (`sdom`) from the dominator sets.
+    """
     if not f.blocks:
         return
 
     by_id = {b.id: b for b in f.blocks}
+    all_count = len(by_id)
     entry_id = f.blocks[0].id
 
     by_id[entry_id].sdom = None
@@ -64,6 +59,15 @@ def compute_strict_dom(f: CFGFunction) -> None:
         candidates = b.dom - { b.id }
         idom = None
 
+        # Dominators of a block reachable from the entry (or from a block without predecessors) form
+        # a chain, the immediate one is the deepest. Other blocks keep every block in `dom`, they are
+        # resolved by the pairwise check.
+        if len(b.dom) < all_count:
+            if candidates:
+                idom = by_id[max(candidates, key=lambda d: len(by_id[d].dom))]
+            b.sdom = idom
+            continue
+
         for d in candidates:
             dominated_by_other = False
             for other in candidates:
@@ -79,3 +83,5 @@ def compute_strict_dom(f: CFGFunction) -> None:
                 break
 
         b.sdom = idom
+
+    f.invalidate(dominators_only=True)
@@ -0,0 +1,200 @@
+"""Feature registry and the shared per-function analysis cache.
+
+A feature is a function-level value (bb_count, syscalls...) or an instruction-level value
+(near_break, loop_info...). Every feature declares analyses it needs (`requires`): CFG views
+and indexes which are computed once per function by a `FeatureContext` and shared by all
+features and instructions of the function. Features can also keep their own per-function
+results in `FeatureContext.memo` (e.g. one BFS per block instead of one per instruction).
+
+Built-in analyses:
+    block_index        Block id -> block
+    instruction_index  id(instruction) -> (block, index in the block)
+    csr                CSR view of the edges (see `ir.cfg.csr`)
+    orders             DFS orders (see `CFGFunction.orders`)
+    dom_tree           The function itself, with the dominator tree built for `CFGFunction.dominates`
+
+Built-in features are registered by `ir.cfg.finfo` and `ir.loop.linfo` (the loop forest),
+which are imported at the end of this module, so the registry is complete once it is imported.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from ir.cfg.cfg import CFGFunction, CFGBlock
+
+if TYPE_CHECKING:
+    from ir.loop.ltree import LoopNode
+
+@dataclass
+class FeatureConfig:
+    """Selection of instruction features and bounds of the near_break and same_inst searches.
+    By default the whole reachable CFG is searched (exact values). With a horizon, a search visits
+    blocks in the BFS order and stops at the horizon, so far-away breaks and runs of instructions
+    are missed.
+    """
+    horizon_blocks: int | None = None # Visit at most this many blocks per search (the instruction's block included)
+    horizon_instrs: int | None = None # Don't enter blocks after this many instructions from the instruction's block
+    measure_error: bool = False       # Also compute exact values and count errors (see `feature_error_stats`)
+    features: tuple[str, ...] | None = None # Instruction features to compute (None - the standard ones)
+
+    @property
+    def bounded(self) -> bool:
+        return self.horizon_blocks is not None or self.horizon_instrs is not None
+
+@dataclass
+class Feature:
+    name: str                  # Feature name (a key of the computed dict)
+    compute: Callable          # (context) -> value, or (context, block, index) -> value for instruction features
+    requires: tuple[str, ...]  # Analyses computed before the feature
+    per_instruction: bool      # Instruction feature (True) or function feature (False)
+
+_ANALYSES: dict[str, Callable[["FeatureContext"], Any]] = {}
+_FEATURES: dict[str, Feature] = {}
+
+def register_analysis(name: str) -> Callable:
+    """Decorator which registers a function analysis: (context) -> result. The result is computed
+    once per function, on the first `FeatureContext.require`.
+
+    Args:
+        name (str): Analysis name.
+    """
+    def _register(fn: Callable[["FeatureContext"], Any]) -> Callable[["FeatureContext"], Any]:
+        _ANALYSES[name] = fn
+        return fn
+    return _register
+
+def register_feature(name: str, requires: Iterable[str] = (), per_instruction: bool = True) -> Callable:
+    """Decorator which registers a feature. An instruction feature is (context, block, index) -> value,
+    a function feature is (context) -> value. Registering an existing name replaces the feature.
+
+    Args:
+        name (str): Feature name.
+        requires (Iterable[str], optional): Analyses the feature uses. Defaults to ().
+        per_instruction (bool, optional): Instruction or function feature. Defaults to True.
+    """
+    def _register(fn: Callable) -> Callable:
+        _FEATURES[name] = Feature(name=name, compute=fn, requires=tuple(requires), per_instruction=per_instruction)
+        return fn
+    return _register
+
+class FeatureContext:
+    """Analyses and feature results of one function. Create one context per function and pass it to
+    every feature computation of the function.
+    """
+    def __init__(
+        self,
+        f: CFGFunction,
+        loops: list["LoopNode"] | None = None,
+        conf: FeatureConfig | None = None,
+        counters: dict[str, int] | None = None
+    ) -> None:
+        self.f: CFGFunction = f
+        self.loops: list["LoopNode"] = loops or []                   # Loop forest roots (may include other functions' loops)
+        self.conf: FeatureConfig = conf or FeatureConfig()           # Bounds of the graph searches
+        self.counters: dict[str, int] | None = counters              # Work counters (bfs_visits, ...)
+        self.memo: dict = {}                                         # Per-function results of features, keyed by feature
+        self._analyses: dict[str, Any] = {}
+
+    def require(self, name: str) -> Any:
+        """Get an analysis result, computing it on the first request.
+        """
+        if name not in self._analyses:
+            analysis = _ANALYSES.get(name)
+            if analysis is None:
+                raise KeyError(f"Unknown analysis: {name}")
+            self._analyses[name] = analysis(self)
+        return self._analyses[name]
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.counters is not None:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def derive(self, conf: FeatureConfig) -> "FeatureContext":
+        """Get a context with another configuration, which shares analyses and memo (memo keys of
+        bounded features include the bounds) and doesn't count work.
+        """
+        ctx = FeatureContext(self.f, self.loops, conf)
+        ctx.memo = self.memo
+        ctx._analyses = self._analyses
+        return ctx
+
+def _resolve(names: Iterable[str] | None, per_instruction: bool) -> list[Feature]:
+    if names is None:
+        return [ feature for feature in _FEATURES.values() if feature.per_instruction == per_instruction ]
+
+    features: list[Feature] = []
+    for name in names:
+        feature = _FEATURES.get(name)
+        if feature is None or feature.per_instruction != per_instruction:
+            raise KeyError(f"Unknown {'instruction' if per_instruction else 'function'} feature: {name}")
+        features.append(feature)
+    return features
+
+def compute_function_features(ctx: FeatureContext, names: Iterable[str] | None = None) -> dict[str, Any]:
+    """Compute function features.
+
+    Args:
+        ctx (FeatureContext): Context of the function.
+        names (Iterable[str] | None, optional): Features to compute. Defaults to None (all registered).
+
+    Returns:
+        dict[str, Any]: Feature name -> value.
+    """
+    values: dict[str, Any] = {}
+    for feature in _resolve(names, per_instruction=False):
+        for analysis in feature.requires:
+            ctx.require(analysis)
+        values[feature.name] = feature.compute(ctx)
+    return values
+
+def compute_instruction_features(
+    ctx: FeatureContext,
+    block: CFGBlock,
+    index: int,
+    names: Iterable[str] | None = None
+) -> dict[str, Any]:
+    """Compute features of one instruction.
+
+    Args:
+        ctx (FeatureContext): Context of the function.
+        block (CFGBlock): Block of the instruction.
+        index (int): Index of the instruction in the block.
+        names (Iterable[str] | None, optional): Features to compute. Defaults to None (all registered).
+
+    Returns:
+        dict[str, Any]: Feature name -> value.
+    """
+    return _compute_instruction(ctx, _resolve(names, per_instruction=True), block, index)
+
+def _compute_instruction(ctx: FeatureContext, features: list[Feature], block: CFGBlock, index: int) -> dict[str, Any]:
+    values: dict[str, Any] = {}
+    for feature in features:
+        for analysis in feature.requires:
+            ctx.require(analysis)
+        values[feature.name] = feature.compute(ctx, block, index)
+    return values
+
+@register_analysis("block_index")
+def _block_index(ctx: FeatureContext) -> dict[int, CFGBlock]:
+    return { block.id: block for block in ctx.f.blocks }
+
+@register_analysis("instruction_index")
+def _instruction_index(ctx: FeatureContext) -> dict[int, tuple[CFGBlock, int]]:
+    return { id(inst): (block, i) for block in ctx.f.blocks for i, inst in enumerate(block.instrs) }
+
+@register_analysis("csr")
+def _csr(ctx: FeatureContext) -> Any:
+    return ctx.f.csr
+
+@register_analysis("orders")
+def _orders(ctx: FeatureContext) -> Any:
+    return ctx.f.orders
+
+@register_analysis("dom_tree")
+def _dom_tree(ctx: FeatureContext) -> CFGFunction:
+    if ctx.f.blocks:
+        ctx.f.dominates(ctx.f.blocks[0], ctx.f.blocks[0])
+    return ctx.f
+
+# The built-in feature modules use the registry above, so they are imported after it
+import ir.cfg.finfo
+import ir.loop.linfo
@@ -1,5 +1,18 @@
+import operator
+
 from dataclasses import dataclass
+from ir.dump import Fields, dump_fields_to_json
 from ir.cfg.cfg import CFGFunction, CFGBlock
+from ir.cfg.csr import CSRGraph, bfs
+from ir.cfg.dataflow import solve_dataflow, block_bits, mask_to_indices
+from ir.cfg.features import (
+    FeatureConfig,
+    FeatureContext,
+    register_analysis,
+    register_feature,
+    compute_function_features,
+    compute_instruction_features
+)
 from ir.instr.ir_block import IRBlock, IRAction
 
 @dataclass
@@ -10,14 +23,17 @@ class CFGFunctionInfo:
     funccalls: int     # how many funccalls in this function?
     syscalls: int = -1 # how many syscalls in this function? -1 if syscalls aren't supported by lang
 
+    def dump_fields(self) -> Fields:
+        return (
+            ("bb_count", self.bb_count),
+            ("ir_count", self.ir_count),
+            ("is_start", self.is_start),
+            ("funccalls", self.funccalls),
+            ("syscalls", self.syscalls)
+        )
+
     def dump_to_json(self) -> dict:
-        return {
-            "bb_count": self.bb_count,
-            "ir_count": self.ir_count,
-            "is_start": self.is_start,
-            "funccalls": self.funccalls,
-            "syscalls": self.syscalls
-        }
+        return dump_fields_to_json(self.dump_fields())
 
 @dataclass
 class CFGInstructionInfo:
@@ -26,193 +42,257 @@ class CFGInstructionInfo:
     same_inst_before: int # hiw many similar instructions before this instruction?
     near_break: int = -1  # distance to the near break. -1 - There is no 'BREAK' in a block
 
+    def dump_fields(self) -> Fields:
+        return (
+            ("is_dom", self.is_dominated),
+            ("same_inst_after", self.same_inst_after),
+            ("same_inst_before", self.same_inst_before),
+            ("near_break", self.near_break)
+        )
+
     def dump_to_json(self) -> dict:
-        return {
-            "is_dom": self.is_dominated,
-            "same_inst_after": self.same_inst_after,
-            "same_inst_before": self.same_inst_before,
-            "near_break": self.near_break
-        }
+        return dump_fields_to_json(self.dump_fields())
+
+INSTRUCTION_INFO_FEATURES: tuple[str, ...] = ("near_break", "is_dom", "same_inst") # Features of CFGInstructionInfo
+FUNCTION_INFO_FEATURES: tuple[str, ...] = ("bb_count", "ir_count", "is_start", "funccalls", "syscalls") # Fields of CFGFunctionInfo
+
+def make_instruction_info(values: dict) -> CFGInstructionInfo | None:
+    """Build the standard instruction information from computed instruction features.
 
-def gather_function_info(f: CFGFunction) -> CFGFunctionInfo:
-    bb_count = len(f.blocks)
-    ir_count = 0
-    funccalls = 0
-    syscalls = 0
-
-    for bb in f.blocks:
-        ir_count += len(bb.instrs)
-        for inst in bb.instrs:
-            if inst.a in (IRAction.FCALL, IRAction.SCALL):
-                funccalls += 1
-                if inst.a == IRAction.SCALL:
-                    syscalls += 1
-
-    is_start = f.func in { "main", "_start", "start" }
-    return CFGFunctionInfo(
-        bb_count=bb_count,
-        ir_count=ir_count,
-        is_start=is_start,
-        funccalls=funccalls,
-        syscalls=syscalls
+    Returns:
+        CFGInstructionInfo | None: Information, None if some of `INSTRUCTION_INFO_FEATURES` aren't computed.
+    """
+    if any(name not in values for name in INSTRUCTION_INFO_FEATURES):
+        return None
+
+    same_before, same_after = values["same_inst"]
+    return CFGInstructionInfo(
+        near_break=values["near_break"],
+        is_dominated=values["is_dom"],
+        same_inst_before=same_before,
+        same_inst_after=same_after
     )
-    
-def _get_bb_from_func(f: CFGFunction, id: int) -> CFGBlock | None:
-    for block in f.blocks:
-        if block.id == id:
-            return block
-        
-    return None
-    
-def _distance_to_nearest_break(
-    f: CFGFunction,
-    inst: IRBlock
-) -> int:
-    containing_block: CFGBlock | None = None
-    for bb in f.blocks:
-        for bb_inst in bb.instrs:
-            if bb_inst is inst:
-                containing_block = bb
-                break
-        if containing_block:
-            break
-    
-    if not containing_block:
-        return -1
-    
-    from collections import deque
-    
-    visited = set()
-    queue: deque[tuple[CFGBlock, int, bool]] = deque()
-    
-    queue.append((containing_block, 0, True))
-    queue.append((containing_block, 0, False))
-    min_distance: float = float('inf')
-    
-    while queue:
-        current_block, current_dist, is_forward = queue.popleft()
-        if current_block.id in visited:
-            continue
-        
-        visited.add(current_block.id)
-        
-        for i, block_inst in enumerate(current_block.instrs):
-            if block_inst.a == IRAction.BREAK:
-                if current_block is containing_block:
-                    inst_idx = containing_block.instrs.index(inst)
-                    break_idx = i
-                    distance = abs(break_idx - inst_idx)
-                    min_distance = min(min_distance, distance)
-                else:
-                    min_distance = min(min_distance, current_dist)
-        
-        if is_forward:
-            for succ in current_block.succ:
-                queue.append((_get_bb_from_func(f, succ), current_dist + len(current_block.instrs), True))
-        else:
-            for pred in current_block.pred:
-                queue.append((_get_bb_from_func(f, pred), current_dist + len(current_block.instrs), False))
-    
+
+def gather_function_info(f: CFGFunction, ctx: FeatureContext | None = None) -> CFGFunctionInfo:
+    values = compute_function_features(ctx or FeatureContext(f), FUNCTION_INFO_FEATURES)
+    return CFGFunctionInfo(**values)
+
+@register_feature("bb_count", per_instruction=False)
+def _bb_count(ctx: FeatureContext) -> int:
+    return len(ctx.f.blocks)
+
+@register_feature("ir_count", per_instruction=False)
+def _ir_count(ctx: FeatureContext) -> int:
+    return sum(len(bb.instrs) for bb in ctx.f.blocks)
+
+@register_feature("is_start", per_instruction=False)
+def _is_start(ctx: FeatureContext) -> bool:
+    return ctx.f.func in { "main", "_start", "start" }
+
+@register_feature("funccalls", per_instruction=False)
+def _funccalls(ctx: FeatureContext) -> int:
+    return sum(1 for bb in ctx.f.blocks for inst in bb.instrs if inst.a in (IRAction.FCALL, IRAction.SCALL))
+
+@register_feature("syscalls", per_instruction=False)
+def _syscalls(ctx: FeatureContext) -> int:
+    return sum(1 for bb in ctx.f.blocks for inst in bb.instrs if inst.a == IRAction.SCALL)
+
+@register_analysis("break_blocks")
+def _break_blocks(ctx: FeatureContext) -> bytearray:
+    # Dense block index -> 1 if the block has a 'BREAK'
+    return bytearray(
+        any(inst.a == IRAction.BREAK for inst in bb.instrs)
+        for bb in ctx.f.blocks
+    )
+
+@register_feature("near_break", requires=("csr", "break_blocks"))
+def _near_break(ctx: FeatureContext, block: CFGBlock, index: int) -> int:
+    """Distance to the nearest 'BREAK': instructions between them in the same block, or
+    instructions before the block with a 'BREAK' along the BFS tree of successors. -1 if none.
+    """
+    conf = ctx.conf
+    key = ("near_break", block.id, conf.horizon_blocks, conf.horizon_instrs)
+    if key not in ctx.memo:
+        ctx.memo[key] = _block_breaks(ctx, block)
+
+    min_distance, breaks = ctx.memo[key]
+    for i in breaks:
+        min_distance = min(min_distance, abs(i - index))
+
     return int(min_distance) if min_distance != float('inf') else -1
 
-def _is_dominated(bb: CFGBlock) -> bool:
-    return len(bb.pred) > 1
+def _block_breaks(ctx: FeatureContext, block: CFGBlock) -> tuple[float, list[int]]:
+    # The BFS depends only on the block, so it is shared by the block instructions
+    graph = ctx.require("csr")
+    has_break: bytearray = ctx.require("break_blocks")
+    result = bfs(
+        graph, graph.index[block.id], weights=graph.sizes,
+        max_blocks=ctx.conf.horizon_blocks, max_dist=ctx.conf.horizon_instrs
+    )
+    ctx.count("bfs_visits", len(result.order))
+
+    min_distance: float = float('inf')
+    for v in result.order[1:]:
+        if has_break[v]:
+            min_distance = min(min_distance, result.dist[v])
 
-def _count_same_before_after_func(
-    f: CFGFunction,
-    inst: IRBlock
-) -> tuple[int, int]:
-    containing_block = None
-    inst_idx = -1
-    for bb in f.blocks:
-        for idx, bb_inst in enumerate(bb.instrs):
-            if bb_inst is inst:
-                containing_block = bb
-                inst_idx = idx
-                break
-        if containing_block:
+    breaks: list[int] = [ i for i, inst in enumerate(block.instrs) if inst.a == IRAction.BREAK ]
+    return min_distance, breaks
+
+def _reach_masks(f: CFGFunction, forward: bool) -> list[int]:
+    # Dense block index -> bitset of blocks reachable from the block through at least one edge
+    # (successors if `forward`, predecessors otherwise). Reachability of all blocks is one may
+    # problem in the other direction: the fact of a block is its bit and the facts of the next blocks
+    bits: dict[int, int] = block_bits(f)
+    result = solve_dataflow(
+        f,
+        transfer=lambda block, fact: fact | bits[block.id],
+        meet=operator.or_,
+        init=0,
+        boundary=0,
+        forward=not forward,
+        entry_boundary=False
+    )
+    return [ result.inputs[block.id] for block in f.blocks ]
+
+@register_analysis("reach_after")
+def _reach_after(ctx: FeatureContext) -> list[int]:
+    return _reach_masks(ctx.f, forward=True)
+
+@register_analysis("reach_before")
+def _reach_before(ctx: FeatureContext) -> list[int]:
+    return _reach_masks(ctx.f, forward=False)
+
+@register_feature("is_dom")
+def _is_dominated(ctx: FeatureContext, block: CFGBlock, index: int) -> bool:
+    return len(block.pred) > 1
+
+@register_feature("same_inst", requires=("csr",))
+def _same_inst(ctx: FeatureContext, block: CFGBlock, index: int) -> tuple[int, int]:
+    """Same actions before and after the instruction: the run of its action next to it in
+    the block, plus runs at the facing side of every block reachable through at least one
+    edge (the block itself too, if it is in a cycle).
+    """
+    instrs = block.instrs
+    op = instrs[index].a
+
+    before = _reached_runs(ctx, block, op, False)
+    for i in range(index - 1, -1, -1):
+        if instrs[i].a != op:
+            break
+        before += 1
+
+    after = _reached_runs(ctx, block, op, True)
+    for i in range(index + 1, len(instrs)):
+        if instrs[i].a != op:
             break
-    
-    if not containing_block:
-        return 0, 0
-    
-    op = inst.a
-    
-    def count_in_direction(start_block: CFGBlock, start_idx: int, direction_forward: bool) -> int:
-        from collections import deque
-        count = 0
-        visited = set()
-        queue: deque[CFGBlock] = deque()
-        
-        if direction_forward:
-            if start_idx + 1 < len(start_block.instrs):
-                for i in range(start_idx + 1, len(start_block.instrs)):
-                    if start_block.instrs[i].a == op:
-                        count += 1
-                    else:
-                        break
-            
-            for succ in start_block.succ:
-                queue.append(_get_bb_from_func(f, succ))
-        else:
-            if start_idx - 1 >= 0:
-                for i in range(start_idx - 1, -1, -1):
-                    if start_block.instrs[i].a == op:
-                        count += 1
-                    else:
-                        break
-            
-            for pred in start_block.pred:
-                queue.append(_get_bb_from_func(f, pred))
-        
-        while queue:
-            current_block = queue.popleft()
-            if current_block.id in visited:
-                continue
-            
-            visited.add(current_block.id)
-            if direction_forward:
-                for block_inst in current_block.instrs:
-                    if block_inst.a == op:
-                        count += 1
-                    else:
-                        break
-            else:
-                for block_inst in reversed(current_block.instrs):
-                    if block_inst.a == op:
-                        count += 1
-                    else:
-                        break
-            
-            if direction_forward:
-                for succ in current_block.succ:
-                    if _get_bb_from_func(f, succ).id not in visited:
-                        queue.append(_get_bb_from_func(f, succ))
-            else:
-                for pred in current_block.pred:
-                    if _get_bb_from_func(f, pred).id not in visited:
-                        queue.append(_get_bb_from_func(f, pred))
-        
-        return count
-    
-    before = count_in_direction(containing_block, inst_idx, False)
-    after = count_in_direction(containing_block, inst_idx, True)
-    
+        after += 1
+
     return before, after
 
+def _reached_runs(ctx: FeatureContext, block: CFGBlock, op: IRAction, forward: bool) -> int:
+    conf = ctx.conf
+    key = ("same_inst", block.id, op, forward, conf.horizon_blocks, conf.horizon_instrs)
+    if key in ctx.memo:
+        return ctx.memo[key]
+
+    graph = ctx.require("csr")
+    source: int = graph.index[block.id]
+    if conf.bounded:
+        # The BFS is shared by all actions of the block, its result is at most the horizon
+        reach_key = ("same_inst_reach", block.id, forward, conf.horizon_blocks, conf.horizon_instrs)
+        if reach_key not in ctx.memo:
+            ctx.memo[reach_key] = _reachable_within(graph, source, forward, conf)
+            ctx.count("bfs_visits", len(ctx.memo[reach_key]))
+        reached = ctx.memo[reach_key]
+    else:
+        reached = mask_to_indices(ctx.require("reach_after" if forward else "reach_before")[source])
+
+    blocks = ctx.f.blocks
+    count = 0
+    for v in reached:
+        block_instrs = blocks[v].instrs
+        for block_inst in (block_instrs if forward else reversed(block_instrs)):
+            if block_inst.a != op:
+                break
+            count += 1
+
+    ctx.memo[key] = count
+    return count
+
+def _reachable_within(graph: CSRGraph, source: int, forward: bool, conf: FeatureConfig) -> list[int]:
+    result = bfs(
+        graph, source, forward, weights=graph.sizes,
+        max_blocks=conf.horizon_blocks, max_dist=conf.horizon_instrs
+    )
+
+    # The source is reached again through an edge back to it, if the edge is within the horizon
+    # and the block budget isn't spent (the BFS doesn't enter the visited source itself)
+    reached: list[int] = list(result.order[1:])
+    if conf.horizon_blocks is not None and len(result.order) >= conf.horizon_blocks:
+        return reached
+
+    for v in result.order:
+        within: bool = conf.horizon_instrs is None or result.dist[v] + graph.sizes[v] <= conf.horizon_instrs
+        if within and source in graph.neighbors(v, forward):
+            reached.append(source)
+            break
+    return reached
+
+def _count_errors(ctx: FeatureContext, bb: CFGBlock, index: int, values: dict) -> None:
+    exact = compute_instruction_features(ctx.derive(FeatureConfig()), bb, index, ("near_break", "same_inst"))
+    near_break, exact_break = values["near_break"], exact["near_break"]
+    same, exact_same = values["same_inst"], exact["same_inst"]
+
+    ctx.count("feature_checks")
+    ctx.count("near_break_errors", int(near_break != exact_break))
+    ctx.count("near_break_missed", int(near_break < 0 <= exact_break))
+    ctx.count("near_break_abs_error", abs(near_break - exact_break) if near_break >= 0 and exact_break >= 0 else 0)
+    ctx.count("same_inst_errors", int(same != exact_same))
+    ctx.count("same_inst_abs_error", abs(same[0] - exact_same[0]) + abs(same[1] - exact_same[1]))
+
+def feature_error_stats(counters: dict[str, int]) -> dict[str, float]:
+    """Summarize errors of bounded features, which are counted with `FeatureConfig.measure_error`.
+
+    Args:
+        counters (dict[str, int]): Counters of `gather_instruction_info` (or `Instrumentation.counters`).
+
+    Returns:
+        dict[str, float]: Share of instructions with a wrong near_break / same_inst value, share of
+            missed breaks and mean absolute errors per instruction (zeros if nothing is checked).
+    """
+    checks: int = counters.get("feature_checks", 0)
+    if not checks:
+        return {
+            "checked": 0, "near_break_error_rate": 0.0, "near_break_miss_rate": 0.0,
+            "near_break_mean_abs_error": 0.0, "same_inst_error_rate": 0.0, "same_inst_mean_abs_error": 0.0
+        }
+
+    return {
+        "checked": checks,
+        "near_break_error_rate": counters.get("near_break_errors", 0) / checks,
+        "near_break_miss_rate": counters.get("near_break_missed", 0) / checks,
+        "near_break_mean_abs_error": counters.get("near_break_abs_error", 0) / checks,
+        "same_inst_error_rate": counters.get("same_inst_errors", 0) / checks,
+        "same_inst_mean_abs_error": counters.get("same_inst_abs_error", 0) / checks
+    }
+
 def gather_instruction_info(
     f: CFGFunction,
     bb: CFGBlock,
-    inst: IRBlock
+    inst: IRBlock,
+    counters: dict[str, int] | None = None,
+    conf: FeatureConfig | None = None,
+    ctx: FeatureContext | None = None
 ) -> CFGInstructionInfo:
-    near_break = _distance_to_nearest_break(f, inst)
-    is_dominated = _is_dominated(bb)
-    same_before, same_after = _count_same_before_after_func(f, inst)
-    
-    return CFGInstructionInfo(
-        near_break=near_break,
-        is_dominated=is_dominated,
-        same_inst_before=same_before,
-        same_inst_after=same_after
-    )
-    
\ No newline at end of file
+    """Compute the standard features of an instruction. Pass the same `ctx` for all instructions
+    of a function, so searches and indexes are shared (then `counters` and `conf` are taken from it).
+    """
+    if ctx is None:
+        ctx = FeatureContext(f, conf=conf, counters=counters)
+
+    _, index = ctx.require("instruction_index")[id(inst)]
+    values = compute_instruction_features(ctx, bb, index, INSTRUCTION_INFO_FEATURES)
+    if ctx.conf.bounded and ctx.conf.measure_error:
+        _count_errors(ctx, bb, index, values)
+    return make_instruction_info(values)
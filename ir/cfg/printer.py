@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Collection, Iterator, TextIO
 from ir.cfg.cfg import CFGFunction
 
 def _escape_dot(s: str) -> str:
@@ -13,6 +13,14 @@ def _escape_dot(s: str) -> str:
          .replace('"', '\\"')
     )
 
+def _owned_blocks(blocks: list[Any]) -> Iterator[tuple[str, Any]]:
+    for b in blocks:
+        if isinstance(b, CFGFunction):
+            for block in b.blocks:
+                yield b.func, block
+        else:
+            yield getattr(b, "func", ""), b
+
 def cfg_to_dot(
     blocks: list[Any],
     *,
@@ -20,20 +28,60 @@ def cfg_to_dot(
     show_instrs: bool = True,
     max_instrs: int = 25,
     prefer_succ: bool = True,
+    functions: Collection[str] | None = None,
+    block_ids: Collection[int] | None = None,
 ) -> str:
-    by_id = {}
-    for b in blocks:
-        by_id[getattr(b, "id", id(b))] = b
-
-    lines: list[str] = []
-    lines.append(f'digraph {graph_name} {{')
-    lines.append('  rankdir=TB;')
-    lines.append('  node [shape=box, fontname="Consolas", fontsize=10];')
-    lines.append('  edge [fontname="Consolas", fontsize=9];')
-
-    for b in blocks:
+    return "\n".join(iter_cfg_dot(
+        blocks, graph_name=graph_name, show_instrs=show_instrs, max_instrs=max_instrs,
+        prefer_succ=prefer_succ, functions=functions, block_ids=block_ids
+    ))
+
+def write_cfg_dot(blocks: list[Any], out: TextIO, **kwargs: Any) -> None:
+    """Write the DOT graph to a stream line by line. Takes the same options as `cfg_to_dot`.
+    With the `functions`/`block_ids` filters only a part of a huge graph can be dumped.
+
+    Args:
+        blocks (list[Any]): CFG blocks.
+        out (TextIO): Output stream.
+    """
+    for line in iter_cfg_dot(blocks, **kwargs):
+        out.write(line)
+        out.write("\n")
+
+def iter_cfg_dot(
+    blocks: list[Any],
+    *,
+    graph_name: str = "CFG",
+    show_instrs: bool = True,
+    max_instrs: int = 25,
+    prefer_succ: bool = True,
+    functions: Collection[str] | None = None,
+    block_ids: Collection[int] | None = None,
+) -> Iterator[str]:
+    """Lines of the DOT graph.
+
+    Args:
+        blocks (list[Any]): CFG blocks or CFGFunctions (their blocks are printed with the function name).
+        functions (Collection[str] | None, optional): Print only blocks of these functions.
+        block_ids (Collection[int] | None, optional): Print only blocks with these ids.
+            Edges to blocks which aren't printed are skipped.
+    """
+    def included(func: str, b: Any) -> bool:
+        if functions is not None and func not in functions:
+            return False
+        return block_ids is None or getattr(b, "id", id(b)) in block_ids
+
+    filtered = functions is not None or block_ids is not None
+    items = [ (func, b) for func, b in _owned_blocks(blocks) if not filtered or included(func, b) ]
+    shown_ids = { getattr(b, "id", id(b)) for _, b in items } if filtered else set()
+
+    yield f'digraph {graph_name} {{'
+    yield '  rankdir=TB;'
+    yield '  node [shape=box, fontname="Consolas", fontsize=10];'
+    yield '  edge [fontname="Consolas", fontsize=9];'
+
+    for func, b in items:
         bid = getattr(b, "id", id(b))
-        func = getattr(b, "func", "")
         start = getattr(b, "start", None)
         end = getattr(b, "end", None)
 
@@ -62,15 +110,17 @@ def cfg_to_dot(
             label_parts.append(instrs_txt)
 
         label = _escape_dot("\\l".join(label_parts) + "\\l")
-        lines.append(f'  "B{bid}" [label="{label}"];')
+        yield f'  "B{bid}" [label="{label}"];'
 
-    def add_edge(src_id: int, dst_id: int, label: str | None = None):
+    def edge(src_id: int, dst_id: int, label: str | None = None) -> Iterator[str]:
+        if filtered and dst_id not in shown_ids:
+            return
         if label:
-            lines.append(f'  "B{src_id}" -> "B{dst_id}" [label="{_escape_dot(label)}"];')
+            yield f'  "B{src_id}" -> "B{dst_id}" [label="{_escape_dot(label)}"];'
         else:
-            lines.append(f'  "B{src_id}" -> "B{dst_id}";')
+            yield f'  "B{src_id}" -> "B{dst_id}";'
 
-    for b in blocks:
+    for _, b in items:
         src = getattr(b, "id", id(b))
 
         succ = getattr(b, "succ", None)
@@ -78,7 +128,7 @@ def cfg_to_dot(
 
         if prefer_succ and succ:
             for dst in succ:
-                add_edge(src, dst, label=f"succ:{dst}")
+                yield from edge(src, dst, label=f"succ:{dst}")
                 used_any = True
 
         should_draw_jmp_lin = (not prefer_succ) or (not used_any)
@@ -89,18 +139,20 @@ def cfg_to_dot(
 
             if jmp is not None:
                 dst = getattr(jmp, "id", id(jmp))
-                add_edge(src, dst, label="jmp")
+                yield from edge(src, dst, label="jmp")
             if lin is not None:
                 dst = getattr(lin, "id", id(lin))
-                add_edge(src, dst, label="lin")
+                yield from edge(src, dst, label="lin")
+            for target in getattr(b, "tbl", None) or []:
+                dst = getattr(target, "id", id(target))
+                yield from edge(src, dst, label="tbl")
 
         if (not prefer_succ) and succ:
             for k, dsts in succ.items():
                 for dst in dsts:
-                    add_edge(src, dst, label=f"succ:{k}")
+                    yield from edge(src, dst, label=f"succ:{k}")
 
-    lines.append("}")
-    return "\n".join(lines)
+    yield "}"
 
 def dom_tree_to_dot(f: CFGFunction, name="DomTree") -> str:
     lines = [f"digraph {name} {{"]
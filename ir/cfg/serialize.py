@@ -0,0 +1,153 @@
+"""Compact form of CFG functions and loop trees. It is made of tuples, lists, strings and ints
+only: block links (jmp, lin, tbl, sdom) are stored as block indices, IR subjects are stored
+as (tag, value) pairs. Such form is cheap to pickle (no deep object graphs) and is used
+to move functions between processes.
+"""
+from ir.cfg.cfg import CFGBlock, CFGFunction
+from ir.loop.ltree import LoopNode
+from ir.instr.ir_block import (
+    IRBlock, IRAction, IRSubject, IRLabel, IRJumpTable,
+    IROperation, IRDeclaration, IRFunction, IRBaseBlockLabel
+)
+
+_LABEL, _TABLE, _OPERATION, _DECLARATION, _FUNCTION = range(5)
+_ACTIONS: dict[str, IRAction] = { action.value: action for action in IRAction }
+
+def _pack_subject(subject: IRSubject | None) -> tuple | None:
+    if subject is None:
+        return None
+
+    subject_cls = type(subject)
+    if subject_cls is IRLabel:
+        return (_LABEL, subject.id)
+    if subject_cls is IRJumpTable:
+        return (_TABLE, [ lb.id for lb in subject.labels ])
+    if subject_cls is IROperation:
+        return (_OPERATION, subject.op)
+    if subject_cls is IRDeclaration:
+        return (_DECLARATION, subject.type)
+    if subject_cls is IRFunction:
+        return (_FUNCTION, subject.name)
+
+    raise TypeError(f"Unexpected IR subject: {subject_cls.__name__}")
+
+def _unpack_subject(data: tuple | None, labels: dict[int, IRLabel]) -> IRSubject | None:
+    if data is None:
+        return None
+
+    tag, value = data
+    if tag == _LABEL:
+        if value not in labels:
+            labels[value] = IRLabel(lb_id=value)
+        return labels[value]
+    if tag == _TABLE:
+        return IRJumpTable(labels=[ _unpack_subject((_LABEL, lb), labels) for lb in value ])
+    if tag == _OPERATION:
+        return IROperation(op=value)
+    if tag == _DECLARATION:
+        return IRDeclaration(type=value)
+    return IRFunction(name=value)
+
+def pack_function(f: CFGFunction) -> tuple:
+    """Convert a CFG function to the compact form.
+
+    Args:
+        f (CFGFunction): Function to pack.
+
+    Returns:
+        tuple: Packed function.
+    """
+    index: dict[int, int] = { id(block): i for i, block in enumerate(f.blocks) }
+
+    def _idx(block: CFGBlock | None) -> int:
+        return -1 if block is None else index[id(block)]
+
+    blocks: list[tuple] = []
+    for block in f.blocks:
+        blocks.append((
+            block.id, block.start, block.end, block.instrs[0].id,
+            [ (inst.a.value, inst.loc, *(_pack_subject(s) for s in inst.subjects)) for inst in block.instrs[1:] ],
+            tuple(block.succ), tuple(block.pred), tuple(block.dom), _idx(block.sdom),
+            _idx(block.jmp), _idx(block.lin), [ _idx(target) for target in block.tbl ]
+        ))
+
+    return (f.id, f.func, blocks)
+
+def unpack_function(data: tuple) -> CFGFunction:
+    """Restore a CFG function from the compact form.
+
+    Args:
+        data (tuple): Packed function (see `pack_function`).
+
+    Returns:
+        CFGFunction: Function with the same blocks, edges and dominators.
+    """
+    func_id, name, packed = data
+    labels: dict[int, IRLabel] = {}
+
+    blocks: list[CFGBlock] = []
+    for block_id, start, end, bb_id, instrs, succ, pred, dom, *_ in packed:
+        label = IRBaseBlockLabel(bb_id)
+        blocks.append(CFGBlock(
+            id=block_id, start=start, end=end,
+            instrs=[ label ] + [
+                IRBlock(_ACTIONS[a], *(_unpack_subject(s, labels) for s in subjects), loc=loc)
+                for a, loc, *subjects in instrs
+            ],
+            succ=set(succ), pred=set(pred), dom=set(dom)
+        ))
+
+    for block, (*_, sdom, jmp, lin, tbl) in zip(blocks, packed):
+        block.sdom = blocks[sdom] if sdom >= 0 else None
+        block.jmp  = blocks[jmp] if jmp >= 0 else None
+        block.lin  = blocks[lin] if lin >= 0 else None
+        block.tbl  = [ blocks[i] for i in tbl ]
+
+    return CFGFunction(id=func_id, func=name, blocks=blocks)
+
+def pack_loops(loops: list[LoopNode], blocks: list[CFGBlock]) -> tuple:
+    """Convert a loop tree to the compact form.
+
+    Args:
+        loops (list[LoopNode]): Loop tree roots.
+        blocks (list[CFGBlock]): Blocks used by the loops (e.g. blocks of a function).
+
+    Returns:
+        tuple: Packed loop tree.
+    """
+    index: dict[int, int] = { id(block): i for i, block in enumerate(blocks) }
+    nodes: list[LoopNode] = []
+    order: dict[int, int] = {}
+
+    stack: list[LoopNode] = list(loops)
+    while stack:
+        node = stack.pop()
+        if id(node) not in order:
+            order[id(node)] = len(nodes)
+            nodes.append(node)
+            stack.extend(node.childs)
+
+    return (
+        [ order[id(root)] for root in loops ],
+        [ ([ index[id(b)] for b in node.blocks ], [ order[id(c)] for c in node.childs ]) for node in nodes ]
+    )
+
+def unpack_loops(data: tuple, blocks: list[CFGBlock]) -> list[LoopNode]:
+    """Restore a loop tree from the compact form.
+
+    Args:
+        data (tuple): Packed loop tree (see `pack_loops`).
+        blocks (list[CFGBlock]): Blocks in the same order as they were given to `pack_loops`.
+
+    Returns:
+        list[LoopNode]: Loop tree roots.
+    """
+    roots, packed = data
+    nodes: list[LoopNode] = [ LoopNode(blocks={ blocks[i] for i in members }) for members, _ in packed ]
+    
+    # Loop nodes are compared by value in sets, so children are completed before their parents
+    for node, (_, childs) in zip(reversed(nodes), reversed(packed)):
+        for i in childs:
+            node.childs.add(nodes[i])
+
+    return [ nodes[i] for i in roots ]
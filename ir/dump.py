@@ -0,0 +1,31 @@
+"""Field tables of dumped records.
+
+A record (CFGInstructionInfo, LoopInfo, InstructionAnalysis...) lists its dumped fields once, in
+`dump_fields()`: (key, value) pairs in the output order. A value is a primitive, a dict or another
+record. `dump_to_json` builds dicts from the table and `analysis.serializer` writes the same table
+without building them, so both always have the same layout.
+"""
+from typing import Any, Iterable
+
+Fields = Iterable[tuple[str, Any]] # (key, value) pairs of a record
+
+def is_record(value: Any) -> bool:
+    return hasattr(value, "dump_fields")
+
+def dump_fields_to_json(fields: Fields) -> dict:
+    """Build the JSON-friendly dict of a record's fields (nested records are converted too).
+
+    Args:
+        fields (Fields): Fields of the record (see `dump_fields`).
+
+    Returns:
+        dict: Key -> value.
+    """
+    return { key: _dump_value(value) for key, value in fields }
+
+def _dump_value(value: Any) -> Any:
+    if is_record(value):
+        return dump_fields_to_json(value.dump_fields())
+    if isinstance(value, dict):
+        return { key: _dump_value(item) for key, item in value.items() }
+    return value
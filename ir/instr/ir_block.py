@@ -1,8 +1,10 @@
 from enum import Enum
+from parser.tokenizer import SourceLocation
 
 class IRAction(Enum):
     MKLB    = "mklable"
     JMP     = "jump"
+    JTBL    = "jtable"
     BREAK   = "break"
     IF      = "if"
     BINOP   = "binop"
@@ -33,6 +35,14 @@ class IRLabel(IRSubject):
     def __str__(self) -> str:
         return f"lb{self.id}"
 
+class IRJumpTable(IRSubject):
+    def __init__(self, labels: list[IRLabel]) -> None:
+        super().__init__()
+        self.labels: list[IRLabel] = labels
+        
+    def __str__(self) -> str:
+        return f"table({','.join(str(lb) for lb in self.labels)})"
+
 class IROperation(IRSubject):
     def __init__(self, op: str) -> None:
         super().__init__()
@@ -63,10 +73,12 @@ class IRBlock:
         a: IRAction, 
         x: IRSubject | None = None, 
         y: IRSubject | None = None, 
-        z: IRSubject | None = None
+        z: IRSubject | None = None,
+        loc: SourceLocation | None = None
     ) -> None:
         self.a: IRAction = a
         self.subjects: list[IRSubject | None] = [ x, y, z ]
+        self.loc: SourceLocation | None = loc # Source location of the construction this instruction comes from
 
     def __str__(self) -> str:
         if self.subjects[2]:
@@ -1,5 +1,8 @@
 from dataclasses import dataclass
-from ir.loop.ltree import LoopNode
+from ir.dump import Fields, dump_fields_to_json
+from ir.cfg.cfg import CFGBlock
+from ir.cfg.features import FeatureContext, register_analysis, register_feature
+from ir.loop.ltree import LoopNode, find_loop
 
 @dataclass
 class LoopInfo:
@@ -7,12 +10,15 @@ class LoopInfo:
     loop_size_ir: int
     loop_nested: int
 
+    def dump_fields(self) -> Fields:
+        return (
+            ("loop_size_bb", self.loop_size_bb),
+            ("loop_size_ir", self.loop_size_ir),
+            ("loop_nested", self.loop_nested)
+        )
+
     def dump_to_json(self) -> dict:
-        return {
-            "loop_size_bb": self.loop_size_bb,
-            "loop_size_ir": self.loop_size_ir,
-            "loop_nested": self.loop_nested
-        }
+        return dump_fields_to_json(self.dump_fields())
 
 def gather_loop_info(loops: list[LoopNode], trg: LoopNode) -> LoopInfo:
     def _dfs(node: LoopNode, depth: int) -> LoopInfo | None:
@@ -39,3 +45,19 @@ def gather_loop_info(loops: list[LoopNode], trg: LoopNode) -> LoopInfo:
             return info
 
     return None
+
+@register_analysis("loop_forest")
+def _loop_forest(ctx: FeatureContext) -> dict[int, LoopInfo | None]:
+    # Block id -> information of its innermost loop. Only loop trees of this function are searched
+    blocks: set[CFGBlock] = set(ctx.f.blocks)
+    roots: list[LoopNode] = [ root for root in ctx.loops if not root.blocks.isdisjoint(blocks) ]
+
+    forest: dict[int, LoopInfo | None] = {}
+    for block in ctx.f.blocks:
+        loop = find_loop(block, roots)
+        forest[block.id] = gather_loop_info(roots, loop) if loop else None
+    return forest
+
+@register_feature("loop_info", requires=("loop_forest",))
+def _loop_info(ctx: FeatureContext, block: CFGBlock, index: int) -> LoopInfo | None:
+    return ctx.require("loop_forest")[block.id]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from ir.cfg.cfg import CFGBlock, CFGFunction
+from ir.cfg.csr import reachable
 
 @dataclass
 class LoopNode:
@@ -20,43 +21,32 @@ class LoopNode:
     def __str__(self) -> str:
         return f"loop_node(childs={len(self.childs)},blocks={len(self.blocks)})"
             
-def build_block_index(func: CFGFunction) -> dict[int, CFGBlock]:
-    return {block.id: block for block in func.blocks}
+def is_back_edge(func: CFGFunction, block: CFGBlock, succ: CFGBlock | None) -> bool:
+    """Check if the edge block -> succ is a back edge (the successor dominates the block).
+    """
+    return succ is not None and func.dominates(succ, block)
 
 def find_natural_loop(
     header_id: int,
     back_id: int,
-    block_map: dict[int, CFGBlock]
+    func: CFGFunction
 ) -> set[CFGBlock]:
-    header = block_map[header_id]
-    back   = block_map[back_id]
-
-    loop_blocks: set[CFGBlock] = {header}
-    stack: list[CFGBlock] = [back]
-
-    while stack:
-        b = stack.pop()
-        if b not in loop_blocks:
-            loop_blocks.add(b)
-            for pid in b.pred:
-                if pid != header_id:
-                    stack.append(block_map[pid])
-
-    return loop_blocks
+    graph = func.csr
+    header = graph.index[header_id]
+    reached = reachable(graph, [graph.index[back_id]], forward=False, blocked=[header])
+    return {graph.blocks[header]} | { graph.blocks[i] for i in reached }
 
 def generate_loop_tree(funcs: list[CFGFunction]) -> list[LoopNode]:
     all_loops: list[LoopNode] = []
 
     for func in funcs:
-        block_map = build_block_index(func)
-
         for b in func.blocks:
             for succ_id in b.succ:
-                if succ_id in b.dom:
+                if is_back_edge(func, b, func.block_by_id(succ_id)):
                     blocks = find_natural_loop(
                         header_id=succ_id,
                         back_id=b.id,
-                        block_map=block_map
+                        func=func
                     )
 
                     all_loops.append(LoopNode(blocks=blocks))
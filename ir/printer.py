@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Sequence
+from typing import Iterator, Sequence, TextIO
 from ir.instr.ir_block import IRBlock, IRAction, IRBaseBlockLabel
 
 @dataclass
@@ -18,6 +18,34 @@ def pretty_print_ir(
     *,
     style: PrintStyle = PrintStyle(),
 ) -> str:
+    return "\n".join(iter_ir_lines(blocks, style=style))
+
+def write_ir(
+    blocks: Sequence[IRBlock],
+    out: TextIO,
+    *,
+    style: PrintStyle = PrintStyle(),
+) -> None:
+    """Write the IR text to a stream line by line, without building the whole text.
+    The output is the same as `pretty_print_ir` plus the trailing new line.
+
+    Args:
+        blocks (Sequence[IRBlock]): IR blocks.
+        out (TextIO): Output stream.
+        style (PrintStyle, optional): Printing style.
+    """
+    separator = ""
+    for line in iter_ir_lines(blocks, style=style):
+        out.write(separator)
+        out.write(line)
+        separator = "\n"
+    out.write("\n")
+
+def iter_ir_lines(
+    blocks: Sequence[IRBlock],
+    *,
+    style: PrintStyle = PrintStyle(),
+) -> Iterator[str]:
     OPENERS = {
         IRAction.IF,
         IRAction.LOOP,
@@ -29,15 +57,15 @@ def pretty_print_ir(
         IRAction.TERM,
     }
 
-    lines: list[str] = []
     level = 0
+    emitted = False
 
     index_width = len(str(len(blocks))) 
 
-    def emit(line: str, idx: int | None = None) -> None:
+    def emit(line: str, idx: int | None = None) -> str:
         prefix = style.indent * level
         index_str = f"[{idx:{index_width}d}] " if idx is not None else " " * (index_width + 3)
-        lines.append(index_str + prefix + line)
+        return index_str + prefix + line
 
     def action_friendly(b: IRBlock) -> str:
         a, subs = b.a, b.subjects
@@ -63,6 +91,8 @@ def pretty_print_ir(
             return f"syscall"
         if a == IRAction.JMP and subs[0]:
             return f"jump to {subs[0]}"
+        if a == IRAction.JTBL and subs[0]:
+            return f"jump by {subs[0]}"
         if a == IRAction.BREAK:
             return "break"
         if a == IRAction.DREF and subs[0]:
@@ -90,33 +120,33 @@ def pretty_print_ir(
         if a in CLOSERS:
             if level > 0:
                 level -= 1
-                emit("}")
+                yield emit("}")
             
             line = action_friendly(b)
-            emit(f"{line} {action_comment_map.get(a,'')}", idx=i)
+            yield emit(f"{line} {action_comment_map.get(a,'')}", idx=i)
+            emitted = True
             continue
 
         if isinstance(b, IRBaseBlockLabel) and style.show_bb_header:
-            if lines:
-                lines.append("")
+            if emitted:
+                yield ""
             hdr = f"===== BB{b.id} ====="
-            emit(f"{hdr}")
+            yield emit(f"{hdr}")
+            emitted = True
             continue
 
         line = action_friendly(b)
         if a in OPENERS:
             if style.brace_same_line:
-                emit(f"{line} {{ {action_comment_map.get(a,'')}", idx=i)
+                yield emit(f"{line} {{ {action_comment_map.get(a,'')}", idx=i)
             else:
-                emit(f"{line} {action_comment_map.get(a,'')}", idx=i)
-                emit("{")
+                yield emit(f"{line} {action_comment_map.get(a,'')}", idx=i)
+                yield emit("{")
             level += 1
         else:
-            emit(f"{line} {action_comment_map.get(a,'')}", idx=i)
+            yield emit(f"{line} {action_comment_map.get(a,'')}", idx=i)
+        emitted = True
 
     while level > 0:
         level -= 1
-        emit("}")
-
-    return "\n".join(lines)
-
+        yield emit("}")
@@ -1,6 +1,11 @@
+from typing import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from ir.cfg.cfg import CFGFunction
+from ir.cfg.cfggen import CFGContext, CFGBuilder
 from ir.instr.ir_block import (
     IRBlock, IRAction, IRSubject, IRLabel, IROperation,
-    IRFunction
+    IRFunction, IRJumpTable
 )
 
 from parser.uast import (
@@ -10,12 +15,25 @@ from parser.uast import (
     ConditionElseNode, BreakNode, Operations
 )
 
+@dataclass
+class TranslatorConfig:
+    jump_tables: bool = False # Lower switches to one 'jtable' dispatch instead of an 'if' chain
+
 class Translator:
-    def __init__(self, root: UastNode) -> None:
-        self.root: UastNode = root
-        self.ctx: list[IRBlock] = []
+    """Translates the UAST into the flat IR form.
+
+    The translation doesn't recurse. Every `translate_*_node` method only expands a node:
+    it emits what it can right away and schedules the rest on the work stack. A work item
+    is either a UastNode (to translate), an IRBlock (to emit) or a tuple of (callable, *args)
+    to invoke, which lets `brk_ctx` changes and other bookkeeping happen in the right order.
+    """
+    def __init__(self, root: UastNode | None, conf: TranslatorConfig | None = None) -> None:
+        self.root: UastNode | None = root
+        self.conf: TranslatorConfig = conf or TranslatorConfig()
+        self.ctx: list[IRBlock] | CFGBuilder = []
         self.brk_ctx: list[IRLabel] = []
         self.lb_id: int = 0
+        self.stack: list[UastNode | IRBlock | tuple] = []
         
     def get_next_label_id(self) -> int:
         current: int = self.lb_id
@@ -26,60 +44,118 @@ class Translator:
         self.translate_uast_node(self.root)
         return self.ctx
     
+    def translate_to_cfg(self, cfgctx: CFGContext) -> list[CFGFunction]:
+        """Translate the UAST directly into linked CFG functions. This is the same 
+        as `CFGContext.get_blocks_from_ir` + `CFGContext.link_blocks` on the `translate` 
+        output, but without the flat IR list.
+
+        Args:
+            cfgctx (CFGContext): Context for function and block ids.
+
+        Returns:
+            list[CFGFunction]: Linked CFG functions.
+        """
+        builder: CFGBuilder = CFGBuilder(ctx=cfgctx)
+        self.ctx = builder
+        self.translate_uast_node(self.root)
+        return builder.finish()
+    
+    def iter_cfg_functions(
+        self,
+        cfgctx: CFGContext,
+        release: bool = False,
+        parts: Iterable[UastNode] | None = None
+    ) -> Iterator[CFGFunction]:
+        """Translate the UAST directly into linked CFG functions, one function at a time.
+        A function is produced when the next one starts (or the UAST ends), so trailing 
+        instructions go to it the same way as in `translate_to_cfg`.
+
+        Args:
+            cfgctx (CFGContext): Context for function and block ids.
+            release (bool, optional): Drop function lists of the UAST nodes once they are 
+                scheduled, so every translated function can be collected. Defaults to False.
+            parts (Iterable[UastNode] | None, optional): Consecutive parts of the UAST to translate
+                instead of the root (see `Parser.parse_parts`), taken one at a time. Defaults to None.
+
+        Yields:
+            CFGFunction: Linked CFG function (a redefined function is produced twice).
+        """
+        builder: CFGBuilder = CFGBuilder(ctx=cfgctx, stream=True)
+        self.ctx = builder
+        for part in (parts if parts is not None else [self.root]):
+            for _ in self._run(part, release=release):
+                while builder.ready:
+                    yield builder.ready.pop(0)
+                
+        yield from builder.finish()
+    
+    def schedule(self, *items: UastNode | IRBlock | tuple | None) -> None:
+        """Put work items on the stack, so they will be handled in the provided order.
+        None items are skipped.
+        """
+        for item in reversed(items):
+            if item is not None:
+                self.stack.append(item)
+    
     def translate_uast_node(self, node: UastNode) -> None:
+        for _ in self._run(node):
+            pass
+    
+    def _run(self, node: UastNode, release: bool = False) -> Iterator[None]:
+        """Work loop. Yields after every function node, so a caller can pick up
+        the previous function at this point.
+        """
         if not node:
             return
         
-        if isinstance(node, FunctionNode):
-            self.translate_function_node(node)
-        elif isinstance(node, SyscallNode):
-            self.translate_syscall_node(node)
-        elif isinstance(node, FunctionCallNode):
-            self.translate_funccall_node(node)
-        elif isinstance(node, RExitNode):
-            self.translate_rexit_node(node)
-        elif isinstance(node, LoopNode):
-            self.translate_loop_node(node)
-        elif isinstance(node, SwitchNode):
-            self.translate_switch_node(node)
-        elif isinstance(node, DeclarationNode):
-            self.translate_declaration_node(node)
-        elif isinstance(node, BinaryNode):
-            self.translate_binary_node(node)
-        elif isinstance(node, UnaryNode):
-            self.translate_unary_node(node)
-        elif isinstance(node, ConditionNode):
-            self.translate_condition_node(node)
-        elif isinstance(node, ConditionElseNode):
-            self.translate_conditionelse_node(node)
-        elif isinstance(node, ElseNode):
-            self.translate_else_node(node)
-        elif isinstance(node, BreakNode):
-            self.translate_break_node()
-        else:
-            if node.childs:
-                for child in node.childs:
-                    self.translate_uast_node(child)
+        stack = self.stack
+        base = len(stack)
+        stack.append(node)
+        
+        handlers = _HANDLERS
+        emit = self.ctx.append
+        while len(stack) > base:
+            item = stack.pop()
+            item_cls = type(item)
+            if item_cls is IRBlock:
+                emit(item)
+                continue
+            if item_cls is tuple:
+                item[0](*item[1:])
+                continue
+            
+            handler = handlers.get(item_cls)
+            if handler is None:
+                handler = _resolve_handler(item_cls)
+            
+            handler(self, item)
+            if release and any(isinstance(child, FunctionNode) for child in item.childs):
+                item.childs = []
+            if item_cls is FunctionNode:
+                yield
+    
+    def emit(self, block: IRBlock) -> None:
+        self.ctx.append(block)
+    
+    def translate_generic_node(self, node: UastNode) -> None:
+        if node.childs:
+            self.schedule(*node.childs)
     
     def translate_function_node(self, node: FunctionNode) -> None:
-        self.ctx.append(IRBlock(a=IRAction.FDECL, x=IRFunction(name=node.get_name())))
-        self.translate_uast_node(node.get_body())
-        self.ctx.append(IRBlock(a=IRAction.FEND))
+        self.ctx.append(IRBlock(a=IRAction.FDECL, x=IRFunction(name=node.get_name()), loc=node.token.location))
+        self.schedule(node.get_body(), IRBlock(a=IRAction.FEND))
     
     def translate_funccall_node(self, node: FunctionCallNode) -> None:
-        self.translate_uast_node(node.get_args())
-        self.ctx.append(IRBlock(a=IRAction.FCALL, x=IRFunction(name=node.get_name())))
+        self.schedule(node.get_args(), IRBlock(a=IRAction.FCALL, x=IRFunction(name=node.get_name()), loc=node.token.location))
     
     def translate_syscall_node(self, node: SyscallNode) -> None:
-        self.translate_uast_node(node.get_args())
-        self.ctx.append(IRBlock(a=IRAction.SCALL))
+        self.schedule(node.get_args(), IRBlock(a=IRAction.SCALL, loc=node.token.location))
     
     def translate_rexit_node(self, node: RExitNode) -> None:
-        self.translate_uast_node(node.get_retval())
-        self.ctx.append(IRBlock(a=IRAction.TERM))
+        self.schedule(node.get_retval(), IRBlock(a=IRAction.TERM, loc=node.token.location))
     
-    def translate_break_node(self) -> None:
-        self.ctx.append(IRBlock(a=IRAction.BREAK))
+    def translate_break_node(self, node: BreakNode | None = None) -> None:
+        self.ctx.append(IRBlock(a=IRAction.BREAK, loc=node.token.location if node else None))
         if self.brk_ctx:
             self.ctx.append(IRBlock(a=IRAction.JMP, x=self.brk_ctx[-1]))
     
@@ -88,45 +164,71 @@ class Translator:
         body_lb: IRSubject  = IRLabel(lb_id=self.get_next_label_id())
         exit_lb: IRSubject  = IRLabel(lb_id=self.get_next_label_id())
         self.ctx.append(IRBlock(a=IRAction.MKLB, x=entry_lb))
-        self.ctx.append(IRBlock(a=IRAction.LOOP))
-        
-        self.translate_uast_node(node.get_cond())
-        self.ctx.append(IRBlock(a=IRAction.IF, x=body_lb, y=exit_lb))
+        self.ctx.append(IRBlock(a=IRAction.LOOP, loc=node.token.location))
         
-        self.ctx.append(IRBlock(a=IRAction.MKLB, x=body_lb))
-        self.brk_ctx.append(exit_lb)
-        self.translate_uast_node(node.get_body())
-        self.brk_ctx.pop()
-        self.ctx.append(IRBlock(a=IRAction.JMP, x=entry_lb))
-        
-        self.ctx.append(IRBlock(a=IRAction.MKLB, x=exit_lb))
+        self.schedule(
+            node.get_cond(),
+            IRBlock(a=IRAction.IF, x=body_lb, y=exit_lb, loc=node.token.location),
+            IRBlock(a=IRAction.MKLB, x=body_lb),
+            (self.brk_ctx.append, exit_lb),
+            node.get_body(),
+            (self.brk_ctx.pop,),
+            IRBlock(a=IRAction.JMP, x=entry_lb),
+            IRBlock(a=IRAction.MKLB, x=exit_lb)
+        )
     
     def translate_switch_node(self, node: SwitchNode) -> None:
-        self.ctx.append(IRBlock(a=IRAction.SWITCH))
-        self.translate_uast_node(node.get_cond())
+        self.ctx.append(IRBlock(a=IRAction.SWITCH, loc=node.token.location))
+        cases: list[UastNode] = node.get_cases()
+        if self.conf.jump_tables:
+            self.schedule(node.get_cond(), (self._translate_switch_table, cases))
+        else:
+            self.schedule(node.get_cond(), *((self._translate_switch_case, case) for case in cases))
+    
+    def _translate_switch_case(self, case: UastNode) -> None:
+        true_lb: IRSubject  = IRLabel(lb_id=self.get_next_label_id())
+        false_lb: IRSubject = IRLabel(lb_id=self.get_next_label_id())
+        self.ctx.append(IRBlock(a=IRAction.IF, x=true_lb, y=false_lb))
+        self.ctx.append(IRBlock(a=IRAction.MKLB, x=true_lb))
+        self.brk_ctx.append(false_lb)
+        self.schedule(
+            case,
+            (self.brk_ctx.pop,),
+            IRBlock(a=IRAction.MKLB, x=false_lb)
+        )
+    
+    def _translate_switch_table(self, cases: list[UastNode]) -> None:
+        """Emit the whole switch as a single 'jtable' dispatch. Every case gets its own label,
+        cases fall through into each other, and 'break' leaves to the exit label. If there is 
+        no 'default' case, the exit label is the last table entry (nothing matched).
+        """
+        case_lbs: list[IRLabel] = [ IRLabel(lb_id=self.get_next_label_id()) for _ in cases ]
+        exit_lb: IRLabel = IRLabel(lb_id=self.get_next_label_id())
         
-        case_index: int = 0
-        while node.get_case(case_index):
-            true_lb: IRSubject  = IRLabel(lb_id=self.get_next_label_id())
-            false_lb: IRSubject = IRLabel(lb_id=self.get_next_label_id())
-            self.ctx.append(IRBlock(a=IRAction.IF, x=true_lb, y=false_lb))
-            self.ctx.append(IRBlock(a=IRAction.MKLB, x=true_lb))
-            self.brk_ctx.append(false_lb)
-            self.translate_uast_node(node.get_case(case_index))
-            self.ctx.append(IRBlock(a=IRAction.MKLB, x=false_lb))
-            case_index += 1
+        targets: list[IRLabel] = case_lbs.copy()
+        if not any(case.token.value == "default" for case in cases):
+            targets.append(exit_lb)
+            
+        self.ctx.append(IRBlock(a=IRAction.JTBL, x=IRJumpTable(labels=targets)))
+        self.brk_ctx.append(exit_lb)
+        
+        items: list[UastNode | IRBlock | tuple] = []
+        for case_lb, case in zip(case_lbs, cases):
+            items.append(IRBlock(a=IRAction.MKLB, x=case_lb))
+            items.append(case)
+            
+        self.schedule(*items, (self.brk_ctx.pop,), IRBlock(a=IRAction.MKLB, x=exit_lb))
     
     def translate_declaration_node(self, node: DeclarationNode) -> None:
-        self.ctx.append(IRBlock(a=IRAction.DECL, x=IROperation(op=node.get_type())))
-        self.translate_uast_node(node.get_val())
+        self.ctx.append(IRBlock(a=IRAction.DECL, x=IROperation(op=node.get_type()), loc=node.token.location))
+        self.schedule(node.get_val())
     
     def translate_binary_node(self, node: BinaryNode) -> None:
-        self.translate_uast_node(node.get_left())
-        self.translate_uast_node(node.get_right())
-        
         match node.get_op():
             case _:
-                self.ctx.append(IRBlock(a=IRAction.NOTHING))
+                block = IRBlock(a=IRAction.NOTHING, loc=node.token.location)
+        
+        self.schedule(node.get_left(), node.get_right(), block)
     
     def translate_unary_node(self, node: UnaryNode) -> None:
         irop: IRAction = IRAction.NOTHING
@@ -135,25 +237,51 @@ class Translator:
         elif node.get_op() == Operations.DREF:
             irop = IRAction.DREF
             
-        self.ctx.append(IRBlock(a=irop, x=IROperation(op=node.get_op().name)))
+        self.ctx.append(IRBlock(a=irop, x=IROperation(op=node.get_op().name), loc=node.token.location))
     
     def translate_condition_node(self, node: ConditionNode) -> None:
         true_lb: IRSubject  = IRLabel(lb_id=self.get_next_label_id())
         false_lb: IRSubject = IRLabel(lb_id=self.get_next_label_id())
-        self.ctx.append(IRBlock(a=IRAction.IF, x=true_lb, y=false_lb))
-        self.translate_uast_node(node.get_cond())
+        self.ctx.append(IRBlock(a=IRAction.IF, x=true_lb, y=false_lb, loc=node.token.location))
         
-        if node.get_true():
-            self.ctx.append(IRBlock(a=IRAction.MKLB, x=true_lb))
-            self.translate_uast_node(node.get_true())
-            
-        if node.get_false():
-            self.ctx.append(IRBlock(a=IRAction.MKLB, x=false_lb))
-            self.translate_uast_node(node.get_false())
+        true_node: UastNode | None = node.get_true()
+        false_node: UastNode | None = node.get_false()
+        self.schedule(
+            node.get_cond(),
+            IRBlock(a=IRAction.MKLB, x=true_lb) if true_node else None,
+            true_node,
+            IRBlock(a=IRAction.MKLB, x=false_lb) if false_node else None,
+            false_node
+        )
     
     def translate_conditionelse_node(self, node: ConditionElseNode) -> None:
-        self.translate_condition_node(node.get_cond())
+        self.schedule(node.get_cond())
     
     def translate_else_node(self, node: ElseNode) -> None:
-        self.translate_uast_node(node.get_body())
-    
\ No newline at end of file
+        self.schedule(node.get_body())
+
+_HANDLERS: dict[type, Callable[[Translator, UastNode | IRBlock], None]] = {
+    FunctionNode:      Translator.translate_function_node,
+    SyscallNode:       Translator.translate_syscall_node,
+    FunctionCallNode:  Translator.translate_funccall_node,
+    RExitNode:         Translator.translate_rexit_node,
+    LoopNode:          Translator.translate_loop_node,
+    SwitchNode:        Translator.translate_switch_node,
+    DeclarationNode:   Translator.translate_declaration_node,
+    BinaryNode:        Translator.translate_binary_node,
+    UnaryNode:         Translator.translate_unary_node,
+    ConditionNode:     Translator.translate_condition_node,
+    ConditionElseNode: Translator.translate_conditionelse_node,
+    ElseNode:          Translator.translate_else_node,
+    BreakNode:         Translator.translate_break_node,
+    UastNode:          Translator.translate_generic_node,
+    IRBlock:           Translator.emit,
+}
+
+def _resolve_handler(cls: type) -> Callable[[Translator, UastNode | IRBlock], None]:
+    for base in cls.__mro__:
+        if base in _HANDLERS:
+            _HANDLERS[cls] = _HANDLERS[base]
+            return _HANDLERS[cls]
+        
+    raise TypeError(f"Unexpected translation item: {cls.__name__}")
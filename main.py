@@ -29,7 +29,7 @@ void main(int* a) {
   )
   
   analyzer.print_ir()                   # Print the IR presentation of a code
-  analyzer.all_calls()                  # Get all function calls in list (from up to down)
+  analyzer.all_calls()                  # Get all function calls in tuple (from up to down)
   analyzer.get_function("main")         # Get information about a function (FunctionAnalysis)
   analyzer.functions                    # Get a dict with [str:FunctionAnalysis] (str - function name)
   analyzer.get_function("main").calls() # Get function calls from the function (InstructionAnalysis)
@@ -0,0 +1,252 @@
+"""Lazy parsing of preprocessed C translation units.
+
+Usually only a few functions of a translation unit are needed, but pycparser parses every
+body. `LazyTranslationUnit` scans the preprocessed text for top-level function bodies (by
+brace matching, without parsing) and parses a stub of the unit where every body is empty,
+so declarations, typedefs and function signatures are known. A body is parsed only when its
+function is requested: the function text is parsed alone, after the typedef names declared
+before it and used in it (pycparser must know them to parse the body) and a line marker, so
+coordinates stay the original ones. When all bodies are requested (`definitions`), the whole
+unit is parsed once, which is cheaper than parsing every function text alone.
+
+If the scan doesn't agree with the stub (e.g. K&R definitions), the whole unit is parsed
+as usual.
+"""
+import re
+
+from bisect import bisect_right
+from pathlib import Path
+from dataclasses import dataclass
+from pycparser import c_ast
+
+from parser.c.pyc_to_uast import get_cparser
+from parser.c.pyc_prefix import LINE_MARKER_RE, HeaderPrefixCache, declare_typedefs
+
+_TOKEN_RE = re.compile(
+    r'^[ \t]*#[^\n]*'                 # Line marker or another directive (#pragma)
+    r'|"(?:\\.|[^"\\\n])*"'           # String literal
+    r"|'(?:\\.|[^'\\\n])*'"           # Character literal
+    r'|[{}()\[\];]',
+    re.MULTILINE
+)
+
+@dataclass
+class FunctionSpan:
+    name: str           # Function name
+    start: int          # Offset of the definition's first token in the preprocessed text
+    body: int           # Offset of the body's '{'
+    end: int            # Offset after the body's '}'
+    file: str           # Source file of the definition (as in line markers)
+    line: int           # Source line of the first token
+    column: int         # Source column of the first token
+    end_line: int       # Source line of the closing '}'
+    end_column: int     # Source column of the closing '}'
+
+class LazyTranslationUnit:
+    """Preprocessed translation unit whose function bodies are parsed on demand.
+
+    Args:
+        text (str): Preprocessed code (with line markers).
+        filename (str, optional): File name for coordinates before the first line marker.
+        prefixes (HeaderPrefixCache | None, optional): Cache of header prefixes for the stub.
+    """
+    def __init__(self, text: str, filename: str = "", prefixes: HeaderPrefixCache | None = None) -> None:
+        self.text: str = text
+        self.filename: str = filename
+        self.functions: dict[str, FunctionSpan] = {}  # Function name -> its definition
+        self.lazy: bool = True                         # False if the whole unit had to be parsed
+        self.parsed_bodies: int = 0                    # How many function bodies were parsed
+        self._markers: list[int] = []                  # Offsets of lines after line markers
+        self._marker_pos: list[tuple[int, str]] = []   # (line, quoted file) of every marker
+        self._typedefs: list[str] = []                 # Typedef names of the unit, in the declaration order
+        self._typedefs_before: dict[str, int] = {}     # Function name -> count of typedef names declared before it
+        self._defs: dict[str, c_ast.FuncDef] = {}
+        self._sources: dict[str, list[str] | None] = {}
+        self._prefixes: HeaderPrefixCache | None = prefixes
+
+        spans = self._scan()
+        self.ast: c_ast.FileAST = self._parse(self._stub(spans))
+        self._index(spans)
+
+    def function(self, name: str) -> c_ast.FuncDef | None:
+        """Get the definition of a function, parsing its body on the first request.
+
+        Returns:
+            c_ast.FuncDef | None: Definition, None if the unit doesn't define the function.
+        """
+        if name in self._defs:
+            return self._defs[name]
+
+        span = self.functions.get(name)
+        if span is None:
+            return None
+
+        text = self.text[span.start:span.end]
+        prefix, _ = declare_typedefs(self._typedefs[:self._typedefs_before[name]], text)
+        code = f"{prefix}# {span.line} {self._quoted(span.start)}\n{' ' * (span.column - 1)}{text}\n"
+        node = next(n for n in reversed(get_cparser().parse(code, self.filename).ext) if isinstance(n, c_ast.FuncDef))
+        self.parsed_bodies += 1
+        self._defs[name] = node
+        return node
+
+    def definitions(self) -> list[c_ast.FuncDef]:
+        """Parse all function bodies. If more than one body isn't parsed yet, the whole unit is
+        parsed once instead of every function text alone.
+
+        Returns:
+            list[c_ast.FuncDef]: Definitions in the order of the unit.
+        """
+        pending = [ name for name in self.functions if name not in self._defs ]
+        if len(pending) > 1:
+            for node in self._parse(self.text).ext:
+                if isinstance(node, c_ast.FuncDef) and node.decl.name not in self._defs:
+                    self._defs[node.decl.name] = node
+            self.parsed_bodies += len(pending)
+        return [ self.function(name) for name in self.functions ]
+
+    def source(self, name: str) -> str | None:
+        """Get the source text of a function definition, sliced from its file by coordinates
+        (macros aren't expanded).
+
+        Returns:
+            str | None: Source text, None if the function isn't defined, the file can't be read
+                or the definition isn't contained in one file.
+        """
+        span = self.functions.get(name)
+        if span is None or not self.lazy or self._quoted(span.start) != self._quoted(span.end - 1):
+            return None
+
+        lines = self._source_lines(span.file)
+        if lines is None or span.end_line > len(lines):
+            return None
+
+        if span.line == span.end_line:
+            code = lines[span.line - 1][span.column - 1:span.end_column]
+        else:
+            code = "".join([
+                lines[span.line - 1][span.column - 1:],
+                *lines[span.line:span.end_line - 1],
+                lines[span.end_line - 1][:span.end_column]
+            ])
+        return code if code.endswith("}") else None
+
+    def _scan(self) -> list[tuple[int, int, int]]:
+        # (first token, '{', after '}') of every top-level body preceded by ')'
+        text = self.text
+        spans: list[tuple[int, int, int]] = []
+        depth, parens = 0, 0
+        start, body, prev, prev_end = 0, -1, "", 0
+        for m in _TOKEN_RE.finditer(text):
+            tok = m.group()
+            ch = tok[0]
+            if ch in " \t#":
+                marker = LINE_MARKER_RE.match(tok)
+                if marker:
+                    self._markers.append(m.end() + 1)
+                    self._marker_pos.append((int(marker.group(1)), marker.group(2)))
+                if depth == 0 and not text[start:m.start()].strip():
+                    start = m.end() + 1
+                continue
+
+            if ch in "([":
+                parens += 1
+            elif ch in ")]":
+                parens -= 1
+            elif ch == "{":
+                if depth == 0 and parens == 0 and prev == ")" and not text[prev_end:m.start()].strip():
+                    body = m.start()
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    if body >= 0:
+                        spans.append((start + len(text[start:body]) - len(text[start:body].lstrip()), body, m.end()))
+                        start, body = m.end(), -1
+            elif ch == ";" and depth == 0 and parens == 0:
+                start = m.end()
+            prev, prev_end = ch, m.end()
+        return spans
+
+    def _stub(self, spans: list[tuple[int, int, int]]) -> str:
+        # Bodies are emptied, a line marker after the body's line restores coordinates
+        text = self.text
+        pieces: list[str] = []
+        pos = 0
+        for _, body, end in spans:
+            nl = text.find("\n", end)
+            nl = len(text) if nl < 0 else nl + 1
+            line, _ = self._coord(end - 1)
+            pieces.append(text[pos:body + 1])
+            pieces.append("}")
+            pieces.append(text[end:nl])
+            if nl < len(text):
+                pieces.append(f"# {line + 1} {self._quoted(end - 1)}\n")
+            pos = nl
+        pieces.append(text[pos:])
+        return "".join(pieces)
+
+    def _index(self, spans: list[tuple[int, int, int]]) -> None:
+        defs = [ n for n in self.ast.ext if isinstance(n, c_ast.FuncDef) ]
+        if len(defs) != len(spans):
+            self._parse_all()
+            return
+
+        seen: set[str] = set()
+        pos = 0
+        for node in self.ast.ext:
+            if isinstance(node, c_ast.Typedef):
+                if node.name not in seen:
+                    seen.add(node.name)
+                    self._typedefs.append(node.name)
+            elif isinstance(node, c_ast.FuncDef):
+                start, body, end = spans[pos]
+                pos += 1
+                line, column = self._coord(start)
+                end_line, end_column = self._coord(end - 1)
+                self.functions[node.decl.name] = FunctionSpan(
+                    name=node.decl.name, start=start, body=body, end=end,
+                    file=self._file(start), line=line, column=column,
+                    end_line=end_line, end_column=end_column
+                )
+                self._typedefs_before[node.decl.name] = len(self._typedefs)
+
+    def _parse_all(self) -> None:
+        self.lazy = False
+        self.ast = self._parse(self.text)
+        for node in self.ast.ext:
+            if isinstance(node, c_ast.FuncDef):
+                self._defs[node.decl.name] = node
+                self.functions[node.decl.name] = FunctionSpan(
+                    name=node.decl.name, start=0, body=0, end=0,
+                    file=node.decl.coord.file if node.decl.coord else self.filename,
+                    line=0, column=0, end_line=0, end_column=0
+                )
+
+    def _parse(self, text: str) -> c_ast.FileAST:
+        if self._prefixes is not None:
+            return self._prefixes.parse(text, self.filename)
+        return get_cparser().parse(text, self.filename)
+
+    def _marker(self, offset: int) -> int:
+        return bisect_right(self._markers, offset) - 1
+
+    def _coord(self, offset: int) -> tuple[int, int]:
+        i = self._marker(offset)
+        base, line = (self._markers[i], self._marker_pos[i][0]) if i >= 0 else (0, 1)
+        line += self.text.count("\n", base, offset)
+        return line, offset - self.text.rfind("\n", 0, offset)
+
+    def _quoted(self, offset: int) -> str:
+        i = self._marker(offset)
+        return self._marker_pos[i][1] if i >= 0 else f'"{self.filename}"'
+
+    def _file(self, offset: int) -> str:
+        return self._quoted(offset)[1:-1].replace('\\\\', '\\')
+
+    def _source_lines(self, file: str) -> list[str] | None:
+        if file not in self._sources:
+            try:
+                self._sources[file] = Path(file).read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+            except OSError:
+                self._sources[file] = None
+        return self._sources[file]
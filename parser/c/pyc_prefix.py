@@ -0,0 +1,136 @@
+"""Shared parsing of header prefixes of preprocessed C translation units.
+
+Translation units of a project include the same headers (fake libc, project headers), so
+their preprocessed texts start with the same thousands of declarations. `HeaderPrefixCache`
+splits a unit at its first line of the main file (found by line markers): the prefix before
+it is parsed once per distinct text, and only the remainder is parsed for every unit, after
+the typedef names of the prefix used in it (pycparser must know them) and a line marker, so
+coordinates stay the original ones. Units share the nodes of a prefix, don't modify them.
+
+Line markers of the main file are dropped from a prefix (only blank lines of the main file
+can be before the split), so units with the same includes have the same prefix.
+"""
+import re
+import hashlib
+import threading
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from pycparser import c_ast
+
+from parser.c.pyc_to_uast import get_cparser
+
+# '# 12 "file.h" 1' (GCC) or '#line 12 "file.h"': line of the next line, quoted file
+LINE_MARKER_RE = re.compile(r'[ \t]*#[ \t]*(?:line[ \t]+)?(\d+)[ \t]+("(?:\\.|[^"\\])*")')
+_IDENTIFIER_RE = re.compile(r'[A-Za-z_]\w*')
+
+@dataclass
+class HeaderPrefix:
+    ext: list[c_ast.Node]   # Parsed top-level nodes of the prefix
+    typedefs: list[str]     # Typedef names declared in the prefix
+
+class HeaderPrefixCache:
+    """LRU cache of parsed header prefixes.
+
+    Args:
+        max_entries (int, optional): How many prefixes are kept. Defaults to 8.
+    """
+    def __init__(self, max_entries: int = 8) -> None:
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[str, HeaderPrefix] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def parse(self, text: str, filename: str = "") -> c_ast.FileAST:
+        """Parse a preprocessed unit, taking its header prefix from the cache.
+
+        Args:
+            text (str): Preprocessed code (with line markers).
+            filename (str, optional): File name for coordinates before the first line marker.
+
+        Returns:
+            c_ast.FileAST: AST of the unit (the prefix nodes are shared).
+        """
+        split = _split_prefix(text)
+        if split is None:
+            return get_cparser().parse(text, filename)
+
+        prefix_text, pos, line, quoted = split
+        try:
+            prefix = self._prefix(prefix_text, filename)
+        except Exception:
+            # The prefix doesn't end at a declaration boundary, the unit is parsed as a whole
+            return get_cparser().parse(text, filename)
+
+        rest_text = text[pos:]
+        declared, count = declare_typedefs(prefix.typedefs, rest_text)
+        rest = get_cparser().parse(f"{declared}# {line} {quoted}\n{rest_text}", filename)
+        return c_ast.FileAST(ext=prefix.ext + rest.ext[count:])
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+    def _prefix(self, text: str, filename: str) -> HeaderPrefix:
+        key = hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+        with self._lock:
+            prefix = self.entries.get(key)
+            if prefix is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return prefix
+            self.misses += 1
+
+        ext = get_cparser().parse(text, filename).ext
+        typedefs = list(dict.fromkeys(n.name for n in ext if isinstance(n, c_ast.Typedef)))
+        prefix = HeaderPrefix(ext=ext, typedefs=typedefs)
+
+        with self._lock:
+            self.entries[key] = prefix
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return prefix
+
+def declare_typedefs(names: list[str], text: str) -> tuple[str, int]:
+    """Declare typedef names for parsing a part of a unit alone. Only the names used in the
+    part are declared (as int, the type doesn't matter for parsing).
+
+    Args:
+        names (list[str]): Typedef names declared before the part.
+        text (str): Code of the part.
+
+    Returns:
+        tuple[str, int]: Declarations (one per line) and their count.
+    """
+    used = set(_IDENTIFIER_RE.findall(text))
+    declared = [ f"typedef int {name};\n" for name in names if name in used ]
+    return "".join(declared), len(declared)
+
+def _split_prefix(text: str) -> tuple[str, int, int, str] | None:
+    # (prefix without main file markers, offset of the first main file line, its line, quoted main file)
+    main: str | None = None
+    current: str | None = None
+    line: int = 1
+    kept: list[str] = []
+    pos: int = 0
+    while pos < len(text):
+        end = text.find("\n", pos)
+        end = len(text) if end < 0 else end + 1
+        row = text[pos:end]
+
+        marker = LINE_MARKER_RE.match(row)
+        if marker:
+            current, line = marker.group(2), int(marker.group(1))
+            if main is None:
+                main = current
+            if current != main:
+                kept.append(row)
+        elif row.strip() and current is not None and current == main:
+            prefix = "".join(kept)
+            return (prefix, pos, line, main) if prefix.strip() else None
+        else:
+            kept.append(row)
+            line += 1
+        pos = end
+    return None
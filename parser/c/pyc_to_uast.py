@@ -1,5 +1,7 @@
+import threading
+
 from pycparser import CParser, c_ast
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
 
 from parser.tokenizer import Token, ScopeToken
 from parser.uast import (
@@ -128,42 +130,57 @@ C_UNARY_OPERATOR_MAP = {
 }
 
 def _decl_type_to_str(type_node: c_ast.Node) -> str:
-    if type_node is None:
-        return "<?>"
-    if isinstance(type_node, c_ast.PtrDecl):
-        return _decl_type_to_str(type_node.type) + "*"
-    if isinstance(type_node, c_ast.ArrayDecl):
-        dim = ""
-        if type_node.dim is not None:
-            dim = _expr_to_str(type_node.dim)
-        return f"{_decl_type_to_str(type_node.type)}[{dim}]"
-    if isinstance(type_node, c_ast.TypeDecl):
-        return _decl_type_to_str(type_node.type)
-    if isinstance(type_node, c_ast.IdentifierType):
-        return " ".join(type_node.names)
-    if isinstance(type_node, c_ast.Struct):
-        return f"struct {type_node.name or ''}".strip()
-    if isinstance(type_node, c_ast.Union):
-        return f"union {type_node.name or ''}".strip()
-    if isinstance(type_node, c_ast.Enum):
-        return f"enum {type_node.name or ''}".strip()
-    if isinstance(type_node, c_ast.FuncDecl):
-        return f"{_decl_type_to_str(type_node.type)}()"
-
-    return type_node.__class__.__name__
+    # Pieces are emitted left to right from an explicit stack (of nodes and ready strings),
+    # so long pointer/array chains don't hit the recursion limit
+    pieces: list[str] = []
+    stack: list[c_ast.Node | str | None] = [type_node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        elif item is None:
+            pieces.append("<?>")
+        elif isinstance(item, c_ast.PtrDecl):
+            stack += ["*", item.type]
+        elif isinstance(item, c_ast.ArrayDecl):
+            stack += [f"[{_expr_to_str(item.dim)}]", item.type]
+        elif isinstance(item, c_ast.TypeDecl):
+            stack.append(item.type)
+        elif isinstance(item, c_ast.IdentifierType):
+            pieces.append(" ".join(item.names))
+        elif isinstance(item, c_ast.Struct):
+            pieces.append(f"struct {item.name or ''}".strip())
+        elif isinstance(item, c_ast.Union):
+            pieces.append(f"union {item.name or ''}".strip())
+        elif isinstance(item, c_ast.Enum):
+            pieces.append(f"enum {item.name or ''}".strip())
+        elif isinstance(item, c_ast.FuncDecl):
+            stack += ["()", item.type]
+        else:
+            pieces.append(item.__class__.__name__)
+    return "".join(pieces)
 
 def _expr_to_str(node: Optional[c_ast.Node]) -> str:
-    if node is None:
-        return ""
-    if isinstance(node, c_ast.Constant):
-        return str(node.value)
-    if isinstance(node, c_ast.ID):
-        return node.name
-    if isinstance(node, c_ast.BinaryOp):
-        return f"({_expr_to_str(node.left)} {node.op} {_expr_to_str(node.right)})"
-    if isinstance(node, c_ast.UnaryOp):
-        return f"({node.op}{_expr_to_str(node.expr)})"
-    return node.__class__.__name__
+    # Same explicit stack as in `_decl_type_to_str`: huge expressions are rendered without recursion
+    pieces: list[str] = []
+    stack: list[c_ast.Node | str | None] = [node]
+    while stack:
+        item = stack.pop()
+        if item is None:
+            continue
+        if isinstance(item, str):
+            pieces.append(item)
+        elif isinstance(item, c_ast.Constant):
+            pieces.append(str(item.value))
+        elif isinstance(item, c_ast.ID):
+            pieces.append(item.name)
+        elif isinstance(item, c_ast.BinaryOp):
+            stack += [")", item.right, f" {item.op} ", item.left, "("]
+        elif isinstance(item, c_ast.UnaryOp):
+            stack += [")", item.expr, f"({item.op}"]
+        else:
+            pieces.append(item.__class__.__name__)
+    return "".join(pieces)
 
 def _make_token(kind: str, value: str, coord) -> Token:
     if coord is None:
@@ -177,222 +194,247 @@ def _make_token(kind: str, value: str, coord) -> Token:
     )
 
 class PycparserToUast:
+    """Converts a pycparser AST into the UAST.
+
+    The traversal uses an explicit work stack instead of recursion, so deeply nested
+    input (long `else if` chains, huge expressions) doesn't hit the recursion limit.
+    Every stack item is a pair of (item, parent), where item is either a pycparser node
+    to convert, or an already built UastNode (a wrapper) that only must be attached.
+    """
     def convert(self, node: Optional[c_ast.Node]) -> Optional[UastNode]:
         if node is None:
             return None
 
-        if isinstance(node, c_ast.FuncDef):
-            fn_tok = _make_token("Function", node.decl.name, node.coord)
-            u = FunctionNode(fn_tok)
-
-            func_decl = node.decl.type
-            if isinstance(func_decl, c_ast.FuncDecl) and func_decl.args:
-                params_u = UastNode(_make_token("Params", "params", func_decl.args.coord))
-                for p in func_decl.args.params or []:
-                    pu = self.convert(p)
-                    if pu:
-                        params_u.add_child(pu)
-                u.add_child(params_u)
-
-            body_u = self.convert(node.body)
-            if body_u:
-                u.add_child(body_u)
-            return u
-
-        if isinstance(node, c_ast.FuncCall):
-            name_str = _expr_to_str(node.name) if node.name else "<?>"
-            if name_str in SYSCALL_NAMES:
-                u = SyscallNode(_make_token("Syscall", name_str, node.coord))
-            else: 
-                u = FunctionCallNode(_make_token("Call", name_str, node.coord))
-
-            if node.args:
-                args_u = self.convert(node.args)
-                if args_u:
-                    u.add_child(args_u)
-            return u
-
-        if isinstance(node, c_ast.Return):
-            u = RExitNode(_make_token("Return", "return", node.coord))
-            if node.expr:
-                expr_u = self.convert(node.expr)
-                if expr_u:
-                    u.add_child(expr_u)
-            return u
-
-        if isinstance(node, c_ast.For):
-            u = LoopNode(_make_token("Loop", "for", node.coord))
-            for part, label in [(node.init, "init"), (node.cond, "cond"), (node.next, "next"), (node.stmt, "body")]:
-                part_u = self.convert(part)
-                if part_u:
-                    wrapper = UastNode(_make_token("ForPart", label, getattr(part, "coord", node.coord)))
-                    wrapper.add_child(part_u)
-                    u.add_child(wrapper)
-            return u
-
-        if isinstance(node, c_ast.While):
-            u = LoopNode(_make_token("Loop", "while", node.coord))
-            cond_u = self.convert(node.cond)
-            body_u = self.convert(node.stmt)
-            if cond_u:
-                u.add_child(cond_u)
-            if body_u:
-                u.add_child(body_u)
-            return u
-
-        if isinstance(node, c_ast.DoWhile):
-            u = LoopNode(_make_token("Loop", "do_while", node.coord))
-            body_u = self.convert(node.stmt)
-            cond_u = self.convert(node.cond)
-            if body_u:
-                u.add_child(body_u)
-            if cond_u:
-                u.add_child(cond_u)
-            return u
-
-        if isinstance(node, c_ast.Break):
-            return BreakNode(_make_token("Break", "break", node.coord))
-
-        if isinstance(node, c_ast.If):
-            return self._convert_if(node)
-
-        if isinstance(node, c_ast.Switch):
-            u = SwitchNode(_make_token("Switch", "switch", node.coord))
-            cond_u = self.convert(node.cond)
-            stmt_u = self.convert(node.stmt)
-            if cond_u:
-                u.add_child(cond_u)
-            if stmt_u:
-                u.add_child(stmt_u)
-            return u
-
-        if isinstance(node, c_ast.Decl):
-            name = node.name or "<?>"
-            typ = _decl_type_to_str(node.type)
-            u = DeclarationNode(_make_token("Decl", name, node.coord), type=typ)
-            if node.init:
-                init_u = self.convert(node.init)
-                if init_u:
-                    u.add_child(init_u)
-            return u
-
-        if isinstance(node, c_ast.Assignment):
-            u = BinaryNode(_make_token("Assign", node.op, node.coord), op=C_BINARY_OPERATOR_MAP.get(node.op, Operations.ADD))
-            l = self.convert(node.lvalue)
-            r = self.convert(node.rvalue)
-            if l:
-                u.add_child(l)
-            if r:
-                u.add_child(r)
-            return u
-
-        if isinstance(node, c_ast.BinaryOp):
-            u = BinaryNode(_make_token("BinOp", node.op, node.coord), op=C_BINARY_OPERATOR_MAP.get(node.op, Operations.ADD))
-            l = self.convert(node.left)
-            r = self.convert(node.right)
-            if l:
-                u.add_child(l)
-            if r:
-                u.add_child(r)
-            return u
-
-        if isinstance(node, c_ast.UnaryOp):
-            u = UnaryNode(_make_token("UnOp", node.op, node.coord), op=C_UNARY_OPERATOR_MAP.get(node.op, Operations.DREF))
-            e = self.convert(node.expr)
-            if e:
-                u.add_child(e)
-            return u
-
-        if isinstance(node, c_ast.TernaryOp):
-            u = UastNode(_make_token("Ternary", "?:", node.coord))
-            for part in [node.cond, node.iftrue, node.iffalse]:
-                pu = self.convert(part)
-                if pu:
-                    u.add_child(pu)
-            return u
-
-        if isinstance(node, c_ast.ExprList):
-            u = UastNode(_make_token("Args", "args", node.coord))
-            for e in node.exprs or []:
-                eu = self.convert(e)
-                if eu:
-                    u.add_child(eu)
-            return u
-
-        if isinstance(node, c_ast.ID):
-            return UastNode(_make_token("Id", node.name, node.coord))
-
-        if isinstance(node, c_ast.Constant):
-            return UastNode(_make_token("Const", str(node.value), node.coord))
-
-        if isinstance(node, c_ast.Compound):
-            u = UastNode(ScopeToken())
-            for st in node.block_items or []:
-                su = self.convert(st)
-                if su:
-                    u.add_child(su)
-            return u
-
-        if isinstance(node, c_ast.Case):
-            u = UastNode(_make_token("Case", "case", node.coord))
-            ex = self.convert(node.expr)
-            if ex:
-                u.add_child(ex)
-            for st in node.stmts or []:
-                su = self.convert(st)
-                if su:
-                    u.add_child(su)
-            return u
-
-        if isinstance(node, c_ast.Default):
-            u = UastNode(_make_token("Default", "default", node.coord))
-            for st in node.stmts or []:
-                su = self.convert(st)
-                if su:
-                    u.add_child(su)
-            return u
-
-        if isinstance(node, c_ast.Break):
-            return UastNode(_make_token("Break", "break", node.coord))
-
-        if isinstance(node, c_ast.Continue):
-            return UastNode(_make_token("Continue", "continue", node.coord))
+        holder = UastNode(Token())
+        stack: list[tuple[c_ast.Node | UastNode, UastNode]] = [(node, holder)]
+        handlers = _HANDLERS
 
-        u = UastNode(_make_token("Node", node.__class__.__name__, getattr(node, "coord", None)))
-        for _, child in node.children():
-            cu = self.convert(child)
-            if cu:
-                u.add_child(cu)
+        while stack:
+            item, parent = stack.pop()
+            if isinstance(item, UastNode):
+                parent.add_child(item)
+                continue
+
+            handler = handlers.get(type(item))
+            if handler is None:
+                handler = _resolve_handler(type(item))
+
+            parent.add_child(handler(self, item, stack))
+
+        return holder.childs[0]
+
+    @staticmethod
+    def _push(stack: list, parent: UastNode, *nodes: Optional[c_ast.Node]) -> None:
+        for n in reversed(nodes):
+            if n is not None:
+                stack.append((n, parent))
+
+    def _convert_funcdef(self, node: c_ast.FuncDef, stack: list) -> UastNode:
+        fn_tok = _make_token("Function", node.decl.name, node.coord)
+        u = FunctionNode(fn_tok)
+
+        self._push(stack, u, node.body)
+        func_decl = node.decl.type
+        if isinstance(func_decl, c_ast.FuncDecl) and func_decl.args:
+            params_u = UastNode(_make_token("Params", "params", func_decl.args.coord))
+            self._push(stack, params_u, *(func_decl.args.params or []))
+            stack.append((params_u, u))
 
         return u
 
-    def _convert_if(self, node: c_ast.If) -> UastNode:
-        u_if = ConditionNode(_make_token("If", "if", node.coord))
+    def _convert_funccall(self, node: c_ast.FuncCall, stack: list) -> UastNode:
+        name_str = _expr_to_str(node.name) if node.name else "<?>"
+        if name_str in SYSCALL_NAMES:
+            u = SyscallNode(_make_token("Syscall", name_str, node.coord))
+        else: 
+            u = FunctionCallNode(_make_token("Call", name_str, node.coord))
+
+        self._push(stack, u, node.args)
+        return u
+
+    def _convert_return(self, node: c_ast.Return, stack: list) -> UastNode:
+        u = RExitNode(_make_token("Return", "return", node.coord))
+        self._push(stack, u, node.expr)
+        return u
 
-        cond_u = self.convert(node.cond)
-        then_u = self.convert(node.iftrue)
-        if cond_u:
-            u_if.add_child(cond_u)
-        if then_u:
-            u_if.add_child(then_u)
+    def _convert_for(self, node: c_ast.For, stack: list) -> UastNode:
+        u = LoopNode(_make_token("Loop", "for", node.coord))
+        for part, label in reversed([(node.init, "init"), (node.cond, "cond"), (node.next, "next"), (node.stmt, "body")]):
+            if part is None:
+                continue
+
+            wrapper = UastNode(_make_token("ForPart", label, getattr(part, "coord", node.coord)))
+            stack.append((part, wrapper))
+            stack.append((wrapper, u))
+
+        return u
+
+    def _convert_while(self, node: c_ast.While, stack: list) -> UastNode:
+        u = LoopNode(_make_token("Loop", "while", node.coord))
+        self._push(stack, u, node.cond, node.stmt)
+        return u
+
+    def _convert_dowhile(self, node: c_ast.DoWhile, stack: list) -> UastNode:
+        u = LoopNode(_make_token("Loop", "do_while", node.coord))
+        self._push(stack, u, node.stmt, node.cond)
+        return u
+
+    def _convert_break(self, node: c_ast.Break, stack: list) -> UastNode:
+        return BreakNode(_make_token("Break", "break", node.coord))
+
+    def _convert_if(self, node: c_ast.If, stack: list) -> UastNode:
+        u_if = ConditionNode(_make_token("If", "if", node.coord))
 
         if node.iffalse is not None:
             if isinstance(node.iffalse, c_ast.If):
-                u_else_if = ConditionElseNode(_make_token("ElseIf", "else if", node.iffalse.coord))
-                u_else_if.add_child(self._convert_if(node.iffalse))
-                u_if.add_child(u_else_if)
+                u_else = ConditionElseNode(_make_token("ElseIf", "else if", node.iffalse.coord))
             else:
                 u_else = ElseNode(_make_token("Else", "else", getattr(node.iffalse, "coord", node.coord)))
-                else_u = self.convert(node.iffalse)
-                if else_u:
-                    u_else.add_child(else_u)
-                u_if.add_child(u_else)
 
+            stack.append((node.iffalse, u_else))
+            stack.append((u_else, u_if))
+
+        self._push(stack, u_if, node.cond, node.iftrue)
         return u_if
+
+    def _convert_switch(self, node: c_ast.Switch, stack: list) -> UastNode:
+        u = SwitchNode(_make_token("Switch", "switch", node.coord))
+        self._push(stack, u, node.cond, node.stmt)
+        return u
+
+    def _convert_decl(self, node: c_ast.Decl, stack: list) -> UastNode:
+        name = node.name or "<?>"
+        typ = _decl_type_to_str(node.type)
+        u = DeclarationNode(_make_token("Decl", name, node.coord), type=typ)
+        self._push(stack, u, node.init)
+        return u
+
+    def _convert_assignment(self, node: c_ast.Assignment, stack: list) -> UastNode:
+        u = BinaryNode(_make_token("Assign", node.op, node.coord), op=C_BINARY_OPERATOR_MAP.get(node.op, Operations.ADD))
+        self._push(stack, u, node.lvalue, node.rvalue)
+        return u
+
+    def _convert_binaryop(self, node: c_ast.BinaryOp, stack: list) -> UastNode:
+        u = BinaryNode(_make_token("BinOp", node.op, node.coord), op=C_BINARY_OPERATOR_MAP.get(node.op, Operations.ADD))
+        self._push(stack, u, node.left, node.right)
+        return u
+
+    def _convert_unaryop(self, node: c_ast.UnaryOp, stack: list) -> UastNode:
+        u = UnaryNode(_make_token("UnOp", node.op, node.coord), op=C_UNARY_OPERATOR_MAP.get(node.op, Operations.DREF))
+        self._push(stack, u, node.expr)
+        return u
+
+    def _convert_ternaryop(self, node: c_ast.TernaryOp, stack: list) -> UastNode:
+        u = UastNode(_make_token("Ternary", "?:", node.coord))
+        self._push(stack, u, node.cond, node.iftrue, node.iffalse)
+        return u
+
+    def _convert_exprlist(self, node: c_ast.ExprList, stack: list) -> UastNode:
+        u = UastNode(_make_token("Args", "args", node.coord))
+        self._push(stack, u, *(node.exprs or []))
+        return u
+
+    def _convert_id(self, node: c_ast.ID, stack: list) -> UastNode:
+        return UastNode(_make_token("Id", node.name, node.coord))
+
+    def _convert_constant(self, node: c_ast.Constant, stack: list) -> UastNode:
+        return UastNode(_make_token("Const", str(node.value), node.coord))
+
+    def _convert_compound(self, node: c_ast.Compound, stack: list) -> UastNode:
+        u = UastNode(ScopeToken())
+        self._push(stack, u, *(node.block_items or []))
+        return u
+
+    def _convert_case(self, node: c_ast.Case, stack: list) -> UastNode:
+        u = UastNode(_make_token("Case", "case", node.coord))
+        self._push(stack, u, node.expr, *(node.stmts or []))
+        return u
+
+    def _convert_default(self, node: c_ast.Default, stack: list) -> UastNode:
+        u = UastNode(_make_token("Default", "default", node.coord))
+        self._push(stack, u, *(node.stmts or []))
+        return u
+
+    def _convert_continue(self, node: c_ast.Continue, stack: list) -> UastNode:
+        return UastNode(_make_token("Continue", "continue", node.coord))
+
+    def _convert_node(self, node: c_ast.Node, stack: list) -> UastNode:
+        u = UastNode(_make_token("Node", node.__class__.__name__, getattr(node, "coord", None)))
+        self._push(stack, u, *(child for _, child in node.children()))
+        return u
+
+_HANDLERS: dict[type, Callable[[PycparserToUast, c_ast.Node, list], UastNode]] = {
+    c_ast.FuncDef:    PycparserToUast._convert_funcdef,
+    c_ast.FuncCall:   PycparserToUast._convert_funccall,
+    c_ast.Return:     PycparserToUast._convert_return,
+    c_ast.For:        PycparserToUast._convert_for,
+    c_ast.While:      PycparserToUast._convert_while,
+    c_ast.DoWhile:    PycparserToUast._convert_dowhile,
+    c_ast.Break:      PycparserToUast._convert_break,
+    c_ast.If:         PycparserToUast._convert_if,
+    c_ast.Switch:     PycparserToUast._convert_switch,
+    c_ast.Decl:       PycparserToUast._convert_decl,
+    c_ast.Assignment: PycparserToUast._convert_assignment,
+    c_ast.BinaryOp:   PycparserToUast._convert_binaryop,
+    c_ast.UnaryOp:    PycparserToUast._convert_unaryop,
+    c_ast.TernaryOp:  PycparserToUast._convert_ternaryop,
+    c_ast.ExprList:   PycparserToUast._convert_exprlist,
+    c_ast.ID:         PycparserToUast._convert_id,
+    c_ast.Constant:   PycparserToUast._convert_constant,
+    c_ast.Compound:   PycparserToUast._convert_compound,
+    c_ast.Case:       PycparserToUast._convert_case,
+    c_ast.Default:    PycparserToUast._convert_default,
+    c_ast.Continue:   PycparserToUast._convert_continue,
+}
+
+def _resolve_handler(cls: type) -> Callable[[PycparserToUast, c_ast.Node, list], UastNode]:
+    handler = PycparserToUast._convert_node
+    for base in cls.__mro__:
+        if base in _HANDLERS:
+            handler = _HANDLERS[base]
+            break
+
+    _HANDLERS[cls] = handler
+    return handler
+    
+_local = threading.local()
+
+def get_cparser() -> CParser:
+    """Get a CParser of the current thread. The parser is built once (with the
+    older PLY-based pycparser this means building the parse tables) and then reused.
+    """
+    parser: CParser | None = getattr(_local, "parser", None)
+    if parser is None:
+        parser = CParser()
+        _local.parser = parser
+    return parser
     
 def c_code_to_uast(code: str) -> UastNode:
-    parser = CParser()
+    parser = get_cparser()
     ast_root: c_ast.Node = parser.parse(code)
+    return _ast_to_uast(ast_root)
+
+def c_nodes_to_uast(nodes: list[c_ast.Node]) -> UastNode:
+    """Convert already parsed top-level nodes (e.g. FuncDefs of a cached translation unit)
+    as if they were one file. Nodes keep their coordinates and aren't modified.
+    """
+    return _ast_to_uast(c_ast.FileAST(ext=list(nodes)))
+
+def c_code_to_uast_parts(code: str) -> Iterator[UastNode]:
+    """Parse the code and convert it one top-level node (function, declaration...) at a time,
+    see `c_nodes_to_uast_parts`. The pycparser AST of the whole code is built first.
+    """
+    yield from c_nodes_to_uast_parts(get_cparser().parse(code).ext)
+
+def c_nodes_to_uast_parts(nodes: Iterable[c_ast.Node]) -> Iterator[UastNode]:
+    """Convert top-level nodes one by one. Every part is the UAST of a file with one node,
+    so only one converted node is alive at a time if the parts are dropped once used.
+    Translating the parts in order gives the same IR as translating `c_nodes_to_uast(nodes)`.
+    """
+    for node in nodes:
+        yield _ast_to_uast(c_ast.FileAST(ext=[node]))
+
+def _ast_to_uast(ast_root: c_ast.Node) -> UastNode:
     conv = PycparserToUast()
     u = conv.convert(ast_root)
     if u is None:
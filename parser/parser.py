@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from enum import Enum
+from typing import Iterator
 from dataclasses import dataclass
 
 from parser.uast import UastNode
-from parser.c.pyc_to_uast import c_code_to_uast
+from parser.c.pyc_to_uast import c_code_to_uast, c_nodes_to_uast, c_code_to_uast_parts, c_nodes_to_uast_parts
 from parser.cpl.cpl_to_uast import cpl_code_to_uast
 
 class Language(Enum):
@@ -25,22 +26,47 @@ class ParserConfig:
     file: str | None = None
     code: str | None = None
     lang: Language   = Language.C
+    nodes: list | None = None # Already parsed top-level nodes (C: pycparser nodes), used instead of the code
 
 class Parser:
     def __init__(self, conf: ParserConfig) -> None:
         self.conf: ParserConfig = conf
 
     def parse(self) -> UastNode:
-        if not self.conf.code and not self.conf.file:
-            raise FileNotFoundError("Neither file nor code is provided!")
-        
-        if not self.conf.code:
-            with open(self.conf.file, 'r') as f:
-                self.conf.code = f.read()
+        if self.conf.nodes is not None:
+            if self.conf.lang != Language.C:
+                raise ValueError(f"Parsed nodes aren't supported for {self.conf.lang.name}")
+            return c_nodes_to_uast(nodes=self.conf.nodes)
 
+        self._read_code()
         if self.conf.lang == Language.C:
             return c_code_to_uast(code=self.conf.code)
         elif self.conf.lang == Language.CPL:
             return cpl_code_to_uast(code=self.conf.code)
         
         return None
+
+    def parse_parts(self) -> Iterator[UastNode]:
+        """Parse the code into consecutive UAST parts. C code is converted one top-level node
+        at a time (its pycparser AST is still built at once), other languages give the whole
+        UAST as one part. Translating the parts in order is the same as translating `parse()`.
+        """
+        if self.conf.nodes is not None:
+            if self.conf.lang != Language.C:
+                raise ValueError(f"Parsed nodes aren't supported for {self.conf.lang.name}")
+            yield from c_nodes_to_uast_parts(nodes=self.conf.nodes)
+            return
+
+        self._read_code()
+        if self.conf.lang == Language.C:
+            yield from c_code_to_uast_parts(code=self.conf.code)
+        else:
+            yield self.parse()
+
+    def _read_code(self) -> None:
+        if not self.conf.code and not self.conf.file:
+            raise FileNotFoundError("Neither file nor code is provided!")
+        
+        if not self.conf.code:
+            with open(self.conf.file, 'r') as f:
+                self.conf.code = f.read()
@@ -1,5 +1,11 @@
+from typing import NamedTuple
 from dataclasses import dataclass
 
+class SourceLocation(NamedTuple):
+    file: str # Source file name ("" for a code snippet)
+    line: int # 1-based line
+    col: int  # 1-based column
+
 @dataclass
 class Token:
     kind: str     = ""
@@ -8,6 +14,14 @@ class Token:
     col: int      = 0
     filename: str = ""
 
+    @property
+    def location(self) -> SourceLocation | None:
+        """Location of the token in the source, None if the token isn't from the source.
+        """
+        if not self.line:
+            return None
+        return SourceLocation(file=self.filename, line=self.line, col=self.col)
+
 class ScopeToken(Token):
     def __init__(self) -> None:
         self.kind  = "scope"
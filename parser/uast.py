@@ -1,5 +1,7 @@
 from __future__ import annotations
+import sys
 from enum import Enum
+from typing import Iterator, TextIO
 
 from abc import abstractmethod
 from parser.tokenizer import Token
@@ -20,24 +22,39 @@ class UastNode:
         return f"UastNode({self.token.value})"
 
     def uast_to_string(self, prefix: str = "", is_last: bool = True) -> str:
-        lines = []
+        return "\n".join(self.iter_uast_lines(prefix, is_last))
 
-        connector = "└── " if is_last else "├── "
-        lines.append(prefix + connector + str(self))
+    def iter_uast_lines(self, prefix: str = "", is_last: bool = True) -> Iterator[str]:
+        stack: list[tuple[UastNode, str, bool]] = [(self, prefix, is_last)]
 
-        child_prefix = prefix + ("    " if is_last else "│   ")
+        while stack:
+            node, prefix, is_last = stack.pop()
 
-        for i, child in enumerate(self.childs):
-            last = i == len(self.childs) - 1
-            lines.append(child.uast_to_string(child_prefix, last))
+            connector = "└── " if is_last else "├── "
+            yield prefix + connector + str(node)
 
-        return "\n".join(lines)
+            child_prefix = prefix + ("    " if is_last else "│   ")
 
-    def print_uast(root: UastNode) -> None:
-        print(str(root))
+            last = len(node.childs) - 1
+            for i in range(last, -1, -1):
+                stack.append((node.childs[i], child_prefix, i == last))
+
+    def write_uast(root: UastNode, out: TextIO) -> None:
+        """Write the tree to a stream line by line (the same text as `print_uast`).
+
+        Args:
+            out (TextIO): Output stream.
+        """
+        out.write(str(root))
+        out.write("\n")
         for i, child in enumerate(root.childs):
             last = i == len(root.childs) - 1
-            print(child.uast_to_string("", last))
+            for line in child.iter_uast_lines("", last):
+                out.write(line)
+                out.write("\n")
+
+    def print_uast(root: UastNode) -> None:
+        root.write_uast(sys.stdout)
 
 class FunctionNode(UastNode):
     def __init__(self, token: Token) -> None:
@@ -108,6 +125,11 @@ class SwitchNode(UastNode):
     def get_cond(self) -> UastNode:
         return self.childs[0]
         
+    def get_cases(self) -> list[UastNode]:
+        if len(self.childs) < 2:
+            return []
+        return self.childs[1].childs
+        
     def get_case(self, index: int) -> UastNode | None:
         cases: UastNode = self.childs[1]
         for i in cases.childs:
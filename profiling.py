@@ -0,0 +1,227 @@
+"""Common profiling support of the command line tools. Every tool accepts:
+    --profile <prefix>        Profile the run and write reports to <prefix>.*
+    --profile-mode <mode>     'cprofile' (default) or 'sample'
+    --profile-top <N>         How many functions / inputs to show in the summary (default 20)
+    --profile-interval <sec>  Sampling interval of the 'sample' mode (default 0.005)
+
+Reports:
+    <prefix>.pstats           cProfile stats (only in the 'cprofile' mode, see `python -m pstats`)
+    <prefix>.collapsed        Collapsed stacks ('a;b;c <weight>') for flamegraph.pl / speedscope
+    <prefix>.top.txt          Top N hottest functions and the slowest inputs
+"""
+import sys
+import time
+import pstats
+import cProfile
+import argparse
+import threading
+
+from pathlib import Path
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+@dataclass
+class ProfileConfig:
+    output: str             # Prefix of the report files
+    mode: str = "cprofile"  # 'cprofile' - deterministic profiling, 'sample' - stack sampling
+    top: int = 20           # Number of functions and inputs in the summary
+    interval: float = 0.005 # Sampling interval in seconds
+
+_inputs: list[tuple[str, float]] | None = None
+
+@contextmanager
+def track_input(name: str) -> Iterator[None]:
+    """Measure the processing time of one input (a test, a translation unit, an event...).
+    Does nothing, if the run isn't profiled.
+
+    Args:
+        name (str): Input name for the report.
+    """
+    if _inputs is None:
+        yield
+        return
+
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        _inputs.append((name, time.perf_counter() - start))
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", default=None, metavar="PREFIX", help="Profile the run, write reports to PREFIX.*")
+    parser.add_argument("--profile-mode", choices=("cprofile", "sample"), default="cprofile", help="Profiler kind")
+    parser.add_argument("--profile-top", type=int, default=20, help="Functions and inputs in the profile summary")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="Sampling interval, seconds")
+
+def pop_profile_arguments(argv: list[str]) -> tuple[ProfileConfig | None, list[str]]:
+    """Take profiling options out of the command line, so a tool parses the rest as before.
+    Arguments after '--' are left as they are.
+
+    Args:
+        argv (list[str]): Command line (sys.argv).
+
+    Returns:
+        tuple[ProfileConfig | None, list[str]]: Profiling configuration (None if there is no
+            --profile option) and the command line without profiling options.
+    """
+    end: int = argv.index("--") if "--" in argv else len(argv)
+
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    add_profile_arguments(parser)
+    args, rest = parser.parse_known_args(argv[1:end])
+
+    config: ProfileConfig | None = None
+    if args.profile:
+        config = ProfileConfig(
+            output=args.profile, mode=args.profile_mode,
+            top=args.profile_top, interval=args.profile_interval
+        )
+
+    return config, argv[:1] + rest + argv[end:]
+
+def run_profiled(config: ProfileConfig | None, main: Callable[[], Any]) -> Any:
+    """Run an entry point. With a configuration, the run is profiled and reports are written
+    even if the entry point exits with SystemExit or an error.
+
+    Args:
+        config (ProfileConfig | None): Profiling configuration or None.
+        main (Callable[[], Any]): Entry point.
+
+    Returns:
+        Any: Result of the entry point.
+    """
+    global _inputs
+    if config is None:
+        return main()
+
+    _inputs = []
+    Path(config.output).parent.mkdir(parents=True, exist_ok=True)
+    profiler = _Sampler(config.interval) if config.mode == "sample" else cProfile.Profile()
+
+    profiler.enable()
+    try:
+        return main()
+    finally:
+        profiler.disable()
+        inputs, _inputs = _inputs, None
+        if isinstance(profiler, _Sampler):
+            _write_sampled(profiler, inputs, config)
+        else:
+            _write_cprofile(profiler, inputs, config)
+
+        print(f"[PROFILE] reports are written to {config.output}.*", file=sys.stderr)
+
+def _frame_name(filename: str, line: int, name: str) -> str:
+    return f"{name} ({Path(filename).name}:{line})"
+
+class _Sampler:
+    """Stack sampler of the thread which has started it.
+    """
+    def __init__(self, interval: float) -> None:
+        self.interval: float = interval
+        self.stacks: dict[tuple[str, ...], int] = {}
+        self.samples: int = 0
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target: int = 0
+        self._switch: float = 0.0
+
+    def enable(self) -> None:
+        # The sampler can look at the other thread only when it holds the GIL. With the default
+        # switch interval (5ms) it gets the GIL mostly on I/O, so samples would be biased to I/O.
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self.interval / 5))
+        self._target = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        sys.setswitchinterval(self._switch)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(_frame_name(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+
+            key: tuple[str, ...] = tuple(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+def _write_sampled(sampler: _Sampler, inputs: list[tuple[str, float]], config: ProfileConfig) -> None:
+    with open(f"{config.output}.collapsed", "w", encoding="utf-8") as f:
+        for stack, count in sorted(sampler.stacks.items()):
+            f.write(f"{';'.join(stack)} {count}\n")
+
+    own: dict[str, int] = {}
+    total: dict[str, int] = {}
+    for stack, count in sampler.stacks.items():
+        if stack:
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+        for name in set(stack):
+            total[name] = total.get(name, 0) + count
+
+    lines: list[str] = [ f"samples: {sampler.samples} (interval {config.interval}s)", "", "hottest functions (own samples, total samples):" ]
+    for name, count in sorted(own.items(), key=lambda item: item[1], reverse=True)[:config.top]:
+        lines.append(f"  {count:>8} {total[name]:>8}  {name}")
+
+    _write_summary(config, lines, inputs)
+
+def _write_cprofile(profiler: cProfile.Profile, inputs: list[tuple[str, float]], config: ProfileConfig) -> None:
+    profiler.dump_stats(f"{config.output}.pstats")
+    stats = pstats.Stats(profiler).stats
+
+    with open(f"{config.output}.collapsed", "w", encoding="utf-8") as f:
+        for stack, weight in _collapse_call_graph(stats):
+            f.write(f"{';'.join(_frame_name(*func) for func in stack)} {weight}\n")
+
+    lines: list[str] = [ "hottest functions (own seconds, total seconds, calls):" ]
+    by_own = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+    for func, (_, calls, own, cumulative, _) in by_own[:config.top]:
+        lines.append(f"  {own:>10.4f} {cumulative:>10.4f} {calls:>10}  {_frame_name(*func)}")
+
+    _write_summary(config, lines, inputs)
+
+def _collapse_call_graph(stats: dict) -> Iterator[tuple[tuple, int]]:
+    """cProfile keeps caller -> callee edges only, not whole stacks. Stacks are rebuilt
+    by walking from the roots and splitting the time of a function between its callees
+    in proportion of the edge times (as flameprof does). Weights are in microseconds.
+    """
+    callees: dict[tuple, list[tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    roots: list[tuple] = [ func for func, entry in stats.items() if not entry[4] ]
+    threshold: float = sum(stats[root][3] for root in roots) * 1e-4
+
+    stack: list[tuple[tuple, tuple, float]] = [ (root, (root,), stats[root][3]) for root in roots ]
+    while stack:
+        func, path, time_ = stack.pop()
+        own, cumulative = stats[func][2], stats[func][3]
+        share: float = time_ / cumulative if cumulative > 0 else 0.0
+
+        weight: int = int(own * share * 1e6)
+        if weight > 0:
+            yield path, weight
+
+        for callee, edge_time in callees.get(func, []):
+            child_time: float = edge_time * share
+            if callee not in path and child_time >= threshold:
+                stack.append((callee, path + (callee,), child_time))
+
+def _write_summary(config: ProfileConfig, lines: list[str], inputs: list[tuple[str, float]]) -> None:
+    lines.append("")
+    lines.append(f"slowest inputs ({len(inputs)} total, {sum(t for _, t in inputs):.3f}s):")
+    for name, seconds in sorted(inputs, key=lambda item: item[1], reverse=True)[:config.top]:
+        lines.append(f"  {seconds:>10.4f}  {name}")
+
+    with open(f"{config.output}.top.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
@@ -3,23 +3,61 @@ from __future__ import annotations
 
 import argparse
 import difflib
+import hashlib
 import io
+import json
 import sys
-from contextlib import redirect_stdout
+import time
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterator
+
+from pycparser import c_ast
 
 from parser.parser import Parser, ParserConfig, Language
-from analysis.analyzer import ProgramAnalysis
+from parser.c.pyc_to_uast import get_cparser
+from parser.c.pyc_lazy import LazyTranslationUnit
+from parser.c.pyc_prefix import HeaderPrefixCache
+from ir.translate import Translator, TranslatorConfig
+from ir.cfg.features import FeatureConfig
+from analysis.analyzer import ProgramAnalysis, iter_functions
+from analysis.batch import AnalysisPool, AnalysisResult, analyze_many
+from analysis.cache import AnalysisCache, analyzer_version
+from inline_scrapper.funcextractor import ExtractorConfig, ExtractorSession
+from profiling import pop_profile_arguments, run_profiled, track_input
 
 SUPPORTED_EXTENSIONS = {".cpl", ".c", ".cpp"}
 
+# Keys of the test configuration ('/* CONFIG ... */' in C, ': CONFIG ... :' in CPL), one 'key = value' per line:
+#   nest                                          Nest the first 'if' of the C code this many times (see `nest_if`),
+#                                                 compare sizes of its UAST and IR
+#   jump_tables, direct_cfg, jobs                 ProgramAnalysis / TranslatorConfig options
+#   horizon_blocks, horizon_instrs, features      FeatureConfig options (features are comma-separated)
+#   format                                        Output format (golden or json)
+#   call_graph                                    Append callers, call sites and recursion of every function
+#   interproc                                     Append interprocedural information of every function
+#   stream                                        Analyze function by function with iter_functions (no IR text)
+#   cache                                         Analyze through an AnalysisCache twice, then from its directory
+#   batch                                         Analyze '//@ <name>' parts with analyze_many (with `jobs` processes)
+#   frontend                                      lazy, prefix or session: how the C code is parsed, see `frontend_nodes`
+#   find                                          Functions to take in the lazy frontend, queries of the session frontend
+#   max_asts, lazy_bodies, share_header_prefix    ExtractorSession options of the session frontend
+CONFIG_KEYS = {
+    "nest", "jump_tables", "direct_cfg", "jobs", "horizon_blocks", "horizon_instrs", "features",
+    "format", "call_graph", "interproc", "stream", "cache", "batch", "frontend", "find", "max_asts",
+    "lazy_bodies", "share_header_prefix"
+}
+
 @dataclass
 class TestCase:
     path: Path
     lang: Language
     code: str
     expected: str
+    config: dict[str, str] # Test configuration (see CONFIG_KEYS)
 
 def detect_language(path: Path) -> Language:
     return Language.C if path.suffix.lower() in {".c", ".cpp"} else Language.CPL
@@ -27,6 +65,47 @@ def detect_language(path: Path) -> Language:
 def normalize_text(text: str) -> str:
     return text.replace("\r\n", "\n").replace("\r", "\n").strip()
 
+def parse_config(text: str) -> dict[str, str]:
+    config: dict[str, str] = {}
+    for line in text.split("\n"):
+        if not line.strip():
+            continue
+
+        key, sep, value = line.partition("=")
+        key = key.strip()
+        if not sep or key not in CONFIG_KEYS:
+            raise ValueError(f"Bad config line: {line.strip()}")
+        config[key] = value.strip()
+    return config
+
+def extract_cpl_config(text: str) -> tuple[str, dict[str, str]]:
+    # ': CONFIG' ... ':' section, removed from the code
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    start_idx = next((i for i, line in enumerate(lines) if line.strip() == ": CONFIG"), None)
+    if start_idx is None:
+        return text, {}
+
+    end_idx = next((i for i in range(start_idx + 1, len(lines)) if lines[i].strip() == ":"), None)
+    if end_idx is None:
+        raise ValueError("Expected ':' at the end of the config!")
+
+    config = parse_config("\n".join(lines[start_idx + 1:end_idx]))
+    return "\n".join(lines[:start_idx] + lines[end_idx + 1:]), config
+
+def extract_c_like_config(text: str) -> tuple[str, dict[str, str]]:
+    # '/* CONFIG ... */' comment, removed from the code
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    start = text.find("/* CONFIG")
+    if start == -1:
+        return text, {}
+
+    end = text.find("*/", start)
+    if end == -1:
+        raise ValueError("Comment isn't closed /* ... */")
+
+    config = parse_config(text[start + len("/* CONFIG"):end])
+    return text[:start] + text[end + 2:], config
+
 def extract_cpl_sections(text: str) -> tuple[str, str]:
     text = text.replace("\r\n", "\n").replace("\r", "\n")
     lines = text.split("\n")
@@ -84,8 +163,10 @@ def extract_test_case(path: Path) -> TestCase:
     lang = detect_language(path)
 
     if lang == Language.CPL:
+        raw, config = extract_cpl_config(raw)
         code, expected = extract_cpl_sections(raw)
     else:
+        raw, config = extract_c_like_config(raw)
         code, expected = extract_c_like_sections(raw)
 
     return TestCase(
@@ -93,27 +174,219 @@ def extract_test_case(path: Path) -> TestCase:
         lang=lang,
         code=normalize_text(code),
         expected=normalize_text(expected),
+        config=config
     )
 
-def build_analysis_output(code: str, lang: Language) -> str:
-    analyzer = ProgramAnalysis(
-        parser=Parser(
-            conf=ParserConfig(
-                code=code,
-                lang=lang,
+def _flag(config: dict[str, str], key: str) -> bool:
+    return config.get(key, "false").lower() in ("1", "true", "yes")
+
+def _int(config: dict[str, str], key: str) -> int | None:
+    return int(config[key]) if key in config else None
+
+def _names(config: dict[str, str], key: str) -> list[str]:
+    return [ name.strip() for name in config.get(key, "").split(",") if name.strip() ]
+
+def nest_if(code: str, depth: int) -> list[c_ast.Node]:
+    """Parse C code and put `depth` copies of the first 'if' statement of the first function
+    into each other's else branch. The AST is built directly: pycparser itself can't parse
+    such deep nesting.
+
+    Returns:
+        list[c_ast.Node]: Top-level nodes of the code.
+    """
+    ast = get_cparser().parse(code, "test.c")
+    body = next(node for node in ast.ext if isinstance(node, c_ast.FuncDef)).body
+    i, stmt = next((i, item) for i, item in enumerate(body.block_items) if isinstance(item, c_ast.If))
+    chain = stmt.iffalse
+    for _ in range(depth):
+        chain = c_ast.If(stmt.cond, stmt.iftrue, chain, stmt.coord)
+    body.block_items[i] = chain
+    return ast.ext
+
+def build_nested_output(code: str, depth: int) -> str:
+    # The UAST and the IR of the chain are too long for a golden file, only their sizes are compared
+    uast = Parser(conf=ParserConfig(nodes=nest_if(code, depth), lang=Language.C)).parse()
+    uast_nodes, stack = 0, [uast]
+    while stack:
+        node = stack.pop()
+        uast_nodes += 1
+        stack.extend(node.childs)
+
+    ir_blocks = len(Translator(uast).translate())
+    return f"nest={depth}, uast_nodes={uast_nodes}, ir_blocks={ir_blocks}"
+
+def split_parts(code: str) -> list[tuple[str, str]]:
+    """Split the code at '//@ <name>' lines into named parts (files of a project, batch inputs).
+    """
+    parts: list[tuple[str, list[str]]] = []
+    for line in code.split("\n"):
+        if line.startswith("//@"):
+            parts.append((line[3:].strip(), []))
+        elif parts:
+            parts[-1][1].append(line)
+    return [ (name, "\n".join(lines).strip() + "\n") for name, lines in parts ]
+
+def frontend_nodes(code: str, config: dict[str, str]) -> tuple[list[c_ast.Node], list[str]]:
+    """Parse C code by another frontend than `Parser`:
+        lazy     LazyTranslationUnit of the code; the `find` functions (all definitions by default)
+        prefix   Every '//@' part (a preprocessed unit) parsed with one HeaderPrefixCache; their definitions
+        session  '//@' parts are files of a project (with '$ROOT' replaced by its directory), `find`
+                 queries ('name' - find_function, '@file' - file_ast) go to an ExtractorSession;
+                 found definitions (a 'compile_commands.json' part gives the flags of files)
+
+    Returns:
+        tuple[list[c_ast.Node], list[str]]: Nodes to analyze and lines about the frontend to append.
+    """
+    frontend = config["frontend"]
+    if frontend == "lazy":
+        unit = LazyTranslationUnit(code, "test.c")
+        names = _names(config, "find")
+        nodes = [ unit.function(name) for name in names ] if names else unit.definitions()
+        return nodes, [ f"lazy={unit.lazy}, functions={list(unit.functions)}, parsed_bodies={unit.parsed_bodies}" ]
+
+    if frontend == "prefix":
+        prefixes = HeaderPrefixCache()
+        nodes = [
+            node for name, text in split_parts(code)
+            for node in prefixes.parse(text, name).ext if isinstance(node, c_ast.FuncDef)
+        ]
+        return nodes, [ f"prefix hits={prefixes.hits}, misses={prefixes.misses}" ]
+
+    if frontend == "session":
+        return _session_nodes(code, config)
+    raise ValueError(f"Unknown frontend: {frontend}")
+
+def _session_nodes(code: str, config: dict[str, str]) -> tuple[list[c_ast.Node], list[str]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp).resolve()
+        for name, text in split_parts(code):
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text(text.replace("$ROOT", str(root)), encoding="utf-8")
+        (root / "fakelibc").mkdir()
+
+        commands = root / "compile_commands.json"
+        session = ExtractorSession(
+            ExtractorConfig(
+                fake_libc_path=root / "fakelibc",
+                lazy_bodies=_flag(config, "lazy_bodies"),
+                share_header_prefix=_flag(config, "share_header_prefix"),
+                compile_commands=commands if commands.exists() else None
+            ),
+            max_asts=_int(config, "max_asts")
+        )
+
+        nodes: list[c_ast.Node] = []
+        lines: list[str] = []
+        for query in _names(config, "find"):
+            if query.startswith("@"):
+                ast = session.file_ast(root / query[1:], root)
+                found = "-" if ast is None else f"{len(ast.ext)} nodes"
+            else:
+                node, path = session.find_function(root, query)
+                found = "-" if node is None else f"{path.relative_to(root)}:{node.coord.line}"
+                if node is not None and all(n is not node for n in nodes):
+                    nodes.append(node)
+            lines.append(f"find {query}: {found}, parsed_files={session.parsed_files}")
+
+        for name, _ in split_parts(code):
+            flags = session.compile_flags(root / name)
+            if flags is not None:
+                lines.append(f"flags {name}: {[ flag.replace(str(root), '$ROOT') for flag in flags ]}")
+        return nodes, lines
+
+def build_batch_output(code: str, lang: Language, config: dict[str, str]) -> str:
+    inputs = [ (text, lang) for _, text in split_parts(code) ]
+    jobs: int = _int(config, "jobs") or 1
+    results: list[AnalysisResult]
+    if jobs > 1:
+        # Not the shared pools of analyze_many: a process with live pools doesn't exit (tests may run in a pool)
+        with AnalysisPool(jobs) as pool:
+            results = pool.analyze_many(inputs)
+    else:
+        results = analyze_many(inputs)
+
+    out: list[str] = []
+    for result in results:
+        out.append(f"source={result.source}, ok={result.ok}" + (f", error={result.error}" if result.error else ""))
+        if result.ok:
+            out.append(normalize_text(result.analysis.to_bytes().decode("utf-8")))
+    return "\n".join(out)
+
+def build_stream_output(code: str, lang: Language, translator_conf: TranslatorConfig) -> str:
+    # Calls and information of every function, in the golden format
+    out: list[str] = []
+    for func in iter_functions(Parser(conf=ParserConfig(code=code, lang=lang)), translator_conf):
+        out.extend(repr(call.dump_to_json()) for call in func.calls())
+        out.append(f"function={func.name}, info={func.dump_to_json()}")
+    return "\n".join(out)
+
+def build_analysis_output(
+    code: str,
+    lang: Language,
+    cache: AnalysisCache | None = None,
+    config: dict[str, str] | None = None
+) -> str:
+    config = config or {}
+    if "nest" in config:
+        return build_nested_output(code, _int(config, "nest"))
+
+    if _flag(config, "batch"):
+        return normalize_text(build_batch_output(code, lang, config))
+
+    translator_conf = TranslatorConfig(jump_tables=_flag(config, "jump_tables"))
+    if _flag(config, "stream"):
+        return normalize_text(build_stream_output(code, lang, translator_conf))
+
+    trailer: list[str] = []
+    if _flag(config, "cache"):
+        analyzer, trailer = _cached_analysis(code, lang, translator_conf)
+    elif cache is not None and not config:
+        analyzer = cache.analyze(code=code, lang=lang)
+    else:
+        parser_conf = ParserConfig(code=code, lang=lang)
+        if "frontend" in config:
+            nodes, trailer = frontend_nodes(code, config)
+            parser_conf = ParserConfig(nodes=nodes, lang=Language.C)
+
+        analyzer = ProgramAnalysis(
+            parser=Parser(conf=parser_conf),
+            translator_conf=translator_conf,
+            direct_cfg=_flag(config, "direct_cfg"),
+            jobs=_int(config, "jobs") or 1,
+            feature_conf=FeatureConfig(
+                horizon_blocks=_int(config, "horizon_blocks"),
+                horizon_instrs=_int(config, "horizon_instrs"),
+                features=tuple(_names(config, "features")) or None
             )
         )
-    )
 
-    buf = io.StringIO()
-    with redirect_stdout(buf):
-        analyzer.print_ir()
-        for call in analyzer.all_calls():
-            print(call.dump_to_json())
-        for name, data in analyzer.functions.items():
-            print(f"function={name}, info={data.dump_to_json()}")
+    if _flag(config, "call_graph"):
+        for name in analyzer.functions:
+            trailer.append(
+                f"function={name}, callers={list(analyzer.callers_of(name))}, "
+                f"calls={len(analyzer.call_graph.calls_of(name))}, recursive={analyzer.call_graph.is_recursive(name)}"
+            )
+    if _flag(config, "interproc"):
+        for name, func in analyzer.functions.items():
+            trailer.append(f"function={name}, interproc={func.interproc.dump_to_json()}")
 
-    return normalize_text(buf.getvalue())
+    buf = io.StringIO()
+    analyzer.write(buf, config.get("format", "golden"))
+    return normalize_text("\n".join([ buf.getvalue().rstrip("\n"), *trailer ]))
+
+def _cached_analysis(code: str, lang: Language, translator_conf: TranslatorConfig) -> tuple[ProgramAnalysis, list[str]]:
+    # Analyzed, taken from the memory, then loaded by another cache from the same directory
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisCache(directory=tmp)
+        first = cache.analyze(code=code, lang=lang, translator_conf=translator_conf)
+        second = cache.analyze(code=code, lang=lang, translator_conf=translator_conf)
+        disk = AnalysisCache(directory=tmp)
+        loaded = disk.analyze(code=code, lang=lang, translator_conf=translator_conf)
+
+    return loaded, [
+        f"cache hits={cache.hits}, misses={cache.misses}, same={first is second}",
+        f"disk hits={disk.hits}, misses={disk.misses}, same_output={first.to_bytes() == loaded.to_bytes()}"
+    ]
 
 def make_diff(expected: str, actual: str, filename: str) -> str:
     diff = difflib.unified_diff(
@@ -131,26 +404,105 @@ def iter_source_files(root: Path) -> list[Path]:
         if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS
     )
 
-def run_test(path: Path) -> bool:
+@dataclass
+class TestResult:
+    path: Path
+    status: str             # OK, FAIL, ERROR or SKIP
+    details: str = ""       # Diff or error message
+    wall: float = 0.0       # Seconds
+    peak: int | None = None # tracemalloc peak in bytes (with --memory)
+
+def run_test(path: Path, cache_dir: Path | None = None, memory: bool = False) -> TestResult:
+    cache = AnalysisCache(directory=cache_dir) if cache_dir else None
+
+    # Tracing slows the analysis down several times, so it isn't on while the wall time is measured
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
     try:
         case = extract_test_case(path)
-        actual = build_analysis_output(case.code, case.lang)
+        actual = build_analysis_output(case.code, case.lang, cache, case.config)
     except Exception as e:
-        print(f"[ERROR] {path}: {e}")
-        return False
+        return TestResult(path=path, status="ERROR", details=str(e))
+    finally:
+        wall = time.perf_counter() - start
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
 
     if case.expected == actual:
-        print(f"[OK]   {path}")
-        return True
+        return TestResult(path=path, status="OK", wall=wall, peak=peak)
+
+    return TestResult(
+        path=path, status="FAIL", wall=wall, peak=peak,
+        details=make_diff(case.expected, actual, str(path))
+    )
+
+def _format_peak(peak: int | None) -> str:
+    return f"{'-':>8}  " if peak is None else f"{peak / 1e6:>8.2f}MB"
+
+def print_result(result: TestResult) -> None:
+    if result.status == "ERROR":
+        print(f"[ERROR] {result.path}: {result.details}")
+        return
+    if result.status == "SKIP":
+        print(f"[SKIP] {'-':>9} {'-':>10}  {result.path}")
+        return
 
-    print(f"[FAIL] {path}")
-    print(make_diff(case.expected, actual, str(path)))
-    print()
-    return False
+    print(f"[{result.status}]{' ' * (5 - len(result.status))}{result.wall:>8.3f}s {_format_peak(result.peak)}  {result.path}")
+    if result.status == "FAIL":
+        print(result.details)
+        print()
+
+def tester_version() -> str:
+    """Hash of the analyzer sources and of this script. Results of the unchanged
+    tests are reused only while this version is the same.
+    """
+    return hashlib.sha256((analyzer_version() + hashlib.sha256(Path(__file__).read_bytes()).hexdigest()).encode()).hexdigest()
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def load_state(path: Path, version: str) -> dict[str, str]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+    if state.get("version") != version:
+        return {}
+    return state.get("passed", {})
+
+def save_state(path: Path, version: str, passed: dict[str, str]) -> None:
+    path.write_text(json.dumps({ "version": version, "passed": passed }, indent=2), encoding="utf-8")
+
+def default_state_path(folder: Path) -> Path:
+    """State file of a tested folder, in the temporary directory (not in the tested folder).
+    """
+    digest = hashlib.sha256(str(folder.resolve()).encode()).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"tester-state-{digest}.json"
+
+def iter_results(files: list[Path], jobs: int, cache_dir: Path | None, memory: bool = False) -> Iterator[TestResult]:
+    if jobs <= 1:
+        for path in files:
+            with track_input(str(path)):
+                result = run_test(path, cache_dir, memory)
+            yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(run_test, files, [ cache_dir ] * len(files), [ memory ] * len(files))
 
 def main() -> int:
     argp = argparse.ArgumentParser()
     argp.add_argument("folder", type=Path)
+    argp.add_argument("--cache", type=Path, default=None, help="Directory for cached analysis results")
+    argp.add_argument("--jobs", "-j", type=int, default=1, help="Run tests in N processes")
+    argp.add_argument("--changed", action="store_true", help="Skip tests which passed with the same input and analyzer sources")
+    argp.add_argument("--state", type=Path, default=None, help="State file of --changed (default: a file in the temporary directory)")
+    argp.add_argument("--slowest", type=int, default=0, metavar="K", help="Print K slowest tests")
+    argp.add_argument("--memory", action="store_true", help="Measure peak memory of every test (slows the tests down)")
     args = argp.parse_args()
 
     if not args.folder.exists():
@@ -165,18 +517,48 @@ def main() -> int:
         print("There is no .cpl/.c/.cpp files")
         return 0
 
-    passed = 0
+    # The state is read and written only when it's asked for
+    use_state: bool = args.changed or args.state is not None
+    state_path: Path = args.state or default_state_path(args.folder)
+    version: str = tester_version() if use_state else ""
+    hashes: dict[str, str] = { str(path): file_hash(path) for path in files } if use_state else {}
+
+    to_run: list[Path] = files
+    if args.changed:
+        passed_before: dict[str, str] = load_state(state_path, version)
+        to_run = [ path for path in files if passed_before.get(str(path)) != hashes[str(path)] ]
+
+    pending: set[Path] = set(to_run)
+    results: dict[Path, TestResult] = {}
+    ran = iter_results(to_run, args.jobs, args.cache, args.memory)
     for path in files:
-        if run_test(path):
-            passed += 1
+        results[path] = next(ran) if path in pending else TestResult(path=path, status="SKIP")
+        print_result(results[path])
+
+    if use_state:
+        passed_now: dict[str, str] = {}
+        for path, result in results.items():
+            if result.status in ("OK", "SKIP"):
+                passed_now[str(path)] = hashes[str(path)]
+        save_state(state_path, version, passed_now)
 
     total = len(files)
-    failed = total - passed
+    skipped = sum(1 for r in results.values() if r.status == "SKIP")
+    passed = sum(1 for r in results.values() if r.status == "OK")
+    failed = total - passed - skipped
+
+    if args.slowest > 0:
+        timed = sorted((r for r in results.values() if r.status != "SKIP"), key=lambda r: r.wall, reverse=True)
+        print("-" * 60)
+        print(f"SLOWEST {min(args.slowest, len(timed))}:")
+        for result in timed[:args.slowest]:
+            print(f"  {result.wall:>8.3f}s {_format_peak(result.peak)}  {result.path}")
 
     print("-" * 60)
-    print(f"TOTAL: {total}, PASSED: {passed}, FAILED: {failed}")
+    print(f"TOTAL: {total}, PASSED: {passed}, FAILED: {failed}" + (f", SKIPPED: {skipped}" if skipped else ""))
 
     return 0 if failed == 0 else 1
 
 if __name__ == "__main__":
-    raise SystemExit(main())
+    profile, sys.argv = pop_profile_arguments(sys.argv)
+    raise SystemExit(run_profiled(profile, main))
@@ -0,0 +1,52 @@
+/* CONFIG
+batch = true
+jobs = 2
+*/
+//@ good
+int one(void) {
+    return 1;
+}
+
+int main(void) {
+    return one();
+}
+//@ broken
+int main( {
+//@ also good
+int main(int x) {
+    while (x) x = x - 1;
+    return x;
+}
+
+/* OUTPUT
+source=<input 0>, ok=True
+[0] define function(one) { 
+    }
+[1] stop 
+[2] function_end 
+[3] define function(main) { 
+[4]     call function(one)() 
+    }
+[5] stop 
+[6] function_end 
+{'owner': 'main', 'block_id': 1, 'action': 'fcall', 'called_function': 'one', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=one, info={'name': 'one', 'info': {'bb_count': 1, 'ir_count': 3, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': True, 'funccalls': 1, 'syscalls': 0}}
+source=<input 1>, ok=False, error=ParseError: :1:11: before: {
+source=<input 2>, ok=True
+[ 0] define function(main) { 
+[ 1]     lb0: 
+[ 2]     loop untill { 
+[ 3]         if, true: lb1, else: lb2) { 
+[ 4]             lb1: 
+[ 5]             some operation 
+[ 6]             some operation 
+[ 7]             jump to lb0 
+[ 8]             lb2: 
+             }
+[ 9]         stop 
+         }
+[10]     function_end 
+     }
+function=main, info={'name': 'main', 'info': {'bb_count': 3, 'ir_count': 13, 'is_start': True, 'funccalls': 0, 'syscalls': 0}}
+*/
@@ -0,0 +1,49 @@
+/* CONFIG
+cache = true
+*/
+int leaf(int x) {
+    return x;
+}
+
+int main(int x) {
+    while (x) {
+        x = leaf(x) - 1;
+        if (x == 5) break;
+    }
+    return leaf(x);
+}
+
+/* OUTPUT
+[ 0] define function(leaf) { 
+     }
+[ 1] stop 
+[ 2] function_end 
+[ 3] define function(main) { 
+[ 4]     lb0: 
+[ 5]     loop untill { 
+[ 6]         if, true: lb1, else: lb2) { 
+[ 7]             lb1: 
+[ 8]             call function(leaf)() 
+[ 9]             some operation 
+[10]             some operation 
+[11]             if, true: lb3, else: lb4) { 
+[12]                 some operation 
+[13]                 lb3: 
+[14]                 break 
+[15]                 jump to lb2 
+[16]                 jump to lb0 
+[17]                 lb2: 
+[18]                 call function(leaf)() 
+                 }
+[19]             stop 
+             }
+[20]         function_end 
+         }
+     }
+{'owner': 'main', 'block_id': 2, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 6}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 6, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=leaf, info={'name': 'leaf', 'info': {'bb_count': 1, 'ir_count': 3, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 6, 'ir_count': 23, 'is_start': True, 'funccalls': 2, 'syscalls': 0}}
+cache hits=1, misses=1, same=True
+disk hits=1, misses=0, same_output=True
+*/
@@ -0,0 +1,76 @@
+/* CONFIG
+call_graph = true
+interproc = true
+*/
+int leaf(int x) {
+    return x + 1;
+}
+
+int ping(int x);
+
+int pong(int x) {
+    if (x > 0) return ping(x - 1);
+    return leaf(x);
+}
+
+int ping(int x) {
+    return pong(leaf(x));
+}
+
+int main(int x) {
+    write(1, 0, 0);
+    return ping(x) + leaf(x);
+}
+
+/* OUTPUT
+[ 0] define function(leaf) { 
+[ 1]     some operation 
+     }
+[ 2] stop 
+[ 3] function_end 
+[ 4] declaration(operation(int())) 
+[ 5] define function(pong) { 
+[ 6]     if, true: lb0, else: lb1) { 
+[ 7]         some operation 
+[ 8]         lb0: 
+[ 9]         some operation 
+[10]         call function(ping)() 
+         }
+[11]     stop 
+[12]     call function(leaf)() 
+     }
+[13] stop 
+[14] function_end 
+[15] define function(ping) { 
+[16]     call function(leaf)() 
+[17]     call function(pong)() 
+     }
+[18] stop 
+[19] function_end 
+[20] define function(main) { 
+[21]     syscall 
+[22]     call function(ping)() 
+[23]     call function(leaf)() 
+[24]     some operation 
+     }
+[25] stop 
+[26] function_end 
+{'owner': 'pong', 'block_id': 3, 'action': 'fcall', 'called_function': 'ping', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'pong', 'block_id': 3, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'ping', 'block_id': 4, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': False, 'same_inst_after': 1, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'ping', 'block_id': 4, 'action': 'fcall', 'called_function': 'pong', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 1, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 5, 'action': 'fcall', 'called_function': 'ping', 'instruction_info': {'is_dom': False, 'same_inst_after': 1, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 5, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 1, 'near_break': -1}, 'loop_info': {}}
+function=leaf, info={'name': 'leaf', 'info': {'bb_count': 1, 'ir_count': 5, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=pong, info={'name': 'pong', 'info': {'bb_count': 3, 'ir_count': 12, 'is_start': False, 'funccalls': 2, 'syscalls': 0}}
+function=ping, info={'name': 'ping', 'info': {'bb_count': 1, 'ir_count': 5, 'is_start': False, 'funccalls': 2, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 1, 'ir_count': 7, 'is_start': True, 'funccalls': 3, 'syscalls': 1}}
+function=leaf, callers=['pong', 'ping', 'main'], calls=3, recursive=False
+function=pong, callers=['ping'], calls=1, recursive=True
+function=ping, callers=['pong', 'main'], calls=2, recursive=True
+function=main, callers=[], calls=0, recursive=False
+function=leaf, interproc={'transitive_bb_count': 1, 'transitive_ir_count': 5, 'reachable_functions': 0, 'call_depth': 0, 'is_recursive': False, 'reaches_recursion': False, 'reachable_syscalls': 0}
+function=pong, interproc={'transitive_bb_count': 5, 'transitive_ir_count': 22, 'reachable_functions': 2, 'call_depth': 1, 'is_recursive': True, 'reaches_recursion': True, 'reachable_syscalls': 0}
+function=ping, interproc={'transitive_bb_count': 5, 'transitive_ir_count': 22, 'reachable_functions': 2, 'call_depth': 1, 'is_recursive': True, 'reaches_recursion': True, 'reachable_syscalls': 0}
+function=main, interproc={'transitive_bb_count': 6, 'transitive_ir_count': 29, 'reachable_functions': 3, 'call_depth': 2, 'is_recursive': False, 'reaches_recursion': True, 'reachable_syscalls': 1}
+*/
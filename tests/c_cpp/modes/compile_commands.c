@@ -0,0 +1,38 @@
+/* CONFIG
+frontend = session
+find = pick
+*/
+//@ src/pick.c
+#include "conf.h"
+
+int pick(int x) {
+#ifdef FAST
+    return fast_path(x);
+#else
+    return slow_path(x);
+#endif
+}
+//@ inc/conf.h
+#define LIMIT 8
+int fast_path(int x);
+int slow_path(int x);
+//@ compile_commands.json
+[
+    {
+        "directory": "$ROOT/build",
+        "command": "cc -c -O2 -DFAST -I../inc -Wall -o pick.o ../src/pick.c",
+        "file": "../src/pick.c"
+    }
+]
+
+/* OUTPUT
+[0] define function(pick) { 
+[1]     call function(fast_path)() 
+    }
+[2] stop 
+[3] function_end 
+{'owner': 'pick', 'block_id': 0, 'action': 'fcall', 'called_function': 'fast_path', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=pick, info={'name': 'pick', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+find pick: src/pick.c:3, parsed_files=1
+flags src/pick.c: ['-DFAST', '-I$ROOT/inc']
+*/
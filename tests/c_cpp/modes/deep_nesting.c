@@ -0,0 +1,12 @@
+/* CONFIG
+nest = 5000
+*/
+int pick(int x) {
+    if (x == 1) x = 2;
+    else x = 3;
+    return x;
+}
+
+/* OUTPUT
+nest=5000, uast_nodes=40010, ir_blocks=25004
+*/
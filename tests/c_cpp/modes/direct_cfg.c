@@ -0,0 +1,84 @@
+/* CONFIG
+direct_cfg = true
+*/
+int twice(int x) {
+    return x * 2;
+}
+
+int main(int x) {
+    int i;
+    for (i = 0; i < x; i++) {
+        if (i > 10) break;
+        x = twice(x);
+    }
+    while (x > 100) x = twice(x) - 300;
+    return x;
+}
+
+/* OUTPUT
+[ 0] define function(twice) { 
+
+         ===== BB0 =====
+[ 2]     some operation 
+     }
+[ 3] stop 
+[ 4] function_end 
+[ 5] define function(main) { 
+
+         ===== BB1 =====
+[ 7]     declaration(operation(int)) 
+
+         ===== BB2 =====
+[ 9]     lb0: 
+[10]     loop untill { 
+[11]         some operation 
+[12]         if, true: lb1, else: lb2) { 
+
+                 ===== BB3 =====
+[14]             lb1: 
+[15]             if, true: lb3, else: lb4) { 
+
+                     ===== BB4 =====
+[17]                 some operation 
+
+                     ===== BB5 =====
+[19]                 lb3: 
+[20]                 break 
+[21]                 jump to lb2 
+
+                     ===== BB6 =====
+[23]                 call function(twice)() 
+[24]                 some operation 
+[25]                 jump to lb0 
+
+                     ===== BB7 =====
+[27]                 lb2: 
+
+                     ===== BB8 =====
+[29]                 lb5: 
+[30]                 loop untill { 
+[31]                     some operation 
+[32]                     if, true: lb6, else: lb7) { 
+
+                             ===== BB9 =====
+[34]                         lb6: 
+[35]                         call function(twice)() 
+[36]                         some operation 
+[37]                         some operation 
+[38]                         jump to lb5 
+
+                             ===== BB10 =====
+[40]                         lb7: 
+                         }
+[41]                     stop 
+                     }
+[42]                 function_end 
+                 }
+             }
+         }
+     }
+{'owner': 'main', 'block_id': 6, 'action': 'fcall', 'called_function': 'twice', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 12}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 9, 'action': 'fcall', 'called_function': 'twice', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {'loop_size_bb': 2, 'loop_size_ir': 11, 'loop_nested': 0}}
+function=twice, info={'name': 'twice', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 10, 'ir_count': 37, 'is_start': True, 'funccalls': 2, 'syscalls': 0}}
+*/
@@ -0,0 +1,46 @@
+/* CONFIG
+features = near_break, loop_info
+*/
+int f(int x) {
+    return x;
+}
+
+int main(int x) {
+    while (x) {
+        x = f(x);
+        if (x > 10) break;
+    }
+    return f(x);
+}
+
+/* OUTPUT
+[ 0] define function(f) { 
+     }
+[ 1] stop 
+[ 2] function_end 
+[ 3] define function(main) { 
+[ 4]     lb0: 
+[ 5]     loop untill { 
+[ 6]         if, true: lb1, else: lb2) { 
+[ 7]             lb1: 
+[ 8]             call function(f)() 
+[ 9]             some operation 
+[10]             if, true: lb3, else: lb4) { 
+[11]                 some operation 
+[12]                 lb3: 
+[13]                 break 
+[14]                 jump to lb2 
+[15]                 jump to lb0 
+[16]                 lb2: 
+[17]                 call function(f)() 
+                 }
+[18]             stop 
+             }
+[19]         function_end 
+         }
+     }
+{'owner': 'main', 'block_id': 2, 'action': 'fcall', 'called_function': 'f', 'instruction_info': {}, 'loop_info': {}, 'features': {'near_break': 5}}
+{'owner': 'main', 'block_id': 6, 'action': 'fcall', 'called_function': 'f', 'instruction_info': {}, 'loop_info': {}, 'features': {'near_break': -1}}
+function=f, info={'name': 'f', 'info': {'bb_count': 1, 'ir_count': 3, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 6, 'ir_count': 22, 'is_start': True, 'funccalls': 2, 'syscalls': 0}}
+*/
@@ -0,0 +1,65 @@
+/* CONFIG
+horizon_blocks = 5
+horizon_instrs = 14
+*/
+int f(int x) {
+    return x;
+}
+
+int main(int x) {
+    while (x) {
+        x = f(x);
+        if (x == 3) {
+            x = f(x + 1);
+            x = f(x + 2);
+        }
+        if (x > 10) break;
+        x = f(x);
+    }
+    return x;
+}
+
+/* OUTPUT
+[ 0] define function(f) { 
+     }
+[ 1] stop 
+[ 2] function_end 
+[ 3] define function(main) { 
+[ 4]     lb0: 
+[ 5]     loop untill { 
+[ 6]         if, true: lb1, else: lb2) { 
+[ 7]             lb1: 
+[ 8]             call function(f)() 
+[ 9]             some operation 
+[10]             if, true: lb3, else: lb4) { 
+[11]                 some operation 
+[12]                 lb3: 
+[13]                 some operation 
+[14]                 call function(f)() 
+[15]                 some operation 
+[16]                 some operation 
+[17]                 call function(f)() 
+[18]                 some operation 
+[19]                 if, true: lb5, else: lb6) { 
+[20]                     some operation 
+[21]                     lb5: 
+[22]                     break 
+[23]                     jump to lb2 
+[24]                     call function(f)() 
+[25]                     some operation 
+[26]                     jump to lb0 
+[27]                     lb2: 
+                     }
+[28]                 stop 
+                 }
+[29]             function_end 
+             }
+         }
+     }
+{'owner': 'main', 'block_id': 2, 'action': 'fcall', 'called_function': 'f', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 14}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 4, 'action': 'fcall', 'called_function': 'f', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 9}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 4, 'action': 'fcall', 'called_function': 'f', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 9}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 7, 'action': 'fcall', 'called_function': 'f', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=f, info={'name': 'f', 'info': {'bb_count': 1, 'ir_count': 3, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 8, 'ir_count': 34, 'is_start': True, 'funccalls': 4, 'syscalls': 0}}
+*/
@@ -0,0 +1,61 @@
+/* CONFIG
+jobs = 2
+*/
+int inc(int x) {
+    return x + 1;
+}
+
+int dec(int x) {
+    while (x > 0) x = x - 2;
+    return x;
+}
+
+int main(int x) {
+    if (x) x = inc(x);
+    else x = dec(x);
+    return inc(dec(x));
+}
+
+/* OUTPUT
+[ 0] define function(inc) { 
+[ 1]     some operation 
+     }
+[ 2] stop 
+[ 3] function_end 
+[ 4] define function(dec) { 
+[ 5]     lb0: 
+[ 6]     loop untill { 
+[ 7]         some operation 
+[ 8]         if, true: lb1, else: lb2) { 
+[ 9]             lb1: 
+[10]             some operation 
+[11]             some operation 
+[12]             jump to lb0 
+[13]             lb2: 
+             }
+[14]         stop 
+         }
+[15]     function_end 
+[16]     define function(main) { 
+[17]         if, true: lb3, else: lb4) { 
+[18]             lb3: 
+[19]             call function(inc)() 
+[20]             some operation 
+[21]             lb4: 
+[22]             call function(dec)() 
+[23]             some operation 
+[24]             call function(dec)() 
+[25]             call function(inc)() 
+             }
+[26]         stop 
+         }
+[27]     function_end 
+     }
+{'owner': 'main', 'block_id': 5, 'action': 'fcall', 'called_function': 'inc', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 6, 'action': 'fcall', 'called_function': 'dec', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 6, 'action': 'fcall', 'called_function': 'dec', 'instruction_info': {'is_dom': True, 'same_inst_after': 1, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 6, 'action': 'fcall', 'called_function': 'inc', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 1, 'near_break': -1}, 'loop_info': {}}
+function=inc, info={'name': 'inc', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=dec, info={'name': 'dec', 'info': {'bb_count': 3, 'ir_count': 14, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 3, 'ir_count': 14, 'is_start': True, 'funccalls': 4, 'syscalls': 0}}
+*/
@@ -0,0 +1,23 @@
+/* CONFIG
+format = json
+*/
+int leaf(int x) {
+    return x;
+}
+
+int fact(int n) {
+    if (n < 2) return leaf(1);
+    return n * fact(n - 1);
+}
+
+int main(int x) {
+    while (x) {
+        x = fact(x);
+        if (x > 100) break;
+    }
+    return x;
+}
+
+/* OUTPUT
+{"ir":"[ 0] define function(leaf) { \n     }\n[ 1] stop \n[ 2] function_end \n[ 3] define function(fact) { \n[ 4]     if, true: lb0, else: lb1) { \n[ 5]         some operation \n[ 6]         lb0: \n[ 7]         call function(leaf)() \n         }\n[ 8]     stop \n[ 9]     some operation \n[10]     call function(fact)() \n[11]     some operation \n     }\n[12] stop \n[13] function_end \n[14] define function(main) { \n[15]     lb2: \n[16]     loop untill { \n[17]         if, true: lb3, else: lb4) { \n[18]             lb3: \n[19]             call function(fact)() \n[20]             some operation \n[21]             if, true: lb5, else: lb6) { \n[22]                 some operation \n[23]                 lb5: \n[24]                 break \n[25]                 jump to lb4 \n[26]                 jump to lb2 \n[27]                 lb4: \n                 }\n[28]             stop \n             }\n[29]         function_end \n         }\n     }","calls":[{"owner":"fact","block_id":3,"action":"fcall","called_function":"leaf","instruction_info":{"is_dom":true,"same_inst_after":0,"same_inst_before":0,"near_break":-1},"loop_info":{}},{"owner":"fact","block_id":3,"action":"fcall","called_function":"fact","instruction_info":{"is_dom":true,"same_inst_after":0,"same_inst_before":0,"near_break":-1},"loop_info":{}},{"owner":"main","block_id":5,"action":"fcall","called_function":"fact","instruction_info":{"is_dom":false,"same_inst_after":0,"same_inst_before":0,"near_break":5},"loop_info":{}}],"functions":[{"name":"leaf","info":{"bb_count":1,"ir_count":3,"is_start":false,"funccalls":0,"syscalls":0},"interproc":{"transitive_bb_count":1,"transitive_ir_count":3,"reachable_functions":0,"call_depth":0,"is_recursive":false,"reaches_recursion":false,"reachable_syscalls":0}},{"name":"fact","info":{"bb_count":3,"ir_count":13,"is_start":false,"funccalls":2,"syscalls":0},"interproc":{"transitive_bb_count":4,"transitive_ir_count":16,"reachable_functions":1,"call_depth":1,"is_recursive":true,"reaches_recursion":true,"reachable_syscalls":0}},{"name":"main","info":{"bb_count":6,"ir_count":21,"is_start":true,"funccalls":1,"syscalls":0},"interproc":{"transitive_bb_count":10,"transitive_ir_count":37,"reachable_functions":2,"call_depth":2,"is_recursive":false,"reaches_recursion":true,"reachable_syscalls":0}}]}
+*/
@@ -0,0 +1,53 @@
+/* CONFIG
+jump_tables = true
+*/
+int step(int x) {
+    return x - 1;
+}
+
+int main(int x) {
+    switch (x) {
+        case 1: x = step(x); break;
+        case 2: x = 0;
+        case 5: x = step(x + 1); break;
+        default: x = step(x);
+    }
+    return x;
+}
+
+/* OUTPUT
+[ 0] define function(step) { 
+[ 1]     some operation 
+     }
+[ 2] stop 
+[ 3] function_end 
+[ 4] define function(main) { 
+[ 5]     IRAction.SWITCH { 
+[ 6]         jump by table(lb0,lb1,lb2,lb3) 
+[ 7]         lb0: 
+[ 8]         call function(step)() 
+[ 9]         some operation 
+[10]         break 
+[11]         jump to lb4 
+[12]         lb1: 
+[13]         some operation 
+[14]         lb2: 
+[15]         some operation 
+[16]         call function(step)() 
+[17]         some operation 
+[18]         break 
+[19]         jump to lb4 
+[20]         lb3: 
+[21]         call function(step)() 
+[22]         some operation 
+[23]         lb4: 
+         }
+[24]     stop 
+     }
+[25] function_end 
+{'owner': 'main', 'block_id': 2, 'action': 'fcall', 'called_function': 'step', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 2}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 4, 'action': 'fcall', 'called_function': 'step', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 2}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 5, 'action': 'fcall', 'called_function': 'step', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=step, info={'name': 'step', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 6, 'ir_count': 27, 'is_start': True, 'funccalls': 3, 'syscalls': 0}}
+*/
@@ -0,0 +1,50 @@
+/* CONFIG
+frontend = lazy
+find = use, helper
+*/
+typedef int counter_t;
+typedef struct { int a; } pair_t;
+
+int unused(int x) {
+    return x * 3;
+}
+
+counter_t helper(counter_t c) {
+    return c + 1;
+}
+
+int use(pair_t p) {
+    counter_t c = p.a;
+    while (c) c = helper(c) - 2;
+    return helper(c);
+}
+
+/* OUTPUT
+[ 0] define function(use) { 
+[ 1]     declaration(operation(counter_t)) 
+[ 2]     lb0: 
+[ 3]     loop untill { 
+[ 4]         if, true: lb1, else: lb2) { 
+[ 5]             lb1: 
+[ 6]             call function(helper)() 
+[ 7]             some operation 
+[ 8]             some operation 
+[ 9]             jump to lb0 
+[10]             lb2: 
+[11]             call function(helper)() 
+             }
+[12]         stop 
+         }
+[13]     function_end 
+[14]     define function(helper) { 
+[15]         some operation 
+         }
+[16]     stop 
+     }
+[17] function_end 
+{'owner': 'use', 'block_id': 2, 'action': 'fcall', 'called_function': 'helper', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {'loop_size_bb': 2, 'loop_size_ir': 10, 'loop_nested': 0}}
+{'owner': 'use', 'block_id': 3, 'action': 'fcall', 'called_function': 'helper', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=use, info={'name': 'use', 'info': {'bb_count': 4, 'ir_count': 17, 'is_start': False, 'funccalls': 2, 'syscalls': 0}}
+function=helper, info={'name': 'helper', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+lazy=True, functions=['unused', 'helper', 'use'], parsed_bodies=2
+*/
@@ -0,0 +1,30 @@
+/* CONFIG
+frontend = lazy
+*/
+typedef int counter_t;
+
+int twice(counter_t c) {
+    return c * 2;
+}
+
+counter_t sum(counter_t a, counter_t b) {
+    return twice(a) + b;
+}
+
+/* OUTPUT
+[0] define function(twice) { 
+[1]     some operation 
+    }
+[2] stop 
+[3] function_end 
+[4] define function(sum) { 
+[5]     call function(twice)() 
+[6]     some operation 
+    }
+[7] stop 
+[8] function_end 
+{'owner': 'sum', 'block_id': 1, 'action': 'fcall', 'called_function': 'twice', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=twice, info={'name': 'twice', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=sum, info={'name': 'sum', 'info': {'bb_count': 1, 'ir_count': 5, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+lazy=True, functions=['twice', 'sum'], parsed_bodies=2
+*/
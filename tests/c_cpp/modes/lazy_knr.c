@@ -0,0 +1,30 @@
+/* CONFIG
+frontend = lazy
+*/
+int old(a, b)
+    int a;
+    int b;
+{
+    return a + b;
+}
+
+int main(int x) {
+    return old(x, 1);
+}
+
+/* OUTPUT
+[0] define function(old) { 
+[1]     some operation 
+    }
+[2] stop 
+[3] function_end 
+[4] define function(main) { 
+[5]     call function(old)() 
+    }
+[6] stop 
+[7] function_end 
+{'owner': 'main', 'block_id': 1, 'action': 'fcall', 'called_function': 'old', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=old, info={'name': 'old', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': True, 'funccalls': 1, 'syscalls': 0}}
+lazy=False, functions=['old', 'main'], parsed_bodies=0
+*/
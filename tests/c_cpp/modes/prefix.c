@@ -0,0 +1,54 @@
+/* CONFIG
+frontend = prefix
+*/
+//@ first.c
+# 1 "first.c"
+# 1 "common.h" 1
+typedef int value_t;
+value_t twice(value_t v);
+# 2 "first.c" 2
+
+value_t first(value_t v) {
+    return twice(v) + 1;
+}
+//@ second.c
+# 1 "second.c"
+# 1 "common.h" 1
+typedef int value_t;
+value_t twice(value_t v);
+# 2 "second.c" 2
+
+value_t second(value_t v) {
+    while (v) v = twice(v);
+    return first(v);
+}
+
+/* OUTPUT
+[ 0] define function(first) { 
+[ 1]     call function(twice)() 
+[ 2]     some operation 
+     }
+[ 3] stop 
+[ 4] function_end 
+[ 5] define function(second) { 
+[ 6]     lb0: 
+[ 7]     loop untill { 
+[ 8]         if, true: lb1, else: lb2) { 
+[ 9]             lb1: 
+[10]             call function(twice)() 
+[11]             some operation 
+[12]             jump to lb0 
+[13]             lb2: 
+[14]             call function(first)() 
+             }
+[15]         stop 
+         }
+[16]     function_end 
+     }
+{'owner': 'first', 'block_id': 0, 'action': 'fcall', 'called_function': 'twice', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'second', 'block_id': 2, 'action': 'fcall', 'called_function': 'twice', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {'loop_size_bb': 2, 'loop_size_ir': 9, 'loop_nested': 0}}
+{'owner': 'second', 'block_id': 3, 'action': 'fcall', 'called_function': 'first', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=first, info={'name': 'first', 'info': {'bb_count': 1, 'ir_count': 5, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+function=second, info={'name': 'second', 'info': {'bb_count': 3, 'ir_count': 14, 'is_start': False, 'funccalls': 2, 'syscalls': 0}}
+prefix hits=1, misses=1
+*/
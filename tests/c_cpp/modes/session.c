@@ -0,0 +1,67 @@
+/* CONFIG
+frontend = session
+max_asts = 1
+find = alpha, beta, @a.c, alpha, gamma, missing
+*/
+//@ a.c
+#include "shared.h"
+
+int alpha(int x) {
+    return scale(x) + 1;
+}
+//@ b.c
+#include "shared.h"
+
+int beta(int x) {
+    while (x > 0) x = alpha(x) - SCALE;
+    return x;
+}
+
+int gamma(int x) {
+    return beta(x);
+}
+//@ shared.h
+#define SCALE 4
+int scale(int x);
+
+/* OUTPUT
+[ 0] define function(alpha) { 
+[ 1]     call function(scale)() 
+[ 2]     some operation 
+     }
+[ 3] stop 
+[ 4] function_end 
+[ 5] define function(beta) { 
+[ 6]     lb0: 
+[ 7]     loop untill { 
+[ 8]         some operation 
+[ 9]         if, true: lb1, else: lb2) { 
+[10]             lb1: 
+[11]             call function(alpha)() 
+[12]             some operation 
+[13]             some operation 
+[14]             jump to lb0 
+[15]             lb2: 
+             }
+[16]         stop 
+         }
+[17]     function_end 
+[18]     define function(gamma) { 
+[19]         call function(beta)() 
+         }
+[20]     stop 
+     }
+[21] function_end 
+{'owner': 'alpha', 'block_id': 0, 'action': 'fcall', 'called_function': 'scale', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'beta', 'block_id': 2, 'action': 'fcall', 'called_function': 'alpha', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {'loop_size_bb': 2, 'loop_size_ir': 11, 'loop_nested': 0}}
+{'owner': 'gamma', 'block_id': 4, 'action': 'fcall', 'called_function': 'beta', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=alpha, info={'name': 'alpha', 'info': {'bb_count': 1, 'ir_count': 5, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+function=beta, info={'name': 'beta', 'info': {'bb_count': 3, 'ir_count': 15, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+function=gamma, info={'name': 'gamma', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+find alpha: a.c:3, parsed_files=1
+find beta: b.c:3, parsed_files=2
+find @a.c: 2 nodes, parsed_files=3
+find alpha: a.c:3, parsed_files=3
+find gamma: b.c:8, parsed_files=4
+find missing: -, parsed_files=4
+*/
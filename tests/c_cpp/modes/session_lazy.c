@@ -0,0 +1,54 @@
+/* CONFIG
+frontend = session
+lazy_bodies = true
+share_header_prefix = true
+find = beta, alpha
+*/
+//@ a.c
+#include "shared.h"
+
+int alpha(int x) {
+    return scale(x) + 1;
+}
+//@ b.c
+#include "shared.h"
+
+int beta(int x) {
+    while (x > 0) x = alpha(x) - SCALE;
+    return x;
+}
+//@ shared.h
+#define SCALE 4
+typedef int scaled_t;
+scaled_t scale(int x);
+
+/* OUTPUT
+[ 0] define function(beta) { 
+[ 1]     lb0: 
+[ 2]     loop untill { 
+[ 3]         some operation 
+[ 4]         if, true: lb1, else: lb2) { 
+[ 5]             lb1: 
+[ 6]             call function(alpha)() 
+[ 7]             some operation 
+[ 8]             some operation 
+[ 9]             jump to lb0 
+[10]             lb2: 
+             }
+[11]         stop 
+         }
+[12]     function_end 
+[13]     define function(alpha) { 
+[14]         call function(scale)() 
+[15]         some operation 
+         }
+[16]     stop 
+     }
+[17] function_end 
+{'owner': 'beta', 'block_id': 1, 'action': 'fcall', 'called_function': 'alpha', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {'loop_size_bb': 2, 'loop_size_ir': 11, 'loop_nested': 0}}
+{'owner': 'alpha', 'block_id': 3, 'action': 'fcall', 'called_function': 'scale', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=beta, info={'name': 'beta', 'info': {'bb_count': 3, 'ir_count': 15, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+function=alpha, info={'name': 'alpha', 'info': {'bb_count': 1, 'ir_count': 5, 'is_start': False, 'funccalls': 1, 'syscalls': 0}}
+find beta: b.c:3, parsed_files=2
+find alpha: a.c:3, parsed_files=2
+*/
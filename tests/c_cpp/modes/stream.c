@@ -0,0 +1,33 @@
+/* CONFIG
+stream = true
+*/
+int leaf(int x) {
+    return x + 1;
+}
+
+int walk(int x) {
+    while (x > 0) {
+        x = leaf(x) - 3;
+        if (x == 7) break;
+    }
+    return leaf(x);
+}
+
+int leaf(int x) {
+    return x - 1;
+}
+
+int main(int x) {
+    return walk(x) + leaf(x);
+}
+
+/* OUTPUT
+function=leaf, info={'name': 'leaf', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+{'owner': 'walk', 'block_id': 2, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 6}, 'loop_info': {}}
+{'owner': 'walk', 'block_id': 6, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': True, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+function=walk, info={'name': 'walk', 'info': {'bb_count': 6, 'ir_count': 24, 'is_start': False, 'funccalls': 2, 'syscalls': 0}}
+function=leaf, info={'name': 'leaf', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+{'owner': 'main', 'block_id': 8, 'action': 'fcall', 'called_function': 'walk', 'instruction_info': {'is_dom': False, 'same_inst_after': 1, 'same_inst_before': 0, 'near_break': -1}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 8, 'action': 'fcall', 'called_function': 'leaf', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 1, 'near_break': -1}, 'loop_info': {}}
+function=main, info={'name': 'main', 'info': {'bb_count': 1, 'ir_count': 6, 'is_start': True, 'funccalls': 2, 'syscalls': 0}}
+*/
@@ -0,0 +1,65 @@
+int step(int x) {
+    return x - 1;
+}
+
+int main(int x) {
+    while (x) {
+        switch (x) {
+            case 1: x = step(x); break;
+            case 2: x = 0;
+            default: x = step(x);
+        }
+        if (x) break;
+    }
+    return x;
+}
+
+/* OUTPUT
+[ 0] define function(step) { 
+[ 1]     some operation 
+     }
+[ 2] stop 
+[ 3] function_end 
+[ 4] define function(main) { 
+[ 5]     lb0: 
+[ 6]     loop untill { 
+[ 7]         if, true: lb1, else: lb2) { 
+[ 8]             lb1: 
+[ 9]             IRAction.SWITCH { 
+[10]                 if, true: lb3, else: lb4) { 
+[11]                     lb3: 
+[12]                     call function(step)() 
+[13]                     some operation 
+[14]                     break 
+[15]                     jump to lb4 
+[16]                     lb4: 
+[17]                     if, true: lb5, else: lb6) { 
+[18]                         lb5: 
+[19]                         some operation 
+[20]                         lb6: 
+[21]                         if, true: lb7, else: lb8) { 
+[22]                             lb7: 
+[23]                             call function(step)() 
+[24]                             some operation 
+[25]                             lb8: 
+[26]                             if, true: lb9, else: lb10) { 
+[27]                                 lb9: 
+[28]                                 break 
+[29]                                 jump to lb2 
+[30]                                 jump to lb0 
+[31]                                 lb2: 
+                                 }
+[32]                             stop 
+                             }
+[33]                         function_end 
+                         }
+                     }
+                 }
+             }
+         }
+     }
+{'owner': 'main', 'block_id': 3, 'action': 'fcall', 'called_function': 'step', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 2}, 'loop_info': {}}
+{'owner': 'main', 'block_id': 7, 'action': 'fcall', 'called_function': 'step', 'instruction_info': {'is_dom': False, 'same_inst_after': 0, 'same_inst_before': 0, 'near_break': 7}, 'loop_info': {}}
+function=step, info={'name': 'step', 'info': {'bb_count': 1, 'ir_count': 4, 'is_start': False, 'funccalls': 0, 'syscalls': 0}}
+function=main, info={'name': 'main', 'info': {'bb_count': 11, 'ir_count': 40, 'is_start': True, 'funccalls': 2, 'syscalls': 0}}
+*/
\ No newline at end of file